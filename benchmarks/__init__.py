@@ -0,0 +1,4 @@
+"""
+Benchmarks for crawley. Each module can be run with `python -m benchmarks.<module>` and prints its results as JSON,
+so results can be saved and compared across commits.
+"""
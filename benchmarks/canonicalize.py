@@ -0,0 +1,92 @@
+"""
+Compares canonicalizing discovered urls with the previous urlparse-per-url path, which only removed fragments.
+
+    python -m benchmarks.canonicalize [--corpus DIRECTORY] [--repeat N]
+"""
+
+import argparse
+import random
+from urllib.parse import urljoin, urlparse
+
+from benchmarks.common import load_corpus, measure, report
+from crawley.crawling.util import (
+    UrlCanonicalizer,
+    get_internal_urls,
+    is_url,
+    lxml_links,
+    remove_fragment,
+)
+
+BASE_URL = "https://example.com/section/index.html"
+
+
+def urlparse_internal_urls(base_url: str, links: list[str]) -> set[str]:
+    """The previous path: join, validate and compare the netloc of each url with urlparse."""
+    absolute_urls = [urljoin(base_url, url) for url in links]
+    base_netloc = urlparse(base_url).netloc
+    return {
+        remove_fragment(url)
+        for url in absolute_urls
+        if is_url(url) and urlparse(url).netloc == base_netloc
+    }
+
+
+def variant(rng: random.Random, link: str) -> str:
+    """Rewrites a link into an equivalent form, as sites often do."""
+    if not link.startswith("https://example.com"):
+        return link
+    return rng.choice(
+        (
+            link,
+            link.replace("https://example.com", "HTTPS://Example.com:443"),
+            link.replace("#top", "&utm_source=newsletter#top"),
+            link.replace("/article", "/section/../article"),
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus", help="A directory of saved html pages.")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    pages = [
+        [variant(rng, link) for link in lxml_links(page)]
+        for page in load_corpus(args.corpus)
+    ]
+    links = sum(map(len, pages))
+
+    def urlparse_path():
+        return [urlparse_internal_urls(BASE_URL, page) for page in pages]
+
+    def canonical_path(canonicalizer: UrlCanonicalizer):
+        return [
+            get_internal_urls(BASE_URL, page, lambda links: links, canonicalizer)
+            for page in pages
+        ]
+
+    warm = UrlCanonicalizer()
+    paths = {
+        "urlparse": urlparse_path,
+        "canonical[uncached]": lambda: canonical_path(UrlCanonicalizer(cache_size=0)),
+        "canonical[cached]": lambda: canonical_path(warm),
+    }
+    for name, path in paths.items():
+        unique = len(set().union(*path()))
+        timings = measure(path, args.repeat)
+        report(
+            "canonicalize",
+            {
+                "path": name,
+                "links": links,
+                "unique_urls": unique,
+                "urls_per_second": links / timings["best"],
+                **timings,
+            },
+        )
+
+
+if __name__ == "__main__":
+    main()
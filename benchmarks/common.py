@@ -0,0 +1,71 @@
+import json
+import random
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+
+def load_corpus(directory: str = None, pages: int = 200, seed: int = 0) -> list[bytes]:
+    """
+    Loads a corpus of saved html pages.
+    :param directory: A directory of saved pages (*.html, *.htm). A synthetic corpus is generated if not given.
+    :param pages: The amount of pages in a synthetic corpus.
+    :param seed: The seed of a synthetic corpus.
+    :return: The raw bytes of the pages.
+    """
+    if directory:
+        paths = sorted(
+            path
+            for path in Path(directory).rglob("*")
+            if path.suffix.lower() in (".html", ".htm")
+        )
+        return [path.read_bytes() for path in paths]
+    rng = random.Random(seed)
+    return [synthetic_page(rng) for _ in range(pages)]
+
+
+def synthetic_page(rng: random.Random, links: int = None, size: int = None) -> bytes:
+    """Generates an html page with a realistic mix of links, text and markup."""
+    links = links if links is not None else rng.randint(20, 300)
+    size = size if size is not None else rng.randint(20_000, 200_000)
+    parts = ["<!DOCTYPE html><html><head><meta charset='utf-8'><title>Page</title>"]
+    parts.append("<style>body{font-family:sans-serif}</style></head><body><nav>")
+    for i in range(links):
+        href = rng.choice(
+            (
+                f"/section/{rng.randint(0, 10_000)}",
+                f"https://example.com/article?id={rng.randint(0, 10_000)}#top",
+                f"../relative/{i}.html",
+                f"https://external{rng.randint(0, 50)}.org/",
+            )
+        )
+        parts.append(
+            f'<div class="item"><a href="{href}" class="link">Link {i}</a></div>'
+        )
+        if rng.random() < 0.3:
+            parts.append(
+                f"<p>{'Lorem ipsum dolor sit amet. ' * rng.randint(1, 20)}</p>"
+            )
+    parts.append("</nav><main>")
+    while sum(map(len, parts)) < size:
+        parts.append(f"<p><span>{'Consectetur adipiscing elit. ' * 20}</span></p>")
+    parts.append("</main></body></html>")
+    return "".join(parts).encode()
+
+
+def measure(function: Callable[[], object], repeat: int = 5) -> dict[str, float]:
+    """Times a function, returning the best and median of several runs in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return {"best": min(times), "median": statistics.median(times)}
+
+
+def report(benchmark: str, results: dict):
+    """Prints benchmark results as a JSON line."""
+    json.dump({"benchmark": benchmark, **results}, sys.stdout)
+    sys.stdout.write("\n")
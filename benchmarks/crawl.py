@@ -0,0 +1,148 @@
+"""
+Measures the throughput of Crawler.crawl over a synthetic web served locally (see benchmarks.site), with
+StaticRequestClient on its own and wrapped in each decorator. The server runs in its own process, and each client in a
+fresh process, so CPU time and peak memory are the crawl's alone.
+
+    python -m benchmarks.crawl [--clients static,adaptive] [--workers N] [--limit N] [graph options]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Mapping
+
+from benchmarks.common import report
+from benchmarks.site import SiteGraph, LocalResolver
+from crawley.crawling import Crawler
+from crawley.crawling.crawlers.algorithms.breadth import BreadthCrawlType
+from crawley.web_requests import WebRequestClient, StaticRequestClient, Response
+from crawley.web_requests.clients.decorators import (
+    WebRequestClientDecorator,
+    PoliteRequestClient,
+    AdaptiveRequestClient,
+)
+
+CLIENTS = {
+    "static": lambda client: client,
+    "polite": PoliteRequestClient,
+    "adaptive": AdaptiveRequestClient,
+}
+
+
+class TimedRequestClient(WebRequestClientDecorator):
+    """Records the latency and status of every fetch."""
+
+    def __init__(self, client: WebRequestClient):
+        super().__init__(client)
+        self.latencies: list[float] = []
+        self.pages = 0
+        self.failures = 0
+
+    async def fetch(self, url: str, headers: Mapping[str, str] = None) -> Response:
+        start = time.perf_counter()
+        try:
+            response = await self.client.fetch(url, headers)
+        except Exception:
+            self.failures += 1
+            raise
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+        if response.is_parsable and response.fetch.status < 400:
+            self.pages += 1
+        else:
+            self.failures += 1
+        return response
+
+
+async def crawl(name: str, port: int, graph: SiteGraph, workers: int, limit: int):
+    """Crawls the synthetic web with a client, and reports its throughput."""
+    static = StaticRequestClient(limit_per_host=workers, resolver=LocalResolver())
+    client = TimedRequestClient(CLIENTS[name](static))
+    seed = f"http://{graph.host(0)}:{port}/page/0"
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    cpu = usage.ru_utime + usage.ru_stime
+    async with Crawler(client) as crawler:
+        start = time.perf_counter()
+        urls = await crawler.crawl(
+            [seed],
+            limit,
+            target=BreadthCrawlType.PAGES,
+            internal_only=False,
+            workers=workers,
+        )
+        elapsed = time.perf_counter() - start
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    cpu = usage.ru_utime + usage.ru_stime - cpu
+    latencies = (
+        statistics.quantiles(client.latencies, n=100)
+        if len(client.latencies) > 1
+        else [0] * 99
+    )
+    report(
+        "crawl",
+        {
+            "client": name,
+            "workers": workers,
+            "graph": graph.__dict__,
+            "pages": client.pages,
+            "failures": client.failures,
+            "urls": len(urls),
+            "seconds": elapsed,
+            "pages_per_second": client.pages / elapsed,
+            "p50_fetch_ms": latencies[49] * 1000,
+            "p99_fetch_ms": latencies[98] * 1000,
+            "cpu_ms_per_page": cpu * 1000 / max(client.pages, 1),
+            "peak_megabytes": usage.ru_maxrss / 1024,
+        },
+    )
+
+
+def start_site(graph: SiteGraph) -> tuple[subprocess.Popen, int]:
+    """Starts serving a graph in a separate process, returning the process and its port."""
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.site", *graph.to_arguments()],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    return server, json.loads(server.stdout.readline())["port"]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--clients", default=",".join(CLIENTS))
+    parser.add_argument("--workers", type=int, default=50)
+    parser.add_argument("--limit", type=int, help="The maximum amount of pages.")
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    SiteGraph.add_arguments(parser)
+    args = parser.parse_args()
+    graph = SiteGraph.from_arguments(args)
+
+    if args.port:
+        # failed requests are expected, and logging them would be measured too
+        logging.getLogger("crawley").setLevel(logging.CRITICAL)
+        return asyncio.run(
+            crawl(args.clients, args.port, graph, args.workers, args.limit)
+        )
+    server, port = start_site(graph)
+    try:
+        for name in args.clients.split(","):
+            command = [sys.executable, "-m", "benchmarks.crawl", "--clients", name]
+            command += ["--port", str(port), "--workers", str(args.workers)]
+            if args.limit:
+                command += ["--limit", str(args.limit)]
+            subprocess.run(command + graph.to_arguments(), check=True)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
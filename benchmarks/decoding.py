@@ -0,0 +1,85 @@
+"""
+Compares parsing webpages from the bytes they were sent as (in their declared or sniffed encoding) with decoding them
+to str first, as StaticRequestClient used to. Measures pages per second, the peak memory of holding and parsing the
+corpus, and the pages whose declared charset fails to decode them (which the str path loses).
+
+    python -m benchmarks.decoding [--corpus DIRECTORY] [--repeat N]
+"""
+
+import argparse
+import tracemalloc
+
+from benchmarks.common import load_corpus, measure, report
+from crawley.crawling.util import LINK_EXTRACTORS, extract_links
+from crawley.web_requests.clients.client import sniff_encoding
+
+
+def decode(page: bytes, encoding: str) -> str | None:
+    try:
+        return page.decode(encoding)
+    except UnicodeDecodeError:
+        return None
+
+
+def str_path(corpus: list[bytes], encodings: list[str], extractor) -> list[list[str]]:
+    # one page is decoded at a time, as a crawl would
+    return [
+        extractor(text)
+        for page, encoding in zip(corpus, encodings)
+        if (text := decode(page, encoding)) is not None
+    ]
+
+
+def bytes_path(corpus: list[bytes], encodings: list[str], extractor) -> list[list[str]]:
+    return [
+        extract_links(page, extractor, encoding)
+        for page, encoding in zip(corpus, encodings)
+    ]
+
+
+def peak_megabytes(function) -> float:
+    """Gets the peak memory allocated while running a function, in megabytes."""
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus", help="A directory of saved html pages.")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    size = sum(map(len, corpus))
+    # saved pages have no headers, so their encoding is sniffed as the client would without a declared charset
+    encodings = [sniff_encoding(page) or "utf-8" for page in corpus]
+    undecodable = sum(
+        decode(page, encoding) is None for page, encoding in zip(corpus, encodings)
+    )
+    paths = {"str": str_path, "bytes": bytes_path}
+    for name, extractor in LINK_EXTRACTORS.items():
+        for path, function in paths.items():
+            run = lambda: function(corpus, encodings, extractor)
+            timings = measure(run, args.repeat)
+            report(
+                "decoding",
+                {
+                    "extractor": name,
+                    "path": path,
+                    "pages": len(corpus),
+                    "bytes": size,
+                    "links": sum(map(len, run())),
+                    "pages_lost": undecodable if path == "str" else 0,
+                    "pages_per_second": len(corpus) / timings["best"],
+                    "peak_megabytes": peak_megabytes(run),
+                    **timings,
+                },
+            )
+
+
+if __name__ == "__main__":
+    main()
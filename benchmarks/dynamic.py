@@ -0,0 +1,96 @@
+"""
+Compares the pages per second of DynamicRequestClient with and without resource blocking and in-page link extraction,
+fetching a local fixture site. Requires a Playwright browser (playwright install chromium).
+
+    python -m benchmarks.dynamic [--pages N] [--concurrency N] [--asset-delay SECONDS]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from aiohttp import web
+from playwright.async_api import async_playwright
+
+from benchmarks.common import report, synthetic_page
+from crawley.web_requests import DynamicRequestClient, BLOCK_UNNEEDED
+
+ASSETS = (
+    '<link rel="stylesheet" href="/assets/style.css">'
+    '<img src="/assets/{page}.png"><img src="/assets/banner.jpg">'
+    '<script src="https://www.google-analytics.com/analytics.js" async></script>'
+)
+
+
+def fixture_site(asset_delay: float) -> web.Application:
+    """Creates a site of synthetic pages, each loading a stylesheet, images and a tracker."""
+    rng = random.Random(0)
+    pages = [synthetic_page(rng, size=50_000).decode() for _ in range(20)]
+
+    async def page(request: web.Request) -> web.Response:
+        number = int(request.match_info["page"])
+        body = pages[number % len(pages)].replace(
+            "<body>", f"<body>{ASSETS.format(page=number)}", 1
+        )
+        return web.Response(text=body, content_type="text/html")
+
+    async def asset(request: web.Request) -> web.Response:
+        await asyncio.sleep(asset_delay)
+        return web.Response(body=b"\0" * 20_000, content_type="image/png")
+
+    app = web.Application()
+    app.router.add_get("/page/{page:\\d+}", page)
+    app.router.add_get("/assets/{name}", asset)
+    return app
+
+
+async def run(args: argparse.Namespace):
+    runner = web.AppRunner(fixture_site(args.asset_delay))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    urls = [f"http://127.0.0.1:{port}/page/{i}" for i in range(args.pages)]
+
+    configurations = {
+        "default": {},
+        "blocked": {"resource_policy": BLOCK_UNNEEDED},
+        "blocked+links": {"resource_policy": BLOCK_UNNEEDED, "extract_links": True},
+    }
+    async with async_playwright() as playwright:
+        for name, options in configurations.items():
+            browser = await playwright.chromium.launch()
+            async with DynamicRequestClient(
+                browser, args.concurrency, **options
+            ) as client:
+                start = time.perf_counter()
+                fetched = sum(
+                    [
+                        not isinstance(response, Exception)
+                        async for response in client.fetch_multiple(urls)
+                    ]
+                )
+                elapsed = time.perf_counter() - start
+            report(
+                "dynamic",
+                {
+                    "configuration": name,
+                    "pages": fetched,
+                    "seconds": elapsed,
+                    "pages_per_second": fetched / elapsed,
+                },
+            )
+    await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--asset-delay", type=float, default=0.05)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
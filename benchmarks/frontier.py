@@ -0,0 +1,63 @@
+"""
+Compares the push/pop throughput and memory use of the in-memory and disk-backed frontiers.
+
+    python -m benchmarks.frontier [--urls N] [--directory DIRECTORY]
+"""
+
+import argparse
+import resource
+import subprocess
+import sys
+import time
+
+from benchmarks.common import report
+from crawley.crawling.frontier import BreadthFrontier, DiskFrontier
+
+FRONTIERS = {"breadth": BreadthFrontier, "disk": DiskFrontier}
+
+
+def url(i: int) -> str:
+    return f"https://example{i % 1000}.com/section/{i % 997}/article-{i}?page={i % 10}"
+
+
+def run(name: str, urls: int, directory: str = None):
+    """Pushes urls over a few depths and pops them all, in a fresh process so peak memory is not shared."""
+    frontier = DiskFrontier(directory) if name == "disk" else FRONTIERS[name]()
+    start = time.perf_counter()
+    for i in range(urls):
+        frontier.push(url(i), i * 4 // urls)
+    pushed = time.perf_counter()
+    while frontier.pop():
+        pass
+    popped = time.perf_counter()
+    report(
+        "frontier",
+        {
+            "frontier": name,
+            "urls": urls,
+            "pushes_per_second": urls / (pushed - start),
+            "pops_per_second": urls / (popped - pushed),
+            "peak_megabytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        },
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--urls", type=int, default=10_000_000)
+    parser.add_argument("--directory", help="Where the disk frontier spills to.")
+    parser.add_argument("--frontier", choices=FRONTIERS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.frontier:
+        return run(args.frontier, args.urls, args.directory)
+    for name in FRONTIERS:
+        command = [sys.executable, "-m", "benchmarks.frontier", "--frontier", name]
+        command += ["--urls", str(args.urls)]
+        if args.directory:
+            command += ["--directory", args.directory]
+        subprocess.run(command, check=True)
+
+
+if __name__ == "__main__":
+    main()
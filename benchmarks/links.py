@@ -0,0 +1,44 @@
+"""
+Compares the link extraction backends on a corpus of saved pages.
+
+    python -m benchmarks.links [--corpus DIRECTORY] [--repeat N]
+"""
+
+import argparse
+from functools import partial
+
+from benchmarks.common import load_corpus, measure, report
+from crawley.crawling.util import LINK_EXTRACTORS, soup_links
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus", help="A directory of saved html pages.")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    size = sum(map(len, corpus))
+    extractors = {
+        **LINK_EXTRACTORS,
+        "soup[html.parser]": partial(soup_links, parser="html.parser"),
+    }
+    for name, extractor in extractors.items():
+        links = sum(len(extractor(page)) for page in corpus)
+        timings = measure(lambda: [extractor(page) for page in corpus], args.repeat)
+        report(
+            "links",
+            {
+                "extractor": name,
+                "pages": len(corpus),
+                "bytes": size,
+                "links": links,
+                "pages_per_second": len(corpus) / timings["best"],
+                "megabytes_per_second": size / timings["best"] / 1e6,
+                **timings,
+            },
+        )
+
+
+if __name__ == "__main__":
+    main()
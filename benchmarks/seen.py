@@ -0,0 +1,46 @@
+"""
+Compares the memory use and speed of the seen url stores.
+
+    python -m benchmarks.seen [--urls N]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from benchmarks.common import report
+from crawley.crawling.seen import FingerprintSet, ScalableBloomFilter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--urls", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    stores = {
+        "set": set,
+        "fingerprint": FingerprintSet,
+        "bloom": ScalableBloomFilter,
+    }
+    for name, store_type in stores.items():
+        tracemalloc.start()
+        store = store_type()
+        start = time.perf_counter()
+        for i in range(args.urls):
+            store.add(f"https://example.com/section/{i % 1000}/article-{i}?page={i}")
+        elapsed = time.perf_counter() - start
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        report(
+            "seen",
+            {
+                "store": name,
+                "urls": args.urls,
+                "bytes_per_url": memory / args.urls,
+                "adds_per_second": args.urls / elapsed,
+            },
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Serves a deterministic, synthetic web of several hosts from one local aiohttp server. Every host name ending in .test
+resolves to the server (see LocalResolver), and each host has its own pages, sitemap and robots.txt.
+
+    python -m benchmarks.site [--hosts N] [--pages-per-host N] [--fan-out N] [--port PORT] ...
+
+Prints {"port": PORT} once the server is listening.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import socket
+import sys
+from collections import Counter
+from dataclasses import dataclass, fields
+
+from aiohttp import web
+from aiohttp.abc import AbstractResolver, ResolveResult
+
+LATENCY_DISTRIBUTIONS = ("fixed", "exponential", "lognormal")
+
+
+@dataclass
+class SiteGraph:
+    """The shape of a synthetic web. The same graph always generates the same pages, links and failures."""
+
+    hosts: int = 10
+    pages_per_host: int = 200
+    fan_out: int = 20
+    external_links: float = 0.1
+    page_size: int = 20_000
+    latency: float = 0.01
+    latency_distribution: str = "exponential"
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    sitemaps: bool = True
+    robots: bool = True
+    seed: int = 0
+
+    @staticmethod
+    def host(index: int) -> str:
+        return f"host{index}.test"
+
+    def links(self, host: int, page: int, port: int) -> list[str]:
+        """Gets the links of a page: mostly to pages of the same host, some to pages of other hosts."""
+        rng = random.Random(f"{self.seed}:links:{host}:{page}")
+        links = []
+        for _ in range(self.fan_out):
+            target = rng.randrange(self.pages_per_host)
+            if self.hosts > 1 and rng.random() < self.external_links:
+                other = rng.randrange(self.hosts)
+                links.append(f"http://{self.host(other)}:{port}/page/{target}")
+            else:
+                links.append(f"/page/{target}")
+        return links
+
+    def latency_of(self, rng: random.Random) -> float:
+        """Samples the latency of a response, in seconds."""
+        if not self.latency:
+            return 0
+        if self.latency_distribution == "exponential":
+            return rng.expovariate(1 / self.latency)
+        if self.latency_distribution == "lognormal":
+            # a heavy tail, with the given mean
+            sigma = 1
+            return rng.lognormvariate(math.log(self.latency) - sigma**2 / 2, sigma)
+        return self.latency
+
+    @classmethod
+    def add_arguments(cls, parser: argparse.ArgumentParser):
+        """Adds an option for each field of the graph to a parser."""
+        for field in fields(cls):
+            option = f"--{field.name.replace('_', '-')}"
+            if field.type is bool:
+                parser.add_argument(option, type=_parse_bool, default=field.default)
+            elif field.name == "latency_distribution":
+                parser.add_argument(
+                    option, choices=LATENCY_DISTRIBUTIONS, default=field.default
+                )
+            else:
+                parser.add_argument(option, type=field.type, default=field.default)
+
+    @classmethod
+    def from_arguments(cls, args: argparse.Namespace) -> "SiteGraph":
+        return cls(**{field.name: getattr(args, field.name) for field in fields(cls)})
+
+    def to_arguments(self) -> list[str]:
+        """Gets the command line options that create this graph."""
+        arguments = []
+        for field in fields(self):
+            arguments += [
+                f"--{field.name.replace('_', '-')}",
+                str(getattr(self, field.name)),
+            ]
+        return arguments
+
+
+def _parse_bool(value: str) -> bool:
+    return value.lower() in ("1", "true", "yes")
+
+
+class LocalResolver(AbstractResolver):
+    """Defines a resolver that resolves every .test host name to the local machine."""
+
+    async def resolve(
+        self, host: str, port: int = 0, family: socket.AddressFamily = socket.AF_INET
+    ) -> list[ResolveResult]:
+        if not host.endswith(".test"):
+            raise OSError(f"{host} is not a synthetic host")
+        return [
+            {
+                "hostname": host,
+                "host": "127.0.0.1",
+                "port": port,
+                "family": socket.AF_INET,
+                "proto": 0,
+                "flags": socket.AI_NUMERICHOST,
+            }
+        ]
+
+    async def close(self) -> None:
+        pass
+
+
+def create_app(graph: SiteGraph) -> web.Application:
+    """Creates the app that serves a graph. Failures are decided per attempt, so a retried request can succeed."""
+    attempts = Counter()
+    padding = (
+        "<p>"
+        + "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 20
+        + "</p>"
+    )
+
+    def host_of(request: web.Request) -> int | None:
+        name = request.host.rsplit(":", 1)[0]
+        if not (name.startswith("host") and name.endswith(".test")):
+            return None
+        index = name[4:-5]
+        return int(index) if index.isdigit() and int(index) < graph.hosts else None
+
+    async def page(request: web.Request) -> web.Response:
+        host, number = host_of(request), int(request.match_info["page"])
+        if host is None or number >= graph.pages_per_host:
+            raise web.HTTPNotFound()
+        key = f"{host}:{number}"
+        attempts[key] += 1
+        rng = random.Random(f"{graph.seed}:response:{key}:{attempts[key]}")
+        await asyncio.sleep(graph.latency_of(rng))
+        failure = rng.random()
+        if failure < graph.error_rate:
+            return web.Response(status=500)
+        if failure < graph.error_rate + graph.throttle_rate:
+            return web.Response(status=429, headers={"Retry-After": "0.1"})
+
+        links = graph.links(host, number, request.url.port)
+        parts = ["<!DOCTYPE html><html><head><title>Page</title></head><body><nav>"]
+        parts += [f'<a href="{link}">{link}</a>' for link in links]
+        parts.append("</nav><main>")
+        size = sum(map(len, parts))
+        parts += [padding] * max(0, (graph.page_size - size) // len(padding))
+        parts.append("</main></body></html>")
+        return web.Response(text="".join(parts), content_type="text/html")
+
+    async def sitemap(request: web.Request) -> web.Response:
+        host = host_of(request)
+        if host is None or not graph.sitemaps:
+            raise web.HTTPNotFound()
+        base = f"http://{request.host}"
+        urls = "".join(
+            f"<url><loc>{base}/page/{number}</loc></url>"
+            for number in range(graph.pages_per_host)
+        )
+        return web.Response(
+            text='<?xml version="1.0" encoding="UTF-8"?>'
+            f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>',
+            content_type="application/xml",
+        )
+
+    async def robots(request: web.Request) -> web.Response:
+        if host_of(request) is None or not graph.robots:
+            raise web.HTTPNotFound()
+        lines = ["User-agent: *", "Disallow: /private/"]
+        if graph.sitemaps:
+            lines.append(f"Sitemap: http://{request.host}/sitemap.xml")
+        return web.Response(text="\n".join(lines) + "\n", content_type="text/plain")
+
+    app = web.Application()
+    app.router.add_get("/page/{page:\\d+}", page)
+    app.router.add_get("/sitemap.xml", sitemap)
+    app.router.add_get("/robots.txt", robots)
+    return app
+
+
+async def serve(graph: SiteGraph, port: int = 0) -> tuple[web.AppRunner, int]:
+    """
+    Starts serving a graph on the local machine.
+    :return: The runner of the server, to clean it up, and the port it listens on.
+    """
+    runner = web.AppRunner(create_app(graph), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", port)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1]
+
+
+async def run(graph: SiteGraph, port: int):
+    runner, port = await serve(graph, port)
+    json.dump({"port": port}, sys.stdout)
+    sys.stdout.write("\n")
+    sys.stdout.flush()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    SiteGraph.add_arguments(parser)
+    parser.add_argument("--port", type=int, default=0)
+    args = parser.parse_args()
+    try:
+        asyncio.run(run(SiteGraph.from_arguments(args), args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
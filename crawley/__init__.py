@@ -1 +1,3 @@
 from .asynchronous import AsyncContextManager
+from .metrics import CrawlMetrics, MetricsSnapshot, TimingSnapshot
+from .profiling import CrawlProfiler, BlockedLoop, STAGES
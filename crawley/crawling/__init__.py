@@ -1,2 +1,8 @@
-from .sitemap import SitemapCache
+from .sitemap import SitemapCache, SitemapPage
+from .frontier import Frontier, BreadthFrontier, DiskFrontier
+from .scheduler import HostScheduler
+from .seen import SeenStore, FingerprintSet, ScalableBloomFilter
+from .results import ResultSink, CrawlRecord
+from .checkpoint import CrawlCheckpoint, CrawlSnapshot
+from .recrawl import RecrawlLog, CHANGE_FREQUENCIES
 from .crawlers import *
@@ -0,0 +1,326 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+from collections.abc import AsyncIterator, Iterable, Mapping
+from dataclasses import dataclass, field
+
+from crawley import AsyncContextManager
+from crawley.crawling.seen import SeenStore, FingerprintSet
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (url TEXT PRIMARY KEY, depth INTEGER NOT NULL) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS frontier_depth ON frontier (depth, url);
+CREATE TABLE IF NOT EXISTS discovered (url TEXT PRIMARY KEY) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS seen_urls (url TEXT PRIMARY KEY) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS seen_fingerprints (fingerprint INTEGER PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS hosts (
+    homepage TEXT PRIMARY KEY,
+    sitemap_crawled INTEGER NOT NULL DEFAULT 0,
+    state TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID;
+"""
+_TABLES = (
+    "frontier",
+    "discovered",
+    "seen_urls",
+    "seen_fingerprints",
+    "hosts",
+    "state",
+)
+_BATCH_SIZE = 1000
+
+
+def _to_signed(key: int) -> int:
+    """Stores an unsigned 64-bit fingerprint in a signed SQLite integer."""
+    return key - (1 << 64) if key >> 63 else key
+
+
+def _to_unsigned(key: int) -> int:
+    return key + (1 << 64) if key < 0 else key
+
+
+@dataclass
+class CrawlSnapshot:
+    """The state of a crawl at its last checkpoint."""
+
+    limit: int | None
+    target: str
+    internal_only: bool
+    pages_crawled: int = 0
+    sitemap_homepages: set[str] = field(default_factory=set)
+
+
+@dataclass
+class _Changes:
+    """The changes to a crawl since its last checkpoint."""
+
+    pushed: dict[str, int] = field(default_factory=dict)
+    crawled: list[str] = field(default_factory=list)
+    discovered: list[str] = field(default_factory=list)
+    sitemap_homepages: list[str] = field(default_factory=list)
+
+
+class CrawlCheckpoint(AsyncContextManager):
+    """
+    Defines an on-disk checkpoint of a crawl, stored in SQLite. A crawl that stops (e.g. after a crash, restart or
+    timeout) can be resumed from its last checkpoint.
+
+    Checkpoints are incremental: changes to the frontier, the discovered urls and the hosts whose sitemaps have been
+    crawled are collected in memory, then written every interval seconds in a worker thread. The event loop only swaps
+    out the collected changes, so a checkpoint takes microseconds on the loop however large the crawl is. The urls
+    the crawler had already seen before the crawl started are written once, when it starts. A checkpoint is read back
+    in batches, so it is never held in memory at once.
+
+    The state the request client keeps for each host (see WebRequestClient.host_states), such as the rates and pauses
+    of an AdaptiveRequestClient and the robots.txt files of a PoliteRequestClient, is written with every checkpoint,
+    so a resumed crawl does not hit throttled hosts at full speed. HostScheduler intervals are not saved.
+
+    The urls being crawled stay in the frontier of the checkpoint until they have been crawled, so they are crawled
+    again after a resume.
+    """
+
+    def __init__(self, path: str | os.PathLike, interval: float = 30):
+        """
+        Creates an instance of CrawlCheckpoint.
+        :param path: The path of the SQLite database file. Created if it does not exist.
+        :param interval: The amount of seconds between checkpoints.
+        """
+        if interval <= 0:
+            raise ValueError("interval must be greater than 0")
+        self.path = path
+        self.interval = interval
+        self._connection: sqlite3.Connection | None = None
+        self._changes = _Changes()
+        self._writing = asyncio.Lock()
+
+    def pushed(self, url: str, depth: int) -> None:
+        """Records that a url was added to the frontier."""
+        self._changes.pushed[url] = depth
+
+    def crawled(self, url: str) -> None:
+        """Records that a url was crawled, removing it from the frontier."""
+        self._changes.crawled.append(url)
+
+    def discovered(self, url: str) -> None:
+        """Records that a url was discovered."""
+        self._changes.discovered.append(url)
+
+    def sitemap_crawled(self, homepage: str) -> None:
+        """Records that the sitemaps of a host were crawled."""
+        self._changes.sitemap_homepages.append(homepage)
+
+    async def start(
+        self,
+        limit: int | None,
+        target: str,
+        internal_only: bool,
+        resume: bool = False,
+        seen: SeenStore | set[str] = None,
+    ) -> None:
+        """
+        Starts checkpointing a crawl.
+        :param limit: The limit of the crawl.
+        :param target: The unit of the limit of the crawl.
+        :param internal_only: If the crawl only discovers internal urls.
+        :param resume: Whether the crawl continues the crawl in the checkpoint, rather than replacing it.
+        :param seen: The urls the crawler has already seen, e.g. in earlier crawls. A FingerprintSet is stored as its
+        fingerprints. Stores that cannot be iterated, such as ScalableBloomFilter, cannot be stored, which is logged
+        as a warning: a resumed crawl revisits their urls.
+        """
+        options = {"limit": limit, "target": target, "internal_only": internal_only}
+        if (
+            not resume
+            and seen is not None
+            and not isinstance(seen, Iterable | FingerprintSet)
+        ):
+            logger.warning(
+                f"The urls of {type(seen).__name__} cannot be checkpointed, so a resumed crawl revisits them"
+            )
+        async with self._writing:
+            self._changes = _Changes()
+            await asyncio.to_thread(self._start, options, resume, seen)
+
+    async def save(
+        self, pages_crawled: int, host_states: Mapping[str, dict] = None
+    ) -> None:
+        """
+        Writes the changes since the last checkpoint to disk.
+        :param pages_crawled: The amount of pages the crawl has crawled.
+        :param host_states: The state of each host, keyed by homepage (see WebRequestClient.host_states).
+        """
+        changes, self._changes = self._changes, _Changes()
+        async with self._writing:
+            await asyncio.to_thread(self._save, changes, pages_crawled, host_states)
+
+    async def load(self) -> CrawlSnapshot | None:
+        """
+        Reads the options and progress of the last checkpoint from disk. Its urls, which can be many, are read in
+        batches with the read_ methods.
+        :return: The state of the crawl. None if no crawl has been checkpointed.
+        """
+        async with self._writing:
+            return await asyncio.to_thread(self._load)
+
+    def read_frontier(self) -> AsyncIterator[tuple[str, int]]:
+        """Reads the urls in the frontier of the last checkpoint and their depths, shallowest first."""
+        return self._read("frontier", ("depth", "url"), lambda depth, url: (url, depth))
+
+    def read_discovered(self) -> AsyncIterator[str]:
+        """Reads the urls the crawl had discovered at the last checkpoint."""
+        return self._read("discovered", ("url",), lambda url: url)
+
+    def read_seen_urls(self) -> AsyncIterator[str]:
+        """Reads the urls the crawler had already seen when the crawl started."""
+        return self._read("seen_urls", ("url",), lambda url: url)
+
+    def read_seen_fingerprints(self) -> AsyncIterator[int]:
+        """Reads the fingerprints the crawler had already seen when the crawl started, if it used a FingerprintSet."""
+        return self._read("seen_fingerprints", ("fingerprint",), _to_unsigned)
+
+    def read_host_states(self) -> AsyncIterator[tuple[str, dict]]:
+        """Reads the state of each host at the last checkpoint, and its homepage."""
+        return self._read(
+            "hosts",
+            ("homepage", "state"),
+            lambda homepage, state: (homepage, json.loads(state)),
+            "state IS NOT NULL",
+        )
+
+    async def _read(
+        self, table: str, columns: tuple[str, ...], convert, where: str = None
+    ) -> AsyncIterator:
+        """
+        Reads the rows of a table in batches, in the order of its columns. Each batch continues after the last row of
+        the previous batch, so no cursor is held open between batches.
+        """
+        last = None
+        while True:
+            async with self._writing:
+                rows = await asyncio.to_thread(
+                    self._read_batch, table, columns, last, where
+                )
+            for row in rows:
+                yield convert(*row)
+            if len(rows) < _BATCH_SIZE:
+                return
+            last = rows[-1]
+
+    async def close(self) -> None:
+        async with self._writing:
+            if self._connection:
+                self._connection.close()
+                self._connection = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._connection:
+            # only used in one thread at a time, guarded by self._writing
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript(_SCHEMA)
+        return self._connection
+
+    def _start(self, options: dict, resume: bool, seen: SeenStore | set[str] | None):
+        if isinstance(seen, set):
+            # copied in a single step, as the crawler may add to it while it is written
+            seen = seen.copy()
+        with self._connect() as connection:
+            if not resume:
+                for table in _TABLES:
+                    connection.execute(f"DELETE FROM {table}")
+                self._save_seen(connection, seen)
+            connection.executemany(
+                "INSERT OR REPLACE INTO state VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in options.items()],
+            )
+
+    @staticmethod
+    def _save_seen(connection: sqlite3.Connection, seen: SeenStore | set[str] | None):
+        if isinstance(seen, FingerprintSet):
+            connection.executemany(
+                "INSERT OR IGNORE INTO seen_fingerprints VALUES (?)",
+                ((_to_signed(key),) for key in seen.fingerprints()),
+            )
+        elif isinstance(seen, Iterable):
+            connection.executemany(
+                "INSERT OR IGNORE INTO seen_urls VALUES (?)", ((url,) for url in seen)
+            )
+
+    def _read_batch(
+        self, table: str, columns: tuple[str, ...], last: tuple | None, where: str
+    ) -> list[tuple]:
+        names = ", ".join(columns)
+        conditions = [where] if where else []
+        if last:
+            conditions.append(f"({names}) > ({', '.join('?' * len(columns))})")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return (
+            self._connect()
+            .execute(
+                f"SELECT {names} FROM {table} {where} ORDER BY {names} LIMIT ?",
+                (*(last or ()), _BATCH_SIZE),
+            )
+            .fetchall()
+        )
+
+    def _save(
+        self,
+        changes: _Changes,
+        pages_crawled: int,
+        host_states: Mapping[str, dict] | None,
+    ):
+        with self._connect() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO frontier VALUES (?, ?)", changes.pushed.items()
+            )
+            connection.executemany(
+                "DELETE FROM frontier WHERE url = ?",
+                ((url,) for url in changes.crawled),
+            )
+            connection.executemany(
+                "INSERT OR IGNORE INTO discovered VALUES (?)",
+                ((url,) for url in changes.discovered),
+            )
+            connection.executemany(
+                "INSERT INTO hosts (homepage, sitemap_crawled) VALUES (?, 1) "
+                "ON CONFLICT (homepage) DO UPDATE SET sitemap_crawled = 1",
+                ((homepage,) for homepage in changes.sitemap_homepages),
+            )
+            connection.executemany(
+                "INSERT INTO hosts (homepage, state) VALUES (?, ?) "
+                "ON CONFLICT (homepage) DO UPDATE SET state = excluded.state",
+                (
+                    (homepage, json.dumps(state))
+                    for homepage, state in (host_states or {}).items()
+                ),
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO state VALUES ('pages_crawled', ?)",
+                (json.dumps(pages_crawled),),
+            )
+
+    def _load(self) -> CrawlSnapshot | None:
+        connection = self._connect()
+        state = {
+            key: json.loads(value)
+            for key, value in connection.execute("SELECT key, value FROM state")
+        }
+        if "target" not in state:
+            return None
+        return CrawlSnapshot(
+            state["limit"],
+            state["target"],
+            state["internal_only"],
+            state.get("pages_crawled", 0),
+            {
+                homepage
+                for homepage, in connection.execute(
+                    "SELECT homepage FROM hosts WHERE sitemap_crawled"
+                )
+            },
+        )
@@ -1,2 +1,3 @@
 from .base import BaseCrawler
 from .generic import Crawler
+from .sharded import ShardedCrawler
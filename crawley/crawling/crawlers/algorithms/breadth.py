@@ -1,27 +1,47 @@
 import asyncio
-from collections import deque
-from collections.abc import Callable
+import logging
+import os
+import time
+from collections.abc import Callable, Awaitable
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
 from enum import Enum
+from functools import partial
 from typing import Iterable
 
-from crawley.crawling import SitemapCache
+from crawley.crawling import (
+    SitemapCache,
+    Frontier,
+    BreadthFrontier,
+    SeenStore,
+    FingerprintSet,
+    ResultSink,
+    CrawlRecord,
+    CrawlCheckpoint,
+)
+from crawley.metrics import CrawlMetrics, host_of
+from crawley.profiling import CrawlProfiler
 from crawley.web_requests import WebRequestClient, Response
+from crawley.web_requests.clients.client import cancel_tasks
+from crawley.web_requests.clients.decorators.adaptive import RetryRequest
 from crawley.crawling.util import (
     get_absolute_urls,
     get_internal_urls,
+    get_homepage,
+    get_urls,
+    LinkExtractor,
+    UrlCanonicalizer,
+    canonicalize,
 )
 
+logger = logging.getLogger(__name__)
+
 
 def is_parsable(response: Response) -> bool:
     """Checks if a response can be parsed."""
     return not isinstance(response, Exception) and response.is_parsable
 
 
-def dequeue_all(q: deque) -> list:
-    """Gets all the items in a deque (FIFO)."""
-    return [q.popleft() for _ in range(len(q))]
-
-
 class BreadthCrawlType(Enum):
     """Defines breadth crawl types."""
 
@@ -29,24 +49,102 @@ class BreadthCrawlType(Enum):
     PAGES = "pages"
 
 
+@dataclass
+class _CrawlState:
+    """The state of a single breadth crawl that is shared between its workers."""
+
+    frontier: Frontier
+    limit: int | None
+    target: BreadthCrawlType
+    url_filter: Callable[[str, str | bytes | list[str]], set[str]]
+    results: set[str] | ResultSink = field(default_factory=set)
+    on_discovery: Callable[[CrawlRecord], Awaitable] | None = None
+    checkpoint: CrawlCheckpoint | None = None
+    sitemap_homepages: set[str] = field(default_factory=set)
+    pages_crawled: int = 0
+    active_workers: int = 0
+    retries: dict[str, asyncio.Task] = field(default_factory=dict)
+    changed: asyncio.Condition = field(default_factory=asyncio.Condition)
+
+    @property
+    def url_limit_reached(self) -> bool:
+        return bool(
+            self.target == BreadthCrawlType.URLS
+            and self.limit
+            and len(self.results) >= self.limit
+        )
+
+    @property
+    def page_limit_reached(self) -> bool:
+        return bool(
+            self.target == BreadthCrawlType.PAGES
+            and self.limit
+            and self.pages_crawled >= self.limit
+        )
+
+    @property
+    def limit_reached(self) -> bool:
+        return self.url_limit_reached or self.page_limit_reached
+
+
 class BreadthCrawl:
-    """Defines a breadth-first crawling algorithm that gets webpage urls."""
+    """
+    Defines a breadth-first crawling algorithm that gets webpage urls.
+
+    A fixed pool of workers continuously pulls urls from a frontier, so a newly discovered url is fetched as soon as
+    a worker is free, rather than after every fetch of the current depth has finished.
+    """
 
     def __init__(
         self,
         request_client: WebRequestClient,
-        visited_urls: set[str] = None,
+        visited_urls: SeenStore | set[str] = None,
         sitemap_cache: SitemapCache = None,
+        parse_executor: Executor = None,
+        max_pending_parses: int = None,
+        extractor: LinkExtractor = None,
+        canonicalizer: UrlCanonicalizer = None,
+        metrics: CrawlMetrics = None,
+        profiler: CrawlProfiler = None,
     ):
         """
         Creates an instance of BreadthCrawl.
         :param request_client: The client that is used to make requests for webpages.
-        :param visited_urls: The urls that have already been visited. These urls will not be revisited.
+        :param visited_urls: The urls that have already been visited. These urls will not be revisited. A set by
+        default. A FingerprintSet uses far less memory for large crawls, but cannot list the urls it holds.
         :param sitemap_cache: The cache of domain sitemaps.
+        :param parse_executor: The executor that webpages are parsed in, so parsing does not block fetching. Webpages
+        are parsed on the event loop by default. Process pools require a picklable extractor.
+        :param max_pending_parses: The maximum amount of webpages waiting to be parsed in parse_executor. Twice the
+        amount of CPUs by default.
+        :param extractor: The backend that extracts urls from webpages.
+        :param canonicalizer: Rewrites urls into a canonical form, so equivalent urls are only crawled once.
+        :param metrics: Where the time spent parsing, deduplicating urls and getting sitemaps is recorded, along with
+        the amount of pages crawled and urls discovered.
+        :param profiler: Where the wall time of each stage of crawling a webpage is recorded. Webpages parsed in
+        parse_executor are timed as a whole, as extract.
         """
+        if max_pending_parses is not None and max_pending_parses < 1:
+            raise ValueError("max_pending_parses must be greater than 0")
         self._request_client = request_client
-        self.visited_urls = visited_urls or set()
-        self.sitemap_cache = sitemap_cache or SitemapCache()
+        self.visited_urls = visited_urls if visited_urls is not None else set()
+        # compared with None, as an empty cache is falsy
+        self.sitemap_cache = (
+            sitemap_cache
+            if sitemap_cache is not None
+            else SitemapCache(
+                request_client=request_client,
+                robots_cache=request_client.robots_cache,
+            )
+        )
+        self._parse_executor = parse_executor
+        self._parse_slots = asyncio.Semaphore(
+            max_pending_parses or 2 * (os.cpu_count() or 1)
+        )
+        self._extractor = extractor
+        self._canonicalizer = canonicalizer
+        self.metrics = metrics
+        self.profiler = profiler
 
     async def execute(
         self,
@@ -54,107 +152,410 @@ class BreadthCrawl:
         limit: int = None,
         target: BreadthCrawlType = BreadthCrawlType.URLS,
         internal_only: bool = False,
-    ) -> set[str]:
+        workers: int = 10,
+        frontier: Frontier = None,
+        results: set[str] | ResultSink = None,
+        on_discovery: Callable[[CrawlRecord], Awaitable] = None,
+        checkpoint: CrawlCheckpoint = None,
+    ) -> set[str] | ResultSink:
         """
         Crawls webpages to discover urls.
         :param seed_urls: The urls that the crawl starts at.
         :param limit: The maximum amount of targets to crawl/discover.
         :param target: The intended unit to measure the limit of the crawling.
         :param internal_only: If only webpages that are in the same domain as seed_urls should be discovered.
-        :return: The discovered urls.
+        :param workers: The amount of webpages that are crawled concurrently.
+        :param frontier: The frontier that holds the urls waiting to be crawled. Breadth-first and in-memory by default.
+        :param results: Where discovered urls are added. A ResultSink streams them out instead of keeping them in
+        memory. A new set by default.
+        :param on_discovery: A coroutine function that is awaited with a record of each discovered url. The worker
+        that discovered the url waits for it, so a slow consumer pauses fetching.
+        :param checkpoint: Where the progress of the crawl is periodically saved, so it can be resumed. Replaces any
+        crawl that is already in the checkpoint.
+        :return: The discovered urls (results).
         """
-        urls_to_scrape, visited_urls = deque(seed_urls), set()
-        url_filter = get_internal_urls if internal_only else get_absolute_urls
-        try:
-            if target == BreadthCrawlType.PAGES:
-                return await self._crawl_pages(
-                    urls_to_scrape, visited_urls, limit, url_filter
+        crawl = self._create_crawl(
+            limit, target, internal_only, frontier, results, on_discovery, checkpoint
+        )
+        if checkpoint:
+            await checkpoint.start(
+                limit, target.value, internal_only, seen=self.visited_urls
+            )
+        for url in seed_urls:
+            self._push(crawl, self._canonicalize(url), 0)
+        return await self._execute(crawl, workers)
+
+    async def resume(
+        self,
+        checkpoint: CrawlCheckpoint,
+        limit: int = None,
+        workers: int = 10,
+        frontier: Frontier = None,
+        results: set[str] | ResultSink = None,
+        on_discovery: Callable[[CrawlRecord], Awaitable] = None,
+    ) -> set[str] | ResultSink:
+        """
+        Resumes a crawl from its last checkpoint. The urls that had been seen before the crawl started are seen again,
+        so they are not revisited. Seen fingerprints are only restored into a FingerprintSet. The state of each host
+        is restored into the request client (see WebRequestClient.restore_host_states).
+        :param checkpoint: The checkpoint of the crawl. Progress continues to be saved to it.
+        :param limit: The maximum amount of targets to crawl/discover. The limit of the checkpointed crawl by default.
+        :param workers: The amount of webpages that are crawled concurrently.
+        :param frontier: The frontier that holds the urls waiting to be crawled. Breadth-first and in-memory by default.
+        :param results: Where discovered urls are added, including the urls discovered before the checkpoint. A new
+        set by default.
+        :param on_discovery: A coroutine function that is awaited with a record of each newly discovered url.
+        :return: The discovered urls (results).
+        """
+        snapshot = await checkpoint.load()
+        if snapshot is None:
+            raise ValueError(f"{checkpoint.path} does not contain a crawl")
+        limit = snapshot.limit if limit is None else limit
+        target = BreadthCrawlType(snapshot.target)
+        crawl = self._create_crawl(
+            limit,
+            target,
+            snapshot.internal_only,
+            frontier,
+            results,
+            on_discovery,
+            checkpoint,
+        )
+        await checkpoint.start(limit, target.value, snapshot.internal_only, True)
+        crawl.pages_crawled = snapshot.pages_crawled
+        crawl.sitemap_homepages.update(snapshot.sitemap_homepages)
+        self._request_client.restore_host_states(
+            {homepage: state async for homepage, state in checkpoint.read_host_states()}
+        )
+        async for url in checkpoint.read_seen_urls():
+            self.visited_urls.add(url)
+        async for key in checkpoint.read_seen_fingerprints():
+            if not isinstance(self.visited_urls, FingerprintSet):
+                logger.warning(
+                    f"{checkpoint.path} holds seen fingerprints, which are only restored into a FingerprintSet"
                 )
-            return await self._crawl_urls(
-                urls_to_scrape, visited_urls, limit, url_filter
+                break
+            self.visited_urls.add_fingerprint(key)
+        async for url in checkpoint.read_discovered():
+            self.visited_urls.add(url)
+            crawl.results.add(url)
+        async for url, depth in checkpoint.read_frontier():
+            crawl.frontier.push(url, depth)
+        return await self._execute(crawl, workers)
+
+    def _create_crawl(
+        self,
+        limit: int | None,
+        target: BreadthCrawlType,
+        internal_only: bool,
+        frontier: Frontier | None,
+        results: set[str] | ResultSink | None,
+        on_discovery: Callable[[CrawlRecord], Awaitable] | None,
+        checkpoint: CrawlCheckpoint | None,
+    ) -> _CrawlState:
+        url_filter = get_internal_urls if internal_only else get_absolute_urls
+        if self._extractor or self._canonicalizer:
+            url_filter = partial(
+                url_filter,
+                extractor=self._extractor,
+                canonicalizer=self._canonicalizer,
             )
+        return _CrawlState(
+            frontier if frontier is not None else BreadthFrontier(),
+            limit,
+            target,
+            url_filter,
+            results if results is not None else set(),
+            on_discovery,
+            checkpoint,
+        )
+
+    async def _execute(self, crawl: _CrawlState, workers: int) -> set[str] | ResultSink:
+        if workers < 1:
+            raise ValueError("workers must be greater than 0")
+        try:
+            await self._run_workers(crawl, workers)
         except asyncio.CancelledError:
-            return visited_urls
+            pass
+        return crawl.results
+
+    def _canonicalize(self, url: str) -> str:
+        """Gets the canonical form of a url, or the url itself if it is not absolute."""
+        return (self._canonicalizer or canonicalize)(url) or url
+
+    async def _run_workers(self, crawl: _CrawlState, workers: int):
+        """Runs workers until the frontier is exhausted or the limit is reached."""
+        tasks = [asyncio.create_task(self._work(crawl)) for _ in range(workers)]
+        if crawl.checkpoint:
+            tasks.append(asyncio.create_task(self._save_periodically(crawl)))
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+        finally:
+            await cancel_tasks([*tasks, *crawl.retries.values()])
+            if crawl.checkpoint:
+                # shielded so the final checkpoint is written even if the crawl is cancelled again
+                await asyncio.shield(self._save(crawl))
 
-    def _track_new_url(self, url, urls_to_scrape: deque[str], visited_urls: set):
+    async def _save_periodically(self, crawl: _CrawlState):
+        while True:
+            await asyncio.sleep(crawl.checkpoint.interval)
+            await self._save(crawl)
+
+    async def _save(self, crawl: _CrawlState):
+        """Writes a checkpoint of the crawl, along with the state of each host in the request client."""
+        await crawl.checkpoint.save(
+            crawl.pages_crawled, self._request_client.host_states()
+        )
+
+    async def _work(self, crawl: _CrawlState):
+        """Crawls urls from the frontier until there are none left, or the limit is reached."""
+        while True:
+            item = await self._next_url(crawl)
+            if item is None:
+                return
+            url, depth = item
+            try:
+                if crawl.limit_reached:
+                    return
+                limit_reached = await self._crawl_url(crawl, url, depth)
+                if crawl.checkpoint and url not in crawl.retries:
+                    crawl.checkpoint.crawled(url)
+                if limit_reached:
+                    return
+            finally:
+                crawl.frontier.release(url)
+                crawl.active_workers -= 1
+                await self._notify(crawl)
+
+    @staticmethod
+    async def _next_url(crawl: _CrawlState) -> tuple[str, int] | None:
         """
-        Tracks a newly discovered url. Ensures it will not be revisited.
-        :param url: The url to track.
-        :param urls_to_scrape: The queue used to track the urls that need to be scraped.
-        :param visited_urls: The urls that have already been discovered.
+        Waits for a url to crawl.
+        :return: The url and its depth. None if the frontier is empty and no worker or retry can add to it.
         """
-        self.visited_urls.add(url)
-        urls_to_scrape.append(url)
-        visited_urls.add(url)
+        async with crawl.changed:
+            while True:
+                item = crawl.frontier.pop()
+                if item is not None:
+                    crawl.active_workers += 1
+                    return item
+                if not (crawl.frontier or crawl.active_workers or crawl.retries):
+                    crawl.changed.notify_all()
+                    return None
+                try:
+                    # the frontier may hold urls back, e.g. to keep an interval between requests to a host
+                    await asyncio.wait_for(
+                        crawl.changed.wait(), crawl.frontier.ready_in()
+                    )
+                except asyncio.TimeoutError:
+                    pass
 
-    def _get_sitemap_urls(
-        self, url: str, urls_to_scrape: deque[str], visited_urls: set, url_limit: int
-    ) -> set[str]:
+    @staticmethod
+    async def _notify(crawl: _CrawlState):
+        """Wakes the workers that are waiting for urls."""
+        async with crawl.changed:
+            crawl.changed.notify_all()
+
+    async def _crawl_url(self, crawl: _CrawlState, url: str, depth: int) -> bool:
         """
-        Gets the urls of a domain's sitemap.
-        :param url: Any url belonging to a certain domain.
-        :param urls_to_scrape: The queue used to track the urls that need to be scraped.
-        :param visited_urls: The urls that have already been discovered.
-        :param url_limit: The maximum amount of urls to get from the sitemap.
-        :return: An updated visited_urls with sitemap urls.
-        """
-        for sitemap_url in self.sitemap_cache.get_urls(
-            self.sitemap_cache[url], url_limit
-        ):
-            if sitemap_url in self.visited_urls:
+        Fetches a webpage and tracks the urls it links to.
+        :param crawl: The state of the crawl.
+        :param url: The url of the webpage.
+        :param depth: The depth of the url.
+        :return: Whether the limit has been reached.
+        """
+        if crawl.target == BreadthCrawlType.URLS:
+            if await self._get_sitemap_urls(crawl, url, depth + 1):
+                return True
+            await self._notify(crawl)
+        start = time.perf_counter()
+        try:
+            response = await self._request_client.fetch(url)
+        except RetryRequest as retry:
+            self._retry_later(crawl, url, depth, retry.delay)
+            return False
+        except Exception:
+            if self.metrics:
+                self.metrics.count("fetch_errors")
+            return False
+        finally:
+            if self.profiler:
+                self.profiler.record("fetch", time.perf_counter() - start)
+        if crawl.limit_reached:
+            return True
+        if not is_parsable(response):
+            return False
+        urls = await self._parse(crawl, response)
+        start = time.perf_counter()
+        limit_reached = await self._enqueue(crawl, response, depth, urls)
+        if self.profiler:
+            self.profiler.record("enqueue", time.perf_counter() - start)
+        if limit_reached:
+            return True
+        crawl.pages_crawled += 1
+        if self.metrics:
+            self.metrics.count("pages_crawled")
+        return crawl.page_limit_reached
+
+    async def _enqueue(
+        self, crawl: _CrawlState, response: Response, depth: int, urls: set[str]
+    ) -> bool:
+        """
+        Tracks the urls of a webpage that have not been visited.
+        :param crawl: The state of the crawl.
+        :param response: The response containing the webpage.
+        :param depth: The depth of the webpage.
+        :param urls: The urls in the webpage.
+        :return: Whether the url limit has been reached.
+        """
+        for new_url in urls:
+            if crawl.url_limit_reached:
+                return True
+            if self._is_visited(new_url):
                 continue
-            self._track_new_url(sitemap_url, urls_to_scrape, visited_urls)
-            if url_limit and len(visited_urls) == url_limit:
-                return visited_urls
+            await self._track_new_url(
+                crawl,
+                CrawlRecord(
+                    new_url,
+                    response.fetch.url,
+                    depth + 1,
+                    response.fetch.status,
+                    response.web_resource.content_type,
+                ),
+            )
+        return crawl.url_limit_reached
 
-    async def _crawl_urls(
+    def _is_visited(self, url: str) -> bool:
+        """Checks if a url has already been visited, recording how long the check takes."""
+        if not self.metrics:
+            return url in self.visited_urls
+        start = time.perf_counter()
+        visited = url in self.visited_urls
+        self.metrics.observe("dedup", time.perf_counter() - start)
+        return visited
+
+    def _retry_later(self, crawl: _CrawlState, url: str, depth: int, delay: float):
+        """
+        Re-queues a url after a delay. The delay is waited out in a separate task, so the worker is free to crawl
+        other urls in the meantime.
+        :param crawl: The state of the crawl.
+        :param url: The url to retry.
+        :param depth: The depth of the url.
+        :param delay: The amount of seconds to wait before re-queueing the url.
+        """
+        crawl.retries[url] = asyncio.create_task(
+            self._requeue(crawl, url, depth, delay)
+        )
+
+    async def _requeue(self, crawl: _CrawlState, url: str, depth: int, delay: float):
+        try:
+            await asyncio.sleep(delay)
+            crawl.frontier.push(url, depth)
+        finally:
+            del crawl.retries[url]
+        await self._notify(crawl)
+
+    async def _parse(self, crawl: _CrawlState, response: Response) -> set[str]:
+        """
+        Gets the urls in a webpage. Parses in the parse executor if there is one, waiting for a free slot.
+        :param crawl: The state of the crawl.
+        :param response: The response containing the webpage.
+        :return: The urls in the webpage.
+        """
+        if not self.metrics:
+            return await self._extract(crawl, response)
+        start = time.perf_counter()
+        try:
+            return await self._extract(crawl, response)
+        finally:
+            self.metrics.observe("parse", time.perf_counter() - start)
+
+    async def _extract(self, crawl: _CrawlState, response: Response) -> set[str]:
+        if response.links is not None:
+            # the links were extracted while fetching, so there is nothing to parse
+            return crawl.url_filter(response.fetch.url, response.links)
+        web_resource = response.web_resource
+        args = (response.fetch.url, web_resource.content)
+        url_filter = crawl.url_filter
+        if web_resource.encoding:
+            # bytes are parsed in their encoding, rather than decoded first
+            url_filter = partial(url_filter, encoding=web_resource.encoding)
+        if not self._parse_executor:
+            if self.profiler:
+                return self._profile_extract(url_filter, *args, web_resource.encoding)
+            return url_filter(*args)
+        async with self._parse_slots:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._parse_executor, url_filter, *args
+            )
+
+    def _profile_extract(
         self,
-        urls_to_scrape: deque[str],
-        visited_urls: set,
-        limit: int,
-        url_filter: Callable[[str, str | bytes], set[str]],
-    ) -> set[str]:
-        """Crawls until a certain amount of urls are discovered, if specified."""
-        while urls_to_scrape:
-            urls = dequeue_all(urls_to_scrape)
-            for url in urls:
-                if self._get_sitemap_urls(url, urls_to_scrape, visited_urls, limit):
-                    return visited_urls
-            fetch_generator = self._request_client.fetch_multiple(urls)
-            async for response in fetch_generator:
-                if not is_parsable(response):
-                    continue
-                for url in url_filter(
-                    response.fetch.url, response.web_resource.content
-                ):
-                    if url in self.visited_urls:
-                        continue
-                    self._track_new_url(url, urls_to_scrape, visited_urls)
-                    if limit and len(visited_urls) == limit:
-                        await fetch_generator.aclose()
-                        return visited_urls
-        return visited_urls
-
-    async def _crawl_pages(
-        self, urls_to_scrape: deque[str], visited_urls: set, limit: int, url_filter
-    ) -> set[str]:
-        """Crawls until a certain amount of pages has been crawled, if specified."""
-        pages_crawled = 0
-        while urls_to_scrape:
-            fetch_generator = self._request_client.fetch_multiple(
-                dequeue_all(urls_to_scrape)
+        url_filter: Callable[..., set[str]],
+        url: str,
+        content: str | bytes,
+        encoding: str | None,
+    ):
+        """Gets the urls in a webpage, recording the time spent extracting and filtering them separately."""
+        start = time.perf_counter()
+        links = get_urls(content, self._extractor, encoding)
+        extracted = time.perf_counter()
+        # the filter takes already extracted links as they are
+        urls = url_filter(url, links)
+        self.profiler.record("extract", extracted - start)
+        self.profiler.record("filter", time.perf_counter() - extracted)
+        return urls
+
+    @staticmethod
+    def _push(crawl: _CrawlState, url: str, depth: int):
+        crawl.frontier.push(url, depth)
+        if crawl.checkpoint:
+            crawl.checkpoint.pushed(url, depth)
+
+    async def _track_new_url(self, crawl: _CrawlState, record: CrawlRecord):
+        """
+        Tracks a newly discovered url. Ensures it will not be revisited.
+        :param crawl: The state of the crawl.
+        :param record: The record of the url to track.
+        """
+        self.visited_urls.add(record.url)
+        self._push(crawl, record.url, record.depth)
+        crawl.results.add(record.url)
+        if self.metrics:
+            self.metrics.count("urls_discovered")
+        if crawl.checkpoint:
+            crawl.checkpoint.discovered(record.url)
+        if crawl.on_discovery:
+            await crawl.on_discovery(record)
+
+    async def _get_sitemap_urls(self, crawl: _CrawlState, url: str, depth: int) -> bool:
+        """
+        Tracks the urls of a domain's sitemap, once per crawl.
+        :param crawl: The state of the crawl.
+        :param url: Any url belonging to a certain domain.
+        :param depth: The depth given to the sitemap urls.
+        :return: Whether the url limit has been reached.
+        """
+        homepage = get_homepage(url)
+        if homepage in crawl.sitemap_homepages:
+            return False
+        crawl.sitemap_homepages.add(homepage)
+        start = time.perf_counter()
+        sitemap_urls = await self.sitemap_cache.get_urls(homepage, crawl.limit)
+        if self.metrics:
+            # includes reading robots.txt for the sitemaps it lists
+            self.metrics.observe(
+                "sitemap", time.perf_counter() - start, host_of(homepage)
             )
-            async for response in fetch_generator:
-                if not is_parsable(response):
-                    continue
-                for url in url_filter(
-                    response.fetch.url, response.web_resource.content
-                ):
-                    if url in self.visited_urls:
-                        continue
-                    self._track_new_url(url, urls_to_scrape, visited_urls)
-                pages_crawled += 1
-                if limit and pages_crawled == limit:
-                    await fetch_generator.aclose()
-                    return visited_urls
-        return visited_urls
+        for sitemap_url in sitemap_urls:
+            sitemap_url = self._canonicalize(sitemap_url)
+            if crawl.url_limit_reached:
+                return True
+            if self._is_visited(sitemap_url):
+                continue
+            await self._track_new_url(crawl, CrawlRecord(sitemap_url, None, depth))
+        if crawl.checkpoint:
+            crawl.checkpoint.sitemap_crawled(homepage)
+        return crawl.url_limit_reached
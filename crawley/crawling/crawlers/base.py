@@ -8,7 +8,10 @@ class BaseCrawler(AsyncContextManager):
 
     def __init__(self, request_client: WebRequestClient = None):
         self._request_client = request_client or StaticRequestClient()
-        self.sitemap_cache = SitemapCache()
+        self.sitemap_cache = SitemapCache(
+            request_client=self._request_client,
+            robots_cache=self._request_client.robots_cache,
+        )
 
     async def close(self) -> None:
         await self._request_client.close()
@@ -1,9 +1,26 @@
 import asyncio
+import logging
+from collections.abc import AsyncGenerator
+from concurrent.futures import Executor
 from typing import Iterable, Coroutine, Any
 
+from crawley.crawling import (
+    SeenStore,
+    ResultSink,
+    CrawlRecord,
+    Frontier,
+    CrawlCheckpoint,
+    RecrawlLog,
+)
 from crawley.crawling.crawlers import BaseCrawler
 from crawley.crawling.crawlers.algorithms.breadth import BreadthCrawlType, BreadthCrawl
-from crawley.web_requests import WebRequestClient
+from crawley.crawling.util import LinkExtractor, UrlCanonicalizer, get_homepage
+from crawley.metrics import CrawlMetrics
+from crawley.profiling import CrawlProfiler
+from crawley.web_requests import WebRequestClient, Response, RetryRequest
+from crawley.web_requests.clients.client import cancel_tasks
+
+logger = logging.getLogger(__name__)
 
 
 async def run_timeout(
@@ -28,13 +45,32 @@ async def run_timeout(
 class Crawler(BaseCrawler):
     """Defines a crawler that discovers urls."""
 
-    def __init__(self, request_client: WebRequestClient = None):
+    def __init__(
+        self,
+        request_client: WebRequestClient = None,
+        visited_urls: SeenStore | set[str] = None,
+        canonicalizer: UrlCanonicalizer = None,
+        metrics: CrawlMetrics = None,
+        profiler: CrawlProfiler = None,
+    ):
         """
         Creates an instance of Crawler.
         :param request_client: The client that is used to request web resources.
+        :param visited_urls: The store of urls that have been visited across crawls. A set by default. A
+        FingerprintSet uses far less memory for large crawls, and a ScalableBloomFilter even less at the cost of
+        occasionally skipping a url, but neither can list the urls it holds.
+        :param canonicalizer: Rewrites urls into a canonical form, so equivalent urls are only crawled once. Tracking
+        parameters are removed and query parameters are sorted by default.
+        :param metrics: Where the time spent parsing, deduplicating urls and getting sitemaps is recorded. Give the
+        same metrics to the request client (e.g. StaticRequestClient) to record request timings too.
+        :param profiler: Profiles every crawl, resume and stream of the crawler: the event loop's lag and what blocks
+        it, the wall time of each stage of crawling a webpage, and the stacks of the event loop's thread.
         """
         super().__init__(request_client)
-        self.visited_urls = set()
+        self.visited_urls = visited_urls if visited_urls is not None else set()
+        self.canonicalizer = canonicalizer
+        self.metrics = metrics
+        self.profiler = profiler
 
     async def crawl(
         self,
@@ -43,6 +79,13 @@ class Crawler(BaseCrawler):
         timeout: float = None,
         target: BreadthCrawlType = BreadthCrawlType.URLS,
         internal_only: bool = True,
+        workers: int = 10,
+        parse_executor: Executor = None,
+        max_pending_parses: int = None,
+        extractor: LinkExtractor = None,
+        results: set[str] | ResultSink = None,
+        frontier: Frontier = None,
+        checkpoint: CrawlCheckpoint = None,
     ):
         """
         Crawls webpages.
@@ -51,11 +94,227 @@ class Crawler(BaseCrawler):
         :param timeout: The duration of the crawl (in hours).
         :param target: The intended unit to measure the limit of the crawling.
         :param internal_only: If only webpages that are in the same domain as seed_urls should be discovered.
-        :return: The discovered urls.
+        :param workers: The amount of webpages that are crawled concurrently.
+        :param parse_executor: The executor (e.g. a ProcessPoolExecutor) that webpages are parsed in, so parsing can
+        overlap with fetching and use multiple cores. Webpages are parsed on the event loop by default.
+        :param max_pending_parses: The maximum amount of webpages waiting to be parsed in parse_executor.
+        :param extractor: The backend that extracts urls from webpages. lxml_tree_links scales across threads.
+        :param results: Where discovered urls are added. A ResultSink streams them out instead of keeping them in
+        memory. A new set by default.
+        :param frontier: The frontier that holds the urls waiting to be crawled. A HostScheduler spreads the crawl
+        fairly across hosts and caps the requests to each host. Breadth-first by default. The crawl does not close it.
+        :param checkpoint: Where the progress of the crawl is periodically saved, so it can be continued with .resume
+        after a crash, restart or timeout.
+        :return: The discovered urls (results).
+        """
+        return await run_timeout(
+            self._profiled(
+                self._breadth_crawl(
+                    parse_executor, max_pending_parses, extractor
+                ).execute(
+                    seed_urls,
+                    limit,
+                    target,
+                    internal_only,
+                    workers,
+                    frontier=frontier,
+                    results=results,
+                    checkpoint=checkpoint,
+                )
+            ),
+            timeout,
+        )
+
+    async def resume(
+        self,
+        checkpoint: CrawlCheckpoint,
+        limit: int = None,
+        timeout: float = None,
+        workers: int = 10,
+        parse_executor: Executor = None,
+        max_pending_parses: int = None,
+        extractor: LinkExtractor = None,
+        results: set[str] | ResultSink = None,
+        frontier: Frontier = None,
+    ):
+        """
+        Continues a crawl from its last checkpoint. The seed urls, target and internal_only of the crawl are kept.
+        :param checkpoint: The checkpoint of the crawl. Progress continues to be saved to it.
+        :param limit: The maximum amount of targets to crawl/discover. The limit of the crawl by default.
+        :param timeout: The duration of the resumed crawl (in hours).
+        :param workers: The amount of webpages that are crawled concurrently.
+        :param parse_executor: The executor that webpages are parsed in. Webpages are parsed on the event loop by
+        default.
+        :param max_pending_parses: The maximum amount of webpages waiting to be parsed in parse_executor.
+        :param extractor: The backend that extracts urls from webpages.
+        :param results: Where discovered urls are added, including those discovered before the checkpoint. A new set
+        by default.
+        :param frontier: The frontier that holds the urls waiting to be crawled. Breadth-first by default.
+        :return: The discovered urls (results).
         """
         return await run_timeout(
-            BreadthCrawl(
-                self._request_client, self.visited_urls, self.sitemap_cache
-            ).execute(seed_urls, limit, target, internal_only),
+            self._profiled(
+                self._breadth_crawl(
+                    parse_executor, max_pending_parses, extractor
+                ).resume(checkpoint, limit, workers, frontier, results)
+            ),
             timeout,
         )
+
+    async def recrawl(
+        self,
+        seed_urls: Iterable[str],
+        log: RecrawlLog,
+        workers: int = 10,
+    ) -> AsyncGenerator[Response]:
+        """
+        Recrawls websites incrementally, yielding the response of each page as soon as it is fetched. Only the sitemap
+        pages that have changed since they were last fetched (by their lastmod), or are due to be fetched (by their
+        changefreq), are fetched.
+
+        Transient failures (RetryRequest) are retried after their delay. Other failures are logged and skipped, and
+        pages that failed are not recorded, so the next recrawl fetches them again. When the generator is closed with
+        .aclose(), the recrawl is cancelled and the pages fetched so far are saved to the log.
+        :param seed_urls: Urls of the websites to recrawl.
+        :param log: The log of when pages were fetched by previous recrawls. Updated with the pages that are fetched.
+        :param workers: The amount of pages that are fetched concurrently.
+        :return: The responses of the fetched pages.
+        """
+        homepages = dict.fromkeys(map(get_homepage, seed_urls))
+        sitemaps = await asyncio.gather(
+            *(self.sitemap_cache.get_pages(homepage) for homepage in homepages)
+        )
+        last_modified = {
+            page.url: page.last_modified
+            for page in await log.due(page for pages in sitemaps for page in pages)
+        }
+        if not last_modified:
+            return
+        urls: asyncio.Queue[str | None] = asyncio.Queue()
+        for url in last_modified:
+            urls.put_nowait(url)
+        remaining = len(last_modified)
+        retries: list[asyncio.TimerHandle] = []
+
+        async def due_urls():
+            # retried urls are put back in the queue, which ends once every url has a final result
+            while (url := await urls.get()) is not None:
+                yield url
+
+        loop = asyncio.get_running_loop()
+        try:
+            async for response in self._request_client.fetch_multiple(
+                due_urls(), workers
+            ):
+                if isinstance(response, RetryRequest):
+                    retries.append(
+                        loop.call_later(response.delay, urls.put_nowait, response.url)
+                    )
+                    continue
+                remaining -= 1
+                if not remaining:
+                    urls.put_nowait(None)
+                if isinstance(response, Exception):
+                    logger.warning(f"Could not recrawl a page: {response}")
+                    continue
+                if response.fetch.status < 400:
+                    log.record(
+                        response.fetch.url, last_modified.get(response.fetch.url)
+                    )
+                yield response
+        finally:
+            for retry in retries:
+                retry.cancel()
+            await asyncio.shield(log.save())
+
+    async def stream(
+        self,
+        seed_urls: Iterable[str],
+        limit: int = None,
+        target: BreadthCrawlType = BreadthCrawlType.URLS,
+        internal_only: bool = True,
+        workers: int = 10,
+        parse_executor: Executor = None,
+        max_pending_parses: int = None,
+        extractor: LinkExtractor = None,
+        buffer_size: int = 100,
+        frontier: Frontier = None,
+    ) -> AsyncGenerator[CrawlRecord]:
+        """
+        Crawls webpages, yielding a record of each url as soon as it is discovered. Discovered urls are not collected
+        into a result, but visited_urls still holds every one of them; give the crawler a FingerprintSet or
+        ScalableBloomFilter to bound its memory. When buffer_size records are waiting to be consumed, crawling pauses
+        until the consumer catches up.
+
+        When the generator is closed with .aclose(), the crawl is cancelled.
+        :param seed_urls: The urls to start crawling at.
+        :param limit: The maximum amount of targets to crawl/discover.
+        :param target: The intended unit to measure the limit of the crawling.
+        :param internal_only: If only webpages that are in the same domain as seed_urls should be discovered.
+        :param workers: The amount of webpages that are crawled concurrently.
+        :param parse_executor: The executor that webpages are parsed in. Webpages are parsed on the event loop by
+        default.
+        :param max_pending_parses: The maximum amount of webpages waiting to be parsed in parse_executor.
+        :param extractor: The backend that extracts urls from webpages.
+        :param buffer_size: The maximum amount of records waiting to be consumed.
+        :param frontier: The frontier that holds the urls waiting to be crawled. A HostScheduler spreads the crawl
+        fairly across hosts and caps the requests to each host. Breadth-first by default. The crawl does not close it.
+        :return: The records of the discovered urls.
+        """
+        records: asyncio.Queue[CrawlRecord] = asyncio.Queue(buffer_size)
+        crawl = asyncio.create_task(
+            self._profiled(
+                self._breadth_crawl(
+                    parse_executor, max_pending_parses, extractor
+                ).execute(
+                    seed_urls,
+                    limit,
+                    target,
+                    internal_only,
+                    workers,
+                    frontier=frontier,
+                    results=ResultSink(lambda url: None),
+                    on_discovery=records.put,
+                )
+            )
+        )
+        try:
+            while not (crawl.done() and records.empty()):
+                record = asyncio.ensure_future(records.get())
+                await asyncio.wait({record, crawl}, return_when=asyncio.FIRST_COMPLETED)
+                if record.done():
+                    yield record.result()
+                else:
+                    record.cancel()
+            crawl.result()
+        finally:
+            await cancel_tasks([crawl])
+
+    def _breadth_crawl(
+        self,
+        parse_executor: Executor = None,
+        max_pending_parses: int = None,
+        extractor: LinkExtractor = None,
+    ) -> BreadthCrawl:
+        """Creates a breadth crawl that shares the visited urls and sitemaps of the crawler."""
+        return BreadthCrawl(
+            self._request_client,
+            self.visited_urls,
+            self.sitemap_cache,
+            parse_executor,
+            max_pending_parses,
+            extractor,
+            self.canonicalizer,
+            self.metrics,
+            self.profiler,
+        )
+
+    async def _profiled(self, coro: Coroutine) -> Any:
+        """Runs a coroutine, profiling it with the crawler's profiler if it has one."""
+        if not self.profiler:
+            return await coro
+        self.profiler.start()
+        try:
+            return await coro
+        finally:
+            await self.profiler.stop()
@@ -0,0 +1,422 @@
+import asyncio
+import multiprocessing
+import os
+import queue
+import time
+import zlib
+from collections import defaultdict
+from collections.abc import AsyncGenerator, Callable
+from dataclasses import dataclass
+from typing import Iterable
+
+from crawley.crawling import (
+    Frontier,
+    BreadthFrontier,
+    ResultSink,
+    CrawlRecord,
+)
+from crawley.crawling.crawlers.algorithms.breadth import (
+    BreadthCrawl,
+    BreadthCrawlType,
+    _CrawlState,
+)
+from crawley.crawling.crawlers.generic import run_timeout
+from crawley.crawling.util import canonicalize, get_netloc
+from crawley.web_requests import WebRequestClient, StaticRequestClient
+from crawley.web_requests.clients.client import cancel_tasks
+
+# how long a blocking queue read waits before the event loop gets a chance to cancel it
+_POLL_INTERVAL = 0.1
+_STOP = ("stop",)
+
+
+def shard_of(url: str, shards: int) -> int:
+    """
+    Gets the shard that owns a url. Urls of the same host always belong to the same shard.
+    :param url: A canonical, absolute url.
+    :param shards: The amount of shards.
+    """
+    # crc32 rather than hash(), which is salted differently in every process
+    return zlib.crc32(get_netloc(url).encode()) % shards
+
+
+@dataclass
+class _ShardOptions:
+    """The options of a sharded crawl, sent to every shard."""
+
+    shards: int
+    workers: int
+    target: BreadthCrawlType
+    internal_only: bool
+    request_client: Callable[[], WebRequestClient]
+    frontier: Callable[[], Frontier]
+    flush_interval: float
+
+
+class _ShardFrontier(Frontier):
+    """
+    A frontier that keeps the workers of a shard waiting while it is empty, since other shards may still send it urls.
+    Emptied once the crawl is stopped.
+    """
+
+    def __init__(self, frontier: Frontier, poll_interval: float):
+        self.frontier = frontier
+        self.poll_interval = poll_interval
+        self.stopped = False
+
+    def push(self, url: str, depth: int = 0) -> None:
+        self.frontier.push(url, depth)
+
+    def pop(self) -> tuple[str, int] | None:
+        return None if self.stopped else self.frontier.pop()
+
+    def release(self, url: str) -> None:
+        self.frontier.release(url)
+
+    def ready_in(self) -> float | None:
+        ready_in = self.frontier.ready_in()
+        return self.poll_interval if ready_in is None else ready_in
+
+    def __len__(self) -> int:
+        if self.stopped:
+            return 0
+        # never empty, so idle workers wait for urls instead of returning
+        return len(self.frontier) + 1
+
+
+class _ShardCrawl(BreadthCrawl):
+    """
+    A breadth crawl of the hosts one shard owns. Urls of other hosts are forwarded to their shard, which deduplicates
+    and records them, so every url is crawled and recorded once.
+    """
+
+    def __init__(
+        self,
+        shard: int,
+        options: _ShardOptions,
+        inboxes: list[multiprocessing.Queue],
+        events: multiprocessing.Queue,
+        request_client: WebRequestClient,
+    ):
+        super().__init__(request_client)
+        self.shard = shard
+        self.options = options
+        self.inboxes = inboxes
+        self.events = events
+        self.sent = 0
+        self.received = 0
+        self._forwarded: dict[int, list[CrawlRecord]] = defaultdict(list)
+        self._records: list[CrawlRecord] = []
+
+    async def run(self):
+        async with self.options.frontier() as shard_frontier:
+            await self.execute(
+                [],
+                None,
+                self.options.target,
+                self.options.internal_only,
+                self.options.workers,
+                _ShardFrontier(shard_frontier, _POLL_INTERVAL),
+                ResultSink(lambda url: None),
+                self._discovered,
+            )
+
+    async def _discovered(self, record: CrawlRecord):
+        self._records.append(record)
+
+    async def _track_new_url(self, crawl: _CrawlState, record: CrawlRecord):
+        owner = shard_of(record.url, self.options.shards)
+        if owner == self.shard:
+            return await super()._track_new_url(crawl, record)
+        # remembered, so the url is only forwarded once by this shard
+        self.visited_urls.add(record.url)
+        self._forwarded[owner].append(record)
+
+    async def _run_workers(self, crawl: _CrawlState, workers: int):
+        tasks = [
+            asyncio.create_task(self._receive(crawl)),
+            asyncio.create_task(self._report(crawl)),
+        ]
+        try:
+            await super()._run_workers(crawl, workers)
+        finally:
+            await cancel_tasks(tasks)
+            self._flush(crawl)
+
+    async def _receive(self, crawl: _CrawlState):
+        """Adds the urls sent by the other shards (and the seed urls) to the crawl, until the crawl is stopped."""
+        inbox = self.inboxes[self.shard]
+        while True:
+            message = await asyncio.to_thread(_get, inbox)
+            if message is None:
+                continue
+            if message == _STOP:
+                crawl.frontier.stopped = True
+            elif message[0] == "push":
+                for url, depth in message[1]:
+                    self._push(crawl, url, depth)
+                self.received += len(message[1])
+            else:
+                for record in message[1]:
+                    if record.url not in self.visited_urls:
+                        await super()._track_new_url(crawl, record)
+                self.received += len(message[1])
+            await self._notify(crawl)
+
+    async def _report(self, crawl: _CrawlState):
+        while True:
+            await asyncio.sleep(self.options.flush_interval)
+            self._flush(crawl)
+
+    def _flush(self, crawl: _CrawlState):
+        """Sends the forwarded urls to their shards, and the discovered urls and status of the shard to the crawler."""
+        for owner, records in self._forwarded.items():
+            self.inboxes[owner].put(("track", records))
+            self.sent += len(records)
+        self._forwarded.clear()
+        if self._records:
+            self.events.put(("records", self._records))
+            self._records = []
+        idle = not (
+            len(crawl.frontier.frontier) or crawl.active_workers or crawl.retries
+        )
+        self.events.put(
+            ("status", self.shard, self.sent, self.received, idle, crawl.pages_crawled)
+        )
+
+
+def _get(messages: multiprocessing.Queue):
+    try:
+        return messages.get(timeout=_POLL_INTERVAL)
+    except queue.Empty:
+        return None
+
+
+def _run_shard(
+    shard: int,
+    options: _ShardOptions,
+    inboxes: list[multiprocessing.Queue],
+    events: multiprocessing.Queue,
+):
+    """The entry point of a shard process."""
+
+    async def run():
+        async with options.request_client() as request_client:
+            await _ShardCrawl(shard, options, inboxes, events, request_client).run()
+
+    try:
+        asyncio.run(run())
+    finally:
+        # the crawl is over, so undelivered messages are dropped rather than blocking the exit
+        for messages in (*inboxes, events):
+            messages.cancel_join_thread()
+
+
+class ShardedCrawler:
+    """
+    Defines a crawler that spreads a crawl across several processes, so parsing and bookkeeping use multiple cores.
+
+    Each shard process runs its own request client and breadth crawl, and owns the hosts whose hash maps to it. Urls
+    discovered on another shard's host are sent to that shard over a queue. Since a host never crosses shards, each
+    shard deduplicates and schedules (e.g. with a HostScheduler) its own hosts. The urls discovered by every shard are
+    merged into one stream.
+    """
+
+    def __init__(
+        self,
+        shards: int = None,
+        request_client: Callable[[], WebRequestClient] = StaticRequestClient,
+        frontier: Callable[[], Frontier] = BreadthFrontier,
+        flush_interval: float = 0.05,
+    ):
+        """
+        Creates an instance of ShardedCrawler.
+        :param shards: The amount of shard processes. The amount of CPUs by default.
+        :param request_client: Creates the request client of a shard. Called in the shard process, so it must be
+        picklable (e.g. a class or functools.partial).
+        :param frontier: Creates the frontier of a shard, e.g. functools.partial(HostScheduler, max_per_host=2). Must
+        be picklable. A shard closes its frontier when it stops.
+        :param flush_interval: The amount of seconds between messages from a shard. Urls are sent in batches.
+        """
+        shards = shards or os.cpu_count() or 1
+        if shards < 1:
+            raise ValueError("shards must be greater than 0")
+        self.shards = shards
+        self.request_client = request_client
+        self.frontier = frontier
+        self.flush_interval = flush_interval
+
+    async def crawl(
+        self,
+        seed_urls: Iterable[str],
+        limit: int = None,
+        timeout: float = None,
+        target: BreadthCrawlType = BreadthCrawlType.URLS,
+        internal_only: bool = True,
+        workers: int = 10,
+    ) -> set[str]:
+        """
+        Crawls webpages.
+        :param seed_urls: The urls to start crawling at.
+        :param limit: The maximum amount of targets to crawl/discover, across every shard.
+        :param timeout: The duration of the crawl (in hours).
+        :param target: The intended unit to measure the limit of the crawling.
+        :param internal_only: If only webpages that are in the same domain as seed_urls should be discovered.
+        :param workers: The amount of webpages that each shard crawls concurrently.
+        :return: The discovered urls.
+        """
+        urls = set()
+
+        async def collect():
+            async for record in self.stream(
+                seed_urls, limit, target, internal_only, workers
+            ):
+                urls.add(record.url)
+
+        try:
+            await run_timeout(collect(), timeout)
+        except asyncio.CancelledError:
+            pass
+        return urls
+
+    async def stream(
+        self,
+        seed_urls: Iterable[str],
+        limit: int = None,
+        target: BreadthCrawlType = BreadthCrawlType.URLS,
+        internal_only: bool = True,
+        workers: int = 10,
+    ) -> AsyncGenerator[CrawlRecord]:
+        """
+        Crawls webpages, yielding a record of each url as soon as a shard reports it.
+
+        When the generator is closed with .aclose(), the shards are stopped.
+        :param seed_urls: The urls to start crawling at.
+        :param limit: The maximum amount of targets to crawl/discover, across every shard.
+        :param target: The intended unit to measure the limit of the crawling.
+        :param internal_only: If only webpages that are in the same domain as seed_urls should be discovered.
+        :param workers: The amount of webpages that each shard crawls concurrently.
+        :return: The records of the discovered urls.
+        """
+        if workers < 1:
+            raise ValueError("workers must be greater than 0")
+        options = _ShardOptions(
+            self.shards,
+            workers,
+            target,
+            internal_only,
+            self.request_client,
+            self.frontier,
+            self.flush_interval,
+        )
+        # spawned, since forking a process with a running event loop is unsafe
+        context = multiprocessing.get_context("spawn")
+        inboxes = [context.Queue() for _ in range(self.shards)]
+        events = context.Queue()
+        processes = [
+            context.Process(
+                target=_run_shard, args=(shard, options, inboxes, events), daemon=True
+            )
+            for shard in range(self.shards)
+        ]
+        for process in processes:
+            process.start()
+        try:
+            seeds = defaultdict(list)
+            for url in dict.fromkeys(filter(None, map(canonicalize, seed_urls))):
+                seeds[shard_of(url, self.shards)].append((url, 0))
+            for shard, urls in seeds.items():
+                inboxes[shard].put(("push", urls))
+            tracker = _TerminationTracker(self.shards, sum(map(len, seeds.values())))
+            discovered = 0
+            while not tracker.done:
+                message = await asyncio.to_thread(_get, events)
+                if message is None:
+                    _check_alive(processes)
+                    continue
+                if message[0] == "records":
+                    for record in message[1]:
+                        yield record
+                        discovered += 1
+                        if target == BreadthCrawlType.URLS and discovered == limit:
+                            return
+                else:
+                    tracker.update(*message[1:])
+                    if (
+                        target == BreadthCrawlType.PAGES
+                        and limit is not None
+                        and tracker.pages_crawled >= limit
+                    ):
+                        return
+        finally:
+            for inbox in inboxes:
+                inbox.put(_STOP)
+            await asyncio.to_thread(_join, processes, events)
+
+
+class _TerminationTracker:
+    """
+    Detects when a sharded crawl is over: every shard is idle, and every url that was sent has been received.
+
+    Statuses are reported at different times, so the counts must also be unchanged since every shard last reported.
+    """
+
+    def __init__(self, shards: int, seeds: int):
+        self.shards = shards
+        self.seeds = seeds
+        self.done = False
+        self._statuses: dict[int, tuple[int, int, bool, int]] = {}
+        self._candidate: tuple | None = None
+        self._reported: set[int] = set()
+
+    @property
+    def pages_crawled(self) -> int:
+        return sum(status[3] for status in self._statuses.values())
+
+    def update(self, shard: int, sent: int, received: int, idle: bool, pages: int):
+        self._statuses[shard] = (sent, received, idle, pages)
+        self._reported.add(shard)
+        if len(self._statuses) < self.shards:
+            return
+        sent = self.seeds + sum(status[0] for status in self._statuses.values())
+        received = sum(status[1] for status in self._statuses.values())
+        if not (sent == received and all(s[2] for s in self._statuses.values())):
+            self._candidate = None
+            return
+        candidate = tuple(sorted(self._statuses.items()))
+        if candidate != self._candidate:
+            self._candidate, self._reported = candidate, set()
+        elif len(self._reported) == self.shards:
+            self.done = True
+
+
+def _check_alive(processes: list[multiprocessing.Process]):
+    for process in processes:
+        if process.exitcode not in (None, 0):
+            raise RuntimeError(
+                f"Shard process {process.pid} exited with {process.exitcode}"
+            )
+
+
+def _join(
+    processes: list[multiprocessing.Process],
+    events: multiprocessing.Queue,
+    timeout: float = 10,
+):
+    """Waits for the shards to exit, draining their messages so none is blocked writing to the queue."""
+    deadline = time.monotonic() + timeout
+    for process in processes:
+        while process.is_alive() and time.monotonic() < deadline:
+            while _get_nowait(events) is not None:
+                pass
+            process.join(_POLL_INTERVAL)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+
+
+def _get_nowait(messages: multiprocessing.Queue):
+    try:
+        return messages.get_nowait()
+    except queue.Empty:
+        return None
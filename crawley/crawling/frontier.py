@@ -0,0 +1,218 @@
+import os
+import tempfile
+from abc import abstractmethod
+from collections import deque
+
+from crawley import AsyncContextManager
+
+
+class Frontier(AsyncContextManager):
+    """
+    Defines a queue of urls that are waiting to be crawled, along with their crawl depth. Frontiers that hold resources,
+    such as files, free them when closed.
+    """
+
+    @abstractmethod
+    def push(self, url: str, depth: int = 0) -> None:
+        """
+        Adds a url to the frontier.
+        :param url: The url to crawl.
+        :param depth: The amount of links between the url and the seed urls of the crawl.
+        """
+        pass
+
+    @abstractmethod
+    def pop(self) -> tuple[str, int] | None:
+        """
+        Removes and returns the next url to crawl.
+        :return: The url and its depth. None if there are no urls to crawl.
+        """
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    def release(self, url: str) -> None:
+        """
+        Marks a popped url as crawled. Frontiers that limit how many urls are crawled at once use this to free a slot.
+        :param url: The url that was popped.
+        """
+        pass
+
+    def ready_in(self) -> float | None:
+        """
+        Gets the amount of seconds until a url can be popped, for frontiers that hold urls back.
+        :return: The amount of seconds. None if a url can only become ready by being pushed or released.
+        """
+        return None
+
+    async def close(self) -> None:
+        pass
+
+
+class BreadthFrontier(Frontier):
+    """
+    Defines an in-memory frontier that pops urls in breadth-first order. Urls are kept in a FIFO queue per depth, so a
+    shallow url is always crawled before a deeper one, even when urls are discovered out of order.
+    """
+
+    def __init__(self):
+        self._levels: dict[int, deque[str]] = {}
+        self._size = 0
+
+    def push(self, url: str, depth: int = 0) -> None:
+        level = self._levels.get(depth)
+        if level is None:
+            level = self._levels[depth] = deque()
+        level.append(url)
+        self._size += 1
+
+    def pop(self) -> tuple[str, int] | None:
+        if not self._size:
+            return None
+        depth = min(self._levels)
+        level = self._levels[depth]
+        url = level.popleft()
+        if not level:
+            del self._levels[depth]
+        self._size -= 1
+        return url, depth
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class _SpilledQueue:
+    """
+    A FIFO queue of urls that keeps its head and tail in memory, and spills the urls between them to segment files.
+    Urls are popped from head, then from the oldest segment, then from tail.
+    """
+
+    def __init__(self, directory: str, name: str, head_size: int, segment_size: int):
+        self._directory = directory
+        self._name = name
+        self._head_size = head_size
+        self._segment_size = segment_size
+        self._head: deque[str] = deque()
+        self._segments: deque[str] = deque()
+        self._tail: list[str] = []
+        self._segment_count = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def push(self, url: str):
+        self._size += 1
+        if not self._segments and not self._tail and len(self._head) < self._head_size:
+            self._head.append(url)
+            return
+        self._tail.append(url)
+        if len(self._tail) >= self._segment_size:
+            self._spill()
+
+    def pop(self) -> str:
+        if not self._head:
+            self._refill()
+        self._size -= 1
+        return self._head.popleft()
+
+    def _spill(self):
+        """Writes the tail to a new segment file."""
+        path = os.path.join(self._directory, f"{self._name}-{self._segment_count}.urls")
+        self._segment_count += 1
+        with open(path, "w", encoding="utf-8", newline="\n") as file:
+            file.write("\n".join(self._tail))
+        self._segments.append(path)
+        self._tail = []
+
+    def _refill(self):
+        """Reads the oldest segment file into the head, or moves the tail to the head if nothing was spilled."""
+        if not self._segments:
+            self._head.extend(self._tail)
+            self._tail = []
+            return
+        path = self._segments.popleft()
+        with open(path, encoding="utf-8", newline="\n") as file:
+            self._head.extend(file.read().split("\n"))
+        os.remove(path)
+
+    def clear(self):
+        for path in self._segments:
+            os.remove(path)
+        self._segments.clear()
+
+
+class DiskFrontier(Frontier):
+    """
+    Defines a frontier that spills to disk, for crawls whose frontier does not fit in memory. It pops urls in the same
+    breadth-first order as BreadthFrontier.
+
+    Each depth keeps a small in-memory head and tail. Once a depth holds more than head_size urls, newly pushed urls
+    are collected in its tail and written to a segment file every segment_size urls. Segments are read back a whole
+    file at a time when the head runs out, so at most head_size + 2 * segment_size urls are in memory per depth.
+    Urls must not contain newlines, which canonical urls never do. Close the frontier (e.g. with 'async with') to
+    remove its segment files and temporary directory.
+    """
+
+    def __init__(
+        self,
+        directory: str = None,
+        head_size: int = 10_000,
+        segment_size: int = 100_000,
+    ):
+        """
+        Creates an instance of DiskFrontier.
+        :param directory: The directory that segment files are written to. A temporary directory by default, which is
+        removed when the frontier is closed.
+        :param head_size: The amount of urls per depth that are kept in memory before urls are spilled to disk.
+        :param segment_size: The amount of urls in a segment file.
+        """
+        if head_size < 1 or segment_size < 1:
+            raise ValueError("head_size and segment_size must be greater than 0")
+        self._temporary_directory = (
+            None if directory else tempfile.TemporaryDirectory(prefix="crawley-")
+        )
+        self.directory = directory or self._temporary_directory.name
+        os.makedirs(self.directory, exist_ok=True)
+        self.head_size = head_size
+        self.segment_size = segment_size
+        self._levels: dict[int, _SpilledQueue] = {}
+        self._size = 0
+        self._instance = f"{os.getpid()}-{id(self)}"
+
+    def push(self, url: str, depth: int = 0) -> None:
+        level = self._levels.get(depth)
+        if level is None:
+            level = self._levels[depth] = _SpilledQueue(
+                self.directory,
+                f"{self._instance}-{depth}",
+                self.head_size,
+                self.segment_size,
+            )
+        level.push(url)
+        self._size += 1
+
+    def pop(self) -> tuple[str, int] | None:
+        if not self._size:
+            return None
+        depth = min(self._levels)
+        level = self._levels[depth]
+        url = level.pop()
+        if not level:
+            del self._levels[depth]
+        self._size -= 1
+        return url, depth
+
+    def __len__(self) -> int:
+        return self._size
+
+    async def close(self) -> None:
+        """Removes the segment files of the frontier."""
+        for level in self._levels.values():
+            level.clear()
+        self._levels.clear()
+        self._size = 0
+        if self._temporary_directory:
+            self._temporary_directory.cleanup()
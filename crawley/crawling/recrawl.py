@@ -0,0 +1,154 @@
+import asyncio
+import math
+import os
+import sqlite3
+import time
+from collections.abc import Iterable
+from datetime import datetime
+
+from crawley import AsyncContextManager
+from crawley.crawling.sitemap import SitemapPage
+
+CHANGE_FREQUENCIES = {
+    "always": 0,
+    "hourly": 3600,
+    "daily": 86400,
+    "weekly": 7 * 86400,
+    "monthly": 30 * 86400,
+    "yearly": 365 * 86400,
+    "never": math.inf,
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    last_modified REAL,
+    fetched_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+_BATCH_SIZE = 500
+
+
+def is_due(
+    page: SitemapPage,
+    last_modified: float | None,
+    fetched_at: float | None,
+    now: float,
+    default_interval: float,
+) -> bool:
+    """
+    Checks if a sitemap page should be fetched again.
+
+    A page that has not been fetched before is always due. A page with a lastmod is due if it has been modified since
+    it was last fetched, and a page without one is due once its changefreq (or default_interval) has passed.
+    :param page: The page in the sitemap.
+    :param last_modified: The lastmod of the page when it was last fetched, as a timestamp.
+    :param fetched_at: When the page was last fetched, as a timestamp. None if it has not been fetched.
+    :param now: The current time, as a timestamp.
+    :param default_interval: The amount of seconds between fetches of a page with no lastmod or changefreq.
+    """
+    if fetched_at is None:
+        return True
+    if page.last_modified:
+        return last_modified is None or page.last_modified.timestamp() > last_modified
+    interval = CHANGE_FREQUENCIES.get(page.change_frequency, default_interval)
+    return now - fetched_at >= interval
+
+
+class RecrawlLog(AsyncContextManager):
+    """
+    Defines an on-disk log of when pages were fetched, stored in SQLite. Used to recrawl a website incrementally: only
+    the sitemap pages that have changed, or are due according to their changefreq, are fetched again.
+
+    Fetches are recorded in memory, and written in a worker thread when the log is saved.
+    """
+
+    def __init__(self, path: str | os.PathLike, default_interval: float = 86400):
+        """
+        Creates an instance of RecrawlLog.
+        :param path: The path of the SQLite database file. Created if it does not exist.
+        :param default_interval: The amount of seconds between fetches of a page with no lastmod or changefreq.
+        """
+        self.path = path
+        self.default_interval = default_interval
+        self._connection: sqlite3.Connection | None = None
+        self._fetched: list[tuple[str, float | None, float]] = []
+        self._lock = asyncio.Lock()
+
+    async def due(self, pages: Iterable[SitemapPage]) -> list[SitemapPage]:
+        """
+        Gets the sitemap pages that should be fetched again.
+        :param pages: The pages of a sitemap.
+        :return: The pages that have not been fetched before, have been modified, or are due to be fetched.
+        """
+        pages = list(pages)
+        async with self._lock:
+            fetches = await asyncio.to_thread(
+                self._get_fetches, [page.url for page in pages]
+            )
+        now = time.time()
+        return [
+            page
+            for page in pages
+            if is_due(
+                page, *fetches.get(page.url, (None, None)), now, self.default_interval
+            )
+        ]
+
+    def record(
+        self, url: str, last_modified: datetime | None, fetched_at: float = None
+    ) -> None:
+        """
+        Records that a page was fetched.
+        :param url: The url of the page.
+        :param last_modified: The lastmod of the page in its sitemap.
+        :param fetched_at: When the page was fetched, as a timestamp. Now by default.
+        """
+        self._fetched.append(
+            (
+                url,
+                last_modified.timestamp() if last_modified else None,
+                time.time() if fetched_at is None else fetched_at,
+            )
+        )
+
+    async def save(self) -> None:
+        """Writes the recorded fetches to disk."""
+        fetched, self._fetched = self._fetched, []
+        async with self._lock:
+            await asyncio.to_thread(self._save, fetched)
+
+    async def close(self) -> None:
+        await self.save()
+        async with self._lock:
+            if self._connection:
+                self._connection.close()
+                self._connection = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._connection:
+            # only used in one thread at a time, guarded by self._lock
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript(_SCHEMA)
+        return self._connection
+
+    def _get_fetches(self, urls: list[str]) -> dict[str, tuple[float | None, float]]:
+        connection, fetches = self._connect(), {}
+        for start in range(0, len(urls), _BATCH_SIZE):
+            batch = urls[start : start + _BATCH_SIZE]
+            rows = connection.execute(
+                "SELECT url, last_modified, fetched_at FROM pages "
+                f"WHERE url IN ({', '.join('?' * len(batch))})",
+                batch,
+            )
+            fetches.update(
+                (url, (modified, fetched)) for url, modified, fetched in rows
+            )
+        return fetches
+
+    def _save(self, fetched: list[tuple[str, float | None, float]]):
+        with self._connect() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?)", fetched
+            )
@@ -0,0 +1,41 @@
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass
+class CrawlRecord:
+    """
+    A url discovered by a crawl, and where it was discovered.
+
+    parent is the webpage that linked to url (None if url was found in a sitemap), and status and content_type
+    describe the response of parent. depth is the amount of links between url and the seed urls.
+    """
+
+    url: str
+    parent: str | None
+    depth: int
+    status: int | None = None
+    content_type: str | None = None
+
+
+class ResultSink:
+    """
+    Defines a sink of crawl results. Discovered urls are passed to a callback as they are found (e.g. to write them to
+    a file), instead of being kept in memory. Only the amount of urls is kept.
+    """
+
+    def __init__(self, callback: Callable[[str], Any]):
+        """
+        Creates an instance of ResultSink.
+        :param callback: The function that each discovered url is passed to.
+        """
+        self._callback = callback
+        self._size = 0
+
+    def add(self, url: str) -> None:
+        self._callback(url)
+        self._size += 1
+
+    def __len__(self) -> int:
+        return self._size
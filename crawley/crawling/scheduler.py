@@ -0,0 +1,145 @@
+import heapq
+import time
+from collections import deque
+from collections.abc import Callable
+
+from crawley.crawling.frontier import Frontier, BreadthFrontier
+from crawley.crawling.util import get_homepage
+
+
+class HostScheduler(Frontier):
+    """
+    Defines a host-aware frontier. Urls are queued per host (keyed by homepage), and hosts take turns: each pop
+    returns a url of the next host in round-robin order that is ready. A host is ready while it has fewer than
+    max_per_host urls being crawled, and min_interval seconds have passed since its last url was popped.
+
+    A single large host therefore cannot take every worker, and a slow host only holds back its own urls. Within a
+    host, urls are popped in the order of their own frontier (breadth-first by default).
+
+    Ready hosts are kept in a queue, and hosts waiting for their interval in a heap, so a pop does not scan every
+    host however many there are.
+
+    The frontier of a host whose urls have all been popped is kept, and reused for the next new host, so frontiers
+    that hold resources (e.g. the temporary directory of a DiskFrontier) are only created for as many hosts as are
+    queued at once. Closing the scheduler closes every frontier it created.
+    """
+
+    def __init__(
+        self,
+        max_per_host: int = 2,
+        min_interval: float = 0,
+        host_frontier: Callable[[], Frontier] = BreadthFrontier,
+    ):
+        """
+        Creates an instance of HostScheduler.
+        :param max_per_host: The maximum amount of urls of a host that are crawled at once.
+        :param min_interval: The minimum amount of seconds between popping two urls of the same host.
+        :param host_frontier: Creates the frontier that holds the urls of a single host.
+        """
+        if max_per_host < 1:
+            raise ValueError("max_per_host must be greater than 0")
+        if min_interval < 0:
+            raise ValueError("min_interval must not be negative")
+        self.max_per_host = max_per_host
+        self.min_interval = min_interval
+        self._host_frontier = host_frontier
+        self._hosts: dict[str, Frontier] = {}
+        # the empty frontiers of hosts whose urls have all been popped
+        self._idle: list[Frontier] = []
+        # the hosts that can be popped now, in round-robin order
+        self._ready: deque[str] = deque()
+        # the hosts with queued urls that wait for their interval to pass
+        self._waiting: set[str] = set()
+        self._active: dict[str, int] = {}
+        self._ready_at: dict[str, float] = {}
+        # when the interval of each host in _ready_at passes, earliest first (entries of changed hosts are stale)
+        self._timers: list[tuple[float, str]] = []
+        self._size = 0
+
+    def push(self, url: str, depth: int = 0) -> None:
+        host = get_homepage(url)
+        frontier = self._hosts.get(host)
+        if frontier is None:
+            frontier = self._hosts[host] = (
+                self._idle.pop() if self._idle else self._host_frontier()
+            )
+            if self._active.get(host, 0) < self.max_per_host:
+                self._schedule(host)
+        frontier.push(url, depth)
+        self._size += 1
+
+    def pop(self) -> tuple[str, int] | None:
+        now = time.monotonic()
+        self._expire(now)
+        if not self._ready:
+            return None
+        host = self._ready.popleft()
+        frontier = self._hosts[host]
+        url, depth = frontier.pop()
+        self._size -= 1
+        active = self._active[host] = self._active.get(host, 0) + 1
+        if self.min_interval:
+            ready_at = self._ready_at[host] = now + self.min_interval
+            heapq.heappush(self._timers, (ready_at, host))
+        if not frontier:
+            del self._hosts[host]
+            self._idle.append(frontier)
+        elif active < self.max_per_host:
+            self._schedule(host)
+        return url, depth
+
+    def _schedule(self, host: str):
+        """Queues a host with urls and a free slot for its turn, or for its interval to pass."""
+        if host in self._ready_at:
+            self._waiting.add(host)
+        else:
+            self._ready.append(host)
+
+    def _expire(self, now: float):
+        """Forgets the intervals that have passed, making the hosts that waited for them ready."""
+        timers = self._timers
+        while timers and timers[0][0] <= now:
+            ready_at, host = heapq.heappop(timers)
+            if self._ready_at.get(host) != ready_at:
+                continue
+            del self._ready_at[host]
+            if host in self._waiting:
+                self._waiting.remove(host)
+                self._ready.append(host)
+
+    def release(self, url: str) -> None:
+        host = get_homepage(url)
+        active = self._active.get(host, 0)
+        if active > 1:
+            self._active[host] = active - 1
+        else:
+            self._active.pop(host, None)
+        if active == self.max_per_host and host in self._hosts:
+            # the host was held back at its cap
+            self._schedule(host)
+
+    def ready_in(self) -> float | None:
+        if self._ready:
+            return 0.0
+        if not self._waiting:
+            return None
+        now = time.monotonic()
+        self._expire(now)
+        if self._ready:
+            return 0.0
+        # the earliest interval may belong to a host without urls, so this can be early, but never late
+        return max(0.0, self._timers[0][0] - now)
+
+    def __len__(self) -> int:
+        return self._size
+
+    async def close(self) -> None:
+        """Closes the frontiers of the hosts, discarding their urls."""
+        frontiers = [*self._hosts.values(), *self._idle]
+        self._hosts.clear()
+        self._idle.clear()
+        self._ready.clear()
+        self._waiting.clear()
+        self._size = 0
+        for frontier in frontiers:
+            await frontier.close()
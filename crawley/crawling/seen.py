@@ -0,0 +1,185 @@
+import math
+from abc import ABC, abstractmethod
+from array import array
+from hashlib import blake2b
+
+
+def fingerprint(url: str) -> int:
+    """Gets the non-zero 64-bit fingerprint of a url."""
+    return int.from_bytes(blake2b(url.encode(), digest_size=8).digest(), "big") or 1
+
+
+class SeenStore(ABC):
+    """Defines a store of the urls that have already been seen by a crawler."""
+
+    @abstractmethod
+    def add(self, url: str) -> None:
+        pass
+
+    @abstractmethod
+    def __contains__(self, url: str) -> bool:
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+
+class FingerprintSet(SeenStore):
+    """
+    Defines a set of url fingerprints. Urls are stored as 64-bit fingerprints in an open-addressing hash table backed
+    by an array, which uses a fraction of the memory of a set of strings.
+
+    Two urls may share a fingerprint, though this is unlikely: the chance of any collision between 100 million urls is
+    roughly 1 in 4000.
+    """
+
+    def __init__(self, capacity: int = 1024, max_load: float = 0.6):
+        """
+        Creates an instance of FingerprintSet.
+        :param capacity: The initial amount of slots in the table. Rounded up to a power of two.
+        :param max_load: The fraction of used slots that causes the table to double in size.
+        """
+        if not 0 < max_load < 1:
+            raise ValueError("max_load must be between 0 and 1")
+        self.max_load = max_load
+        self._size = 0
+        self._allocate(1 << max(capacity - 1, 1).bit_length())
+
+    def _allocate(self, capacity: int):
+        self._table = array("Q", bytes(8 * capacity))
+        self._mask = capacity - 1
+        self._max_size = int(capacity * self.max_load)
+
+    def _find(self, key: int) -> int:
+        """Gets the slot of a fingerprint, or the empty slot where it belongs."""
+        table, mask = self._table, self._mask
+        i = key & mask
+        while True:
+            slot = table[i]
+            if slot == key or not slot:
+                return i
+            i = (i + 1) & mask
+
+    def add(self, url: str) -> None:
+        self.add_fingerprint(fingerprint(url))
+
+    def add_fingerprint(self, key: int) -> None:
+        """Adds a fingerprint that was created with fingerprint()."""
+        i = self._find(key)
+        if self._table[i]:
+            return
+        self._table[i] = key
+        self._size += 1
+        if self._size > self._max_size:
+            self._resize()
+
+    def _resize(self):
+        """Doubles the size of the table."""
+        old_table = self._table
+        self._allocate(len(old_table) * 2)
+        for key in old_table:
+            if key:
+                self._table[self._find(key)] = key
+
+    def fingerprints(self):
+        """Gets the fingerprints in the set."""
+        return (key for key in self._table if key)
+
+    def __contains__(self, url: str) -> bool:
+        return bool(self._table[self._find(fingerprint(url))])
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class _BloomFilter:
+    """A fixed-capacity Bloom filter."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.bits = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self.count = 0
+        self._array = bytearray((self.bits + 7) // 8)
+
+    def _positions(self, first: int, second: int):
+        bits = self.bits
+        return ((first + i * second) % bits for i in range(self.hashes))
+
+    def add(self, first: int, second: int):
+        for position in self._positions(first, second):
+            self._array[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, hashes: tuple[int, int]) -> bool:
+        array_ = self._array
+        return all(
+            array_[position >> 3] & (1 << (position & 7))
+            for position in self._positions(*hashes)
+        )
+
+
+class ScalableBloomFilter(SeenStore):
+    """
+    Defines a scalable Bloom filter of urls. Memory use is a few bytes per url regardless of url length, at the cost
+    of a configurable false-positive rate: a url that has not been seen may be reported as seen, so it is skipped.
+
+    When a filter is full, a larger filter with a tighter error rate is added, so the overall false-positive rate
+    stays below error_rate however many urls are added.
+    """
+
+    def __init__(
+        self,
+        initial_capacity: int = 100_000,
+        error_rate: float = 0.001,
+        growth: int = 2,
+        tightening: float = 0.5,
+    ):
+        """
+        Creates an instance of ScalableBloomFilter.
+        :param initial_capacity: The amount of urls the first filter holds.
+        :param error_rate: The maximum false-positive rate of the filter.
+        :param growth: The factor each new filter's capacity grows by.
+        :param tightening: The factor each new filter's error rate shrinks by.
+        """
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        if not 0 < tightening < 1:
+            raise ValueError("tightening must be between 0 and 1")
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.growth = growth
+        self.tightening = tightening
+        self._filters: list[_BloomFilter] = []
+        self._size = 0
+
+    @staticmethod
+    def _hash(url: str) -> tuple[int, int]:
+        digest = blake2b(url.encode(), digest_size=16).digest()
+        return int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big") | 1
+
+    def add(self, url: str) -> None:
+        hashes = self._hash(url)
+        if any(hashes in bloom_filter for bloom_filter in self._filters):
+            return
+        if not self._filters or self._filters[-1].count >= self._filters[-1].capacity:
+            self._filters.append(
+                _BloomFilter(
+                    self.initial_capacity * self.growth ** len(self._filters),
+                    self.error_rate
+                    * (1 - self.tightening)
+                    * self.tightening ** len(self._filters),
+                )
+            )
+        self._filters[-1].add(*hashes)
+        self._size += 1
+
+    def __contains__(self, url: str) -> bool:
+        hashes = self._hash(url)
+        return any(hashes in bloom_filter for bloom_filter in self._filters)
+
+    def __len__(self) -> int:
+        return self._size
@@ -1,74 +1,309 @@
+import asyncio
+import codecs
 import logging
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
 from itertools import islice
 
-from usp.objects.sitemap import AbstractSitemap
-from usp.tree import sitemap_tree_for_homepage
+from crawley.crawling.util import get_homepage, is_url
+from crawley import AsyncContextManager
+from crawley.web_requests import WebRequestClient, StaticRequestClient, RobotsCache
+from crawley.web_requests.clients.client import fetch_retrying
 
-from crawley.crawling.util import get_homepage
+try:
+    from lxml.etree import XMLPullParser, XMLSyntaxError as ParseError
+
+    def _create_parser() -> XMLPullParser:
+        return XMLPullParser(
+            events=("end",), recover=True, resolve_entities=False, no_network=True
+        )
+
+except ImportError:
+    from xml.etree.ElementTree import XMLPullParser, ParseError
+
+    def _create_parser() -> XMLPullParser:
+        return XMLPullParser(events=("end",))
+
+
+logger = logging.getLogger(__name__)
+
+KNOWN_SITEMAP_PATHS = (
+    "sitemap.xml",
+    "sitemap.xml.gz",
+    "sitemap_index.xml",
+    "sitemap-index.xml",
+    "sitemap.txt",
+)
+
+_CHUNK_SIZE = 64 * 1024
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+@dataclass
+class SitemapPage:
+    """A page listed in a sitemap."""
+
+    url: str
+    last_modified: datetime | None = None
+    change_frequency: str | None = None
+    priority: float | None = None
+
+
+def _local_name(tag) -> str:
+    """Gets the name of an xml tag without its namespace."""
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
 
-# Silences gunzip warnings
-logging.getLogger("usp.helpers").disabled = True
 
+def _parse_datetime(value: str | None) -> datetime | None:
+    """Parses a W3C datetime. Datetimes without a timezone are assumed to be UTC."""
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except (AttributeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
 
-class SitemapCache(dict):
-    """Defines a sitemap cache. Prevents domain sitemaps from being revisited."""
 
-    def __init__(self, use_known_paths: bool = False):
+def _parse_float(value: str | None) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _children_text(element) -> dict[str, str]:
+    """Gets the text of the children of an xml element, keyed by name."""
+    return {_local_name(child.tag): (child.text or "").strip() for child in element}
+
+
+async def _decompressed_chunks(content: bytes, max_size: int):
+    """
+    Splits sitemap content into chunks, decompressing gzipped content incrementally.
+    Control is given back to the event loop between chunks.
+    """
+    decompressor = (
+        zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if content.startswith(_GZIP_MAGIC)
+        else None
+    )
+    size = 0
+    for start in range(0, len(content), _CHUNK_SIZE):
+        chunk = content[start : start + _CHUNK_SIZE]
+        if decompressor:
+            chunk = decompressor.decompress(chunk, max_size - size + 1)
+        size += len(chunk)
+        if size > max_size:
+            raise ValueError(f"sitemap exceeds {max_size} bytes")
+        yield chunk
+        await asyncio.sleep(0)
+
+
+class SitemapCache(dict, AsyncContextManager):
+    """
+    Defines a sitemap cache. Prevents domain sitemaps from being revisited.
+
+    Sitemaps are discovered through robots.txt and fetched asynchronously with the given client, so multiple domains
+    can be resolved concurrently. Sitemap pages are cached by homepage.
+    """
+
+    def __init__(
+        self,
+        use_known_paths: bool = False,
+        request_client: WebRequestClient = None,
+        robots_cache: RobotsCache = None,
+        max_depth: int = 10,
+        max_concurrent_requests: int = 10,
+        max_sitemap_size: int = 100 * 1024 * 1024,
+    ):
         """
         Creates a sitemap cache.
         :param use_known_paths: Whether to discover sitemaps through common known paths.
+        :param request_client: The client that is used to fetch robots.txt files and sitemaps. A StaticRequestClient
+        by default, which is closed with the cache.
+        :param robots_cache: The cache of robots.txt files that sitemaps are discovered from, e.g. the robots_cache of
+        a PoliteRequestClient so robots.txt is fetched once per host. A new cache by default.
+        :param max_depth: The maximum depth of nested sitemap indexes.
+        :param max_concurrent_requests: The maximum amount of sitemaps that are fetched at once for a domain.
+        :param max_sitemap_size: The maximum (decompressed) size of a sitemap in bytes.
         """
         super().__init__()
+        self._owns_client = request_client is None
+        self._request_client = request_client or StaticRequestClient()
         self.use_known_paths = use_known_paths
+        # compared with None, as an empty cache is falsy
+        self.robots_cache = (
+            robots_cache
+            if robots_cache is not None
+            else RobotsCache(self._request_client)
+        )
+        self.max_depth = max_depth
+        self.max_concurrent_requests = max_concurrent_requests
+        self.max_sitemap_size = max_sitemap_size
+        self._pending: dict[str, asyncio.Task] = {}
 
-    def _create_sitemap_tree(self, homepage: str):
+    async def get_pages(self, url: str) -> list[SitemapPage]:
         """
-        Creates a sitemap tree and stores it in the cache.
-        :param homepage: The homepage identifier for the cache.
+        Gets the sitemap pages of a domain. Fetches the sitemaps if they are not already in the cache.
+        Concurrent lookups for a domain that is already loading wait on the same result.
+        :param url: Any url belonging to a certain domain.
+        :return: The sitemap pages of the domain of the given url.
         """
-        self[homepage] = sitemap_tree_for_homepage(
-            homepage, use_known_paths=self.use_known_paths
-        )
+        homepage = get_homepage(url)
+        if homepage in self:
+            return self[homepage]
+        task = self._pending.get(homepage)
+        if not task:
+            task = asyncio.create_task(self._create_sitemap_pages(homepage))
+            self._pending[homepage] = task
+            task.add_done_callback(lambda _: self._pending.pop(homepage, None))
+        return await asyncio.shield(task)
 
-    def _get_sitemap_tree(self, url: str) -> str:
+    async def get_urls(self, url: str, max_urls: int = None) -> list[str]:
         """
-        Gets the desired sitemap tree from the cache. Creates the sitemap tree if
-        not already in the cache.
+        Gets the sitemap urls of a domain.
         :param url: Any url belonging to a certain domain.
-        :return: The homepage of the given url.
+        :param max_urls: The maximum amount of urls to retrieve.
+        :return: Urls from the sitemaps of the domain.
         """
-        homepage = get_homepage(url)
-        if homepage not in self:
-            self._create_sitemap_tree(homepage)
-        return homepage
+        pages = await self.get_pages(url)
+        if max_urls:
+            pages = islice(pages, max_urls)
+        return list(dict.fromkeys(page.url for page in pages))
 
-    def get(self, __key) -> AbstractSitemap:
+    async def _create_sitemap_pages(self, homepage: str) -> list[SitemapPage]:
         """
-        Gets the sitemap tree of a domain.
-        :param __key: Any url belonging to a certain domain.
-        :return: The sitemap of the domain of the given url.
+        Gets the sitemap pages of a domain and stores them in the cache.
+        :param homepage: The homepage identifier for the cache.
         """
-        return super().get(self._get_sitemap_tree(__key))
+        pages, visited = [], set()
+        await self._parse_sitemaps(
+            await self._get_sitemap_urls(homepage), pages, visited, 0
+        )
+        self[homepage] = pages
+        return pages
 
-    def __getitem__(self, item) -> AbstractSitemap:
+    async def _get_sitemap_urls(self, homepage: str) -> list[str]:
+        """Gets the sitemaps of a domain that are listed in robots.txt, and known paths if enabled."""
+        robots_parser = await self.robots_cache.get(homepage)
+        urls = list(robots_parser.site_maps() or [])
+        if self.use_known_paths:
+            urls += [f"{homepage}{path}" for path in KNOWN_SITEMAP_PATHS]
+        return list(dict.fromkeys(urls))
+
+    async def _parse_sitemaps(
+        self, urls: list[str], pages: list[SitemapPage], visited: set[str], depth: int
+    ):
         """
-        Gets the sitemap tree of a domain.
-        :param item: Any url belonging to a certain domain.
-        :return: The sitemap of the domain of the given url.
+        Fetches and parses sitemaps concurrently, following sitemap indexes.
+        :param urls: The urls of the sitemaps.
+        :param pages: The list that sitemap pages are added to.
+        :param visited: The sitemaps that have already been parsed.
+        :param depth: The depth of the sitemaps in the sitemap index tree.
         """
-        return super().__getitem__(self._get_sitemap_tree(item))
+        urls = [url for url in urls if url not in visited and is_url(url)]
+        if not urls or depth > self.max_depth:
+            return
+        visited.update(urls)
+        semaphore = asyncio.Semaphore(self.max_concurrent_requests)
 
-    @staticmethod
-    def get_urls(tree: AbstractSitemap, max_urls: int = None):
+        async def parse(url: str) -> list[str]:
+            async with semaphore:
+                return await self._parse_sitemap(url, pages)
+
+        indexed = await asyncio.gather(*(parse(url) for url in urls))
+        await self._parse_sitemaps(
+            [url for urls in indexed for url in urls], pages, visited, depth + 1
+        )
+
+    async def _parse_sitemap(self, url: str, pages: list[SitemapPage]) -> list[str]:
         """
-        Gets urls from a sitemap tree.
-        :param tree: The tree to get the urls from.
-        :param max_urls: The maximum amount of urls to retrieve.
-        :return: Urls from the sitemap tree.
+        Fetches and incrementally parses a sitemap. Transient failures are retried.
+        :param url: The url of the sitemap.
+        :param pages: The list that sitemap pages are added to.
+        :return: The urls of the sitemaps listed in the sitemap, if it is a sitemap index.
         """
-        urls, pages = set(), tree.all_pages()
-        if max_urls:
-            pages = islice(pages, max_urls)
-        for page in pages:
-            urls.add(page.url)
-        return urls
+        try:
+            response = await fetch_retrying(self._request_client, url)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Could not fetch sitemap {url}: {e}")
+            return []
+        if not response.is_parsable:
+            return []
+        content = response.web_resource.content
+        if isinstance(content, str):
+            content = content.encode()
+        try:
+            return await self._parse_content(content, pages)
+        except (ParseError, ValueError, zlib.error) as e:
+            logger.warning(f"Could not parse sitemap {url}: {e}")
+            return []
+
+    async def _parse_content(
+        self, content: bytes, pages: list[SitemapPage]
+    ) -> list[str]:
+        """Parses an xml or plain text sitemap, adding its pages to pages and returning its sitemaps."""
+        chunks = _decompressed_chunks(content, self.max_sitemap_size)
+        # a byte order mark would hide the "<" of xml, and the first url of text
+        first_chunk = (await anext(chunks, b"")).removeprefix(codecs.BOM_UTF8)
+        if not first_chunk.lstrip().startswith(b"<"):
+            return await self._parse_text(first_chunk, chunks, pages)
+
+        parser, sitemaps = _create_parser(), []
+        parser.feed(first_chunk)
+        while True:
+            for _, element in parser.read_events():
+                name = _local_name(element.tag)
+                if name == "url":
+                    self._add_page(_children_text(element), pages)
+                    element.clear()
+                elif name == "sitemap":
+                    sitemaps.append(_children_text(element).get("loc"))
+                    element.clear()
+            chunk = await anext(chunks, None)
+            if chunk is None:
+                break
+            parser.feed(chunk)
+        parser.close()
+        return [sitemap for sitemap in sitemaps if sitemap]
+
+    @staticmethod
+    async def _parse_text(
+        first_chunk: bytes, chunks, pages: list[SitemapPage]
+    ) -> list[str]:
+        """Parses a plain text sitemap, which lists one url per line."""
+        remainder = first_chunk
+        async for chunk in chunks:
+            remainder += chunk
+            *lines, remainder = remainder.split(b"\n")
+            SitemapCache._add_text_pages(lines, pages)
+        SitemapCache._add_text_pages(remainder.split(b"\n"), pages)
+        return []
+
+    @staticmethod
+    def _add_text_pages(lines: list[bytes], pages: list[SitemapPage]):
+        for line in lines:
+            url = line.strip().decode("utf-8", errors="ignore")
+            if is_url(url):
+                pages.append(SitemapPage(url))
+
+    @staticmethod
+    def _add_page(fields: dict[str, str], pages: list[SitemapPage]):
+        """Adds a sitemap page from the fields of a <url> element."""
+        url = fields.get("loc")
+        if not url:
+            return
+        pages.append(
+            SitemapPage(
+                url,
+                _parse_datetime(fields.get("lastmod")),
+                fields.get("changefreq", "").lower() or None,
+                _parse_float(fields.get("priority")),
+            )
+        )
+
+    async def close(self) -> None:
+        """Closes the request client, if the cache created it."""
+        if self._owns_client:
+            await self._request_client.close()
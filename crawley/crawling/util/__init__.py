@@ -1,2 +1,3 @@
+from .extractors import *
 from .soup import *
 from .url import *
@@ -0,0 +1,124 @@
+from collections.abc import Callable
+
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree
+
+    _PARSER = "lxml"
+except ImportError:
+    etree = None
+    _PARSER = "html.parser"
+
+LinkExtractor = Callable[[str | bytes], list[str]]
+
+
+def soup_links(
+    content: str | bytes, parser: str = _PARSER, encoding: str = None
+) -> list[str]:
+    """
+    Parses html content into a BeautifulSoup tree to get the hrefs of its links.
+    :param content: The html content to parse.
+    :param parser: The parser for the content. 'lxml' by default, 'html.parser' if etree module is not available.
+    :param encoding: The encoding of bytes content. Detected by BeautifulSoup if not given.
+    :return: The hrefs in the content.
+    """
+    if isinstance(content, bytes) and encoding:
+        soup = BeautifulSoup(content, parser, from_encoding=encoding)
+    else:
+        soup = BeautifulSoup(content, parser)
+    return [a.get("href") for a in soup.find_all("a", href=True)]
+
+
+class _LinkTarget:
+    """Defines an lxml parser target that collects link hrefs as tags are parsed, without building a tree."""
+
+    def __init__(self):
+        self.urls = []
+
+    def start(self, tag: str, attrib: dict):
+        if tag == "a":
+            href = attrib.get("href")
+            if href is not None:
+                self.urls.append(href)
+
+    def close(self) -> list[str]:
+        return self.urls
+
+
+def _html_parser(encoding: str | None, **kwargs) -> "etree.HTMLParser":
+    """Creates an lxml html parser for an encoding, or one that detects the encoding if lxml does not know it."""
+    try:
+        return etree.HTMLParser(encoding=encoding, **kwargs)
+    except LookupError:
+        return etree.HTMLParser(**kwargs)
+
+
+def lxml_links(content: str | bytes, encoding: str = None) -> list[str]:
+    """
+    Streams html content through lxml's parser to get the hrefs of its links. No document tree is built. Bytes are
+    decoded by lxml as they are parsed, and invalid bytes are skipped rather than raising.
+    :param content: The html content to parse.
+    :param encoding: The encoding of bytes content. Detected by lxml (from a <meta> charset) if not given.
+    :return: The hrefs in the content.
+    """
+    if not content:
+        return []
+    target = _LinkTarget()
+    parser = _html_parser(
+        encoding if isinstance(content, bytes) else None, target=target
+    )
+    try:
+        parser.feed(content)
+        return parser.close()
+    except etree.LxmlError:
+        return target.urls
+
+
+def lxml_tree_links(content: str | bytes, encoding: str = None) -> list[str]:
+    """
+    Parses html content into an lxml tree to get the hrefs of its links. lxml releases the GIL while it builds the
+    tree, so this backend scales across threads when parsing in a thread pool.
+    :param content: The html content to parse.
+    :param encoding: The encoding of bytes content. Detected by lxml (from a <meta> charset) if not given.
+    :return: The hrefs in the content.
+    """
+    if not content:
+        return []
+    if isinstance(content, str):
+        # lxml rejects str content with an encoding declaration, so it is parsed as the utf-8 it is encoded to
+        content, parser = content.encode(), etree.HTMLParser(encoding="utf-8")
+    else:
+        parser = _html_parser(encoding)
+    try:
+        root = etree.fromstring(content, parser)
+    except (etree.LxmlError, ValueError):
+        return []
+    return [] if root is None else root.xpath("//a/@href")
+
+
+LINK_EXTRACTORS: dict[str, LinkExtractor] = {"soup": soup_links}
+if etree is not None:
+    LINK_EXTRACTORS["lxml"] = lxml_links
+    LINK_EXTRACTORS["lxml-tree"] = lxml_tree_links
+
+DEFAULT_EXTRACTOR: LinkExtractor = lxml_links if etree is not None else soup_links
+
+
+def extract_links(
+    content: str | bytes, extractor: LinkExtractor = None, encoding: str = None
+) -> list[str]:
+    """
+    Extracts the hrefs of links from html content with an extractor.
+    :param content: The html content.
+    :param extractor: The backend that extracts the hrefs. DEFAULT_EXTRACTOR by default.
+    :param encoding: The encoding of bytes content. The built-in extractors parse the bytes in it, other extractors
+    are given the decoded content.
+    :return: The hrefs in the content.
+    """
+    extractor = extractor or DEFAULT_EXTRACTOR
+    if encoding is None or not isinstance(content, bytes):
+        return extractor(content)
+    if extractor in LINK_EXTRACTORS.values():
+        return extractor(content, encoding=encoding)
+    return extractor(content.decode(encoding, errors="replace"))
@@ -1,39 +1,59 @@
-from urllib.parse import urlparse
-from bs4 import BeautifulSoup
-
-from crawley.crawling.util.url import remove_fragment, get_absolute
-
-try:
-    from lxml import etree
-
-    _PARSER = "lxml"
-except ImportError:
-    _PARSER = "html.parser"
-
-
-def get_urls(content: str, parser: str = _PARSER) -> list[str]:
+from crawley.crawling.util.extractors import LinkExtractor, extract_links
+from crawley.url import (
+    UrlCanonicalizer,
+    canonicalize,
+    get_absolute,
+    get_netloc,
+)
+
+
+def get_urls(
+    content: str | bytes | list[str],
+    extractor: LinkExtractor = None,
+    encoding: str = None,
+) -> list[str]:
     """
-    Parses html/xml content for urls.
-    :param content: The html/xml content to parse.
-    :param parser: The parser for the content. 'lxml' by default, 'html.parser' if etree module is not available.
+    Parses html content for urls.
+    :param content: The html content to parse, or the urls that were already extracted from it (see Response.links).
+    :param extractor: The backend that extracts the urls. lxml's streaming parser by default, BeautifulSoup if lxml is
+    not available.
+    :param encoding: The encoding of bytes content (see WebResource.encoding).
     :return: The urls in the content
     """
-    soup = BeautifulSoup(content, parser)
-    return [a.get("href") for a in soup.find_all("a")]
-
-
-def get_absolute_urls(base_url: str, content: str) -> set[str]:
-    """Gets absolute urls (with no fragments) from webpage content."""
+    if isinstance(content, list):
+        return content
+    return extract_links(content, extractor, encoding)
+
+
+def get_absolute_urls(
+    base_url: str,
+    content: str | bytes | list[str],
+    extractor: LinkExtractor = None,
+    canonicalizer: UrlCanonicalizer = None,
+    encoding: str = None,
+) -> set[str]:
+    """Gets canonical, absolute urls (with no fragments) from webpage content."""
     return set(
-        [remove_fragment(url) for url in get_absolute(base_url, get_urls(content))]
+        get_absolute(base_url, get_urls(content, extractor, encoding), canonicalizer)
     )
 
 
-def get_internal_urls(base_url: str, content: str) -> set[str]:
-    """Gets absolute, internal urls (with no fragments) from webpage content."""
-    base_netloc, urls = urlparse(base_url).netloc, set()
-    for url in get_absolute(base_url, get_urls(content)):
-        url = remove_fragment(url)
-        if urlparse(url).netloc == base_netloc:
-            urls.add(url)
-    return urls
+def get_internal_urls(
+    base_url: str,
+    content: str | bytes | list[str],
+    extractor: LinkExtractor = None,
+    canonicalizer: UrlCanonicalizer = None,
+    encoding: str = None,
+) -> set[str]:
+    """Gets canonical, absolute, internal urls (with no fragments) from webpage content."""
+    canonical_base_url = (canonicalizer or canonicalize)(base_url)
+    if not canonical_base_url:
+        return set()
+    base_netloc = get_netloc(canonical_base_url)
+    return {
+        url
+        for url in get_absolute(
+            base_url, get_urls(content, extractor, encoding), canonicalizer
+        )
+        if get_netloc(url) == base_netloc
+    }
@@ -0,0 +1,285 @@
+import asyncio
+import time
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Callable, Awaitable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+from aiohttp import (
+    TraceConfig,
+    ClientSession,
+    ClientResponseError,
+    TraceRequestStartParams,
+    TraceRequestEndParams,
+    TraceRequestExceptionParams,
+)
+
+# upper bounds (in seconds) of the buckets of timing histograms, from 1ms to 30s
+BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    float("inf"),
+)
+
+
+def host_of(url: str) -> str:
+    """Gets the host ("host" or "host:port") that metrics of a url are recorded under."""
+    return urlsplit(url).netloc
+
+
+@dataclass
+class TimingSnapshot:
+    """The distribution of a timing: how often it was observed, for how long, and the counts of each bucket."""
+
+    count: int = 0
+    total: float = 0
+    buckets: dict[float, int] = field(default_factory=dict)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimates a quantile of the timing, as the upper bound of the bucket the quantile falls in.
+        :param q: The quantile, between 0 and 1.
+        :return: The estimated quantile, in seconds. 0 if the timing was never observed.
+        """
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in self.buckets.items():
+            cumulative += count
+            if count and cumulative >= rank:
+                return bound
+        return 0
+
+
+@dataclass
+class MetricsSnapshot:
+    """The counters and timings of a crawl, or of one of its hosts, at a point in time."""
+
+    counters: dict[str, int] = field(default_factory=dict)
+    timings: dict[str, TimingSnapshot] = field(default_factory=dict)
+
+
+class _Histogram:
+    """A timing histogram with fixed buckets, so observing a value is a bisect and two additions."""
+
+    __slots__ = ("counts", "total")
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+
+    def snapshot(self) -> TimingSnapshot:
+        return TimingSnapshot(
+            sum(self.counts), self.total, dict(zip(BUCKETS, self.counts))
+        )
+
+
+class _Metrics:
+    """The counters and timings of one scope (the whole crawl, or a host)."""
+
+    __slots__ = ("counters", "timings")
+
+    def __init__(self):
+        self.counters: Counter[str] = Counter()
+        self.timings: dict[str, _Histogram] = {}
+
+    def observe(self, name: str, seconds: float):
+        histogram = self.timings.get(name)
+        if histogram is None:
+            histogram = self.timings[name] = _Histogram()
+        histogram.observe(seconds)
+
+    def snapshot(self) -> MetricsSnapshot:
+        return MetricsSnapshot(
+            dict(self.counters),
+            {name: histogram.snapshot() for name, histogram in self.timings.items()},
+        )
+
+
+class CrawlMetrics:
+    """
+    Defines a collection of the counters and timing histograms of a crawl, overall and per host. Recording a metric
+    is a few additions, so it can be left on at volume, unlike logging every request. Snapshots can be taken at any
+    point, e.g. by a Prometheus exporter or a loop that reports progress.
+
+    Metrics are recorded by the components they are given to:
+    - StaticRequestClient records the timings of requests (dns, connect, ttfb, body), their statuses and bytes.
+    - Crawler records the time spent parsing (parse), checking for visited urls (dedup) and getting sitemaps
+    (sitemap), and the amount of pages crawled and urls discovered.
+    """
+
+    def __init__(self, per_host: bool = True):
+        """
+        Creates an instance of CrawlMetrics.
+        :param per_host: If metrics are also recorded per host. Disable to save memory on crawls of many hosts.
+        """
+        self.per_host = per_host
+        self._total = _Metrics()
+        self._hosts: dict[str, _Metrics] = {}
+
+    def _host(self, host: str) -> _Metrics:
+        metrics = self._hosts.get(host)
+        if metrics is None:
+            metrics = self._hosts[host] = _Metrics()
+        return metrics
+
+    def count(self, name: str, host: str = None, amount: int = 1) -> None:
+        """
+        Increments a counter.
+        :param name: The name of the counter.
+        :param host: The host the counter is also incremented for.
+        :param amount: The amount to increment the counter by.
+        """
+        self._total.counters[name] += amount
+        if host and self.per_host:
+            self._host(host).counters[name] += amount
+
+    def observe(self, name: str, seconds: float, host: str = None) -> None:
+        """
+        Records a timing.
+        :param name: The name of the timing.
+        :param seconds: The duration.
+        :param host: The host the timing is also recorded for.
+        """
+        self._total.observe(name, seconds)
+        if host and self.per_host:
+            self._host(host).observe(name, seconds)
+
+    @contextmanager
+    def time(self, name: str, host: str = None) -> Iterator[None]:
+        """Records how long the body of a with statement takes."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, host)
+
+    def snapshot(self, host: str = None) -> MetricsSnapshot:
+        """
+        Gets the current metrics of the crawl.
+        :param host: The host to get the metrics of. The metrics of every host by default.
+        :return: A copy of the metrics, which later metrics do not change.
+        """
+        if host is None:
+            return self._total.snapshot()
+        metrics = self._hosts.get(host)
+        return metrics.snapshot() if metrics else MetricsSnapshot()
+
+    def hosts(self) -> list[str]:
+        """Gets the hosts that metrics have been recorded for."""
+        return list(self._hosts)
+
+    async def report(
+        self,
+        callback: Callable[[MetricsSnapshot], Awaitable | None],
+        interval: float = 10,
+    ) -> None:
+        """
+        Calls a function with a snapshot of the metrics every interval seconds, until cancelled. Run it as a task
+        alongside a crawl.
+        :param callback: A function (or coroutine function) that is called with each snapshot.
+        :param interval: The amount of seconds between snapshots.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            result = callback(self.snapshot())
+            if asyncio.iscoroutine(result):
+                await result
+
+    def trace_config(self) -> TraceConfig:
+        """
+        Creates a trace config that records the timings of the requests of a session. Each timing is in seconds:
+        - dns: Resolving a host name (not recorded when the lookup is cached).
+        - connect: Opening a connection, including its DNS lookup (not recorded when a connection is reused).
+        - ttfb: From the start of a request until its response headers are received.
+        Requests that fail without a response are counted as request_errors.
+        """
+        config = TraceConfig(trace_config_ctx_factory=_trace_context)
+        config.on_request_start.append(self._on_request_start)
+        config.on_dns_resolvehost_start.append(self._on_dns_start)
+        config.on_dns_resolvehost_end.append(self._on_dns_end)
+        config.on_connection_create_start.append(self._on_connect_start)
+        config.on_connection_create_end.append(self._on_connect_end)
+        config.on_connection_reuseconn.append(self._on_connection_reused)
+        config.on_request_end.append(self._on_request_end)
+        config.on_request_exception.append(self._on_request_exception)
+        return config
+
+    async def _on_request_start(
+        self,
+        session: ClientSession,
+        context: SimpleNamespace,
+        params: TraceRequestStartParams,
+    ):
+        context.host = host_of(str(params.url))
+        context.start = time.perf_counter()
+        self.count("requests", context.host)
+
+    async def _on_dns_start(self, session: ClientSession, context: SimpleNamespace, _):
+        context.dns_start = time.perf_counter()
+
+    async def _on_dns_end(self, session: ClientSession, context: SimpleNamespace, _):
+        self.observe("dns", time.perf_counter() - context.dns_start, context.host)
+
+    async def _on_connect_start(
+        self, session: ClientSession, context: SimpleNamespace, _
+    ):
+        context.connect_start = time.perf_counter()
+
+    async def _on_connect_end(
+        self, session: ClientSession, context: SimpleNamespace, _
+    ):
+        self.observe(
+            "connect", time.perf_counter() - context.connect_start, context.host
+        )
+
+    async def _on_connection_reused(
+        self, session: ClientSession, context: SimpleNamespace, _
+    ):
+        self.count("connections_reused", context.host)
+
+    async def _on_request_end(
+        self,
+        session: ClientSession,
+        context: SimpleNamespace,
+        params: TraceRequestEndParams,
+    ):
+        self.observe("ttfb", time.perf_counter() - context.start, context.host)
+
+    async def _on_request_exception(
+        self,
+        session: ClientSession,
+        context: SimpleNamespace,
+        params: TraceRequestExceptionParams,
+    ):
+        if isinstance(params.exception, ClientResponseError):
+            # the response was received, and rejected by raise_for_status
+            self.observe("ttfb", time.perf_counter() - context.start, context.host)
+        else:
+            self.count("request_errors", context.host)
+
+
+def _trace_context(trace_request_ctx: SimpleNamespace = None) -> SimpleNamespace:
+    return SimpleNamespace(trace_request_ctx=trace_request_ctx, host=None, start=0.0)
@@ -0,0 +1,192 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from types import FrameType
+
+from crawley.metrics import CrawlMetrics, TimingSnapshot
+
+# the stages of crawling a page, in order
+STAGES = ("fetch", "extract", "filter", "enqueue")
+
+
+@dataclass
+class BlockedLoop:
+    """A time the event loop was blocked for longer than the profiler's threshold."""
+
+    task: str | None
+    stack: list[str] = field(repr=False)
+    duration: float | None = None
+
+    @property
+    def blocker(self) -> str | None:
+        """Gets the innermost frame of the stack, i.e. the function that was running."""
+        return self.stack[-1] if self.stack else None
+
+
+def _frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    name = (
+        f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    )
+    # semicolons separate frames in folded stacks
+    return name.replace(";", ":")
+
+
+def _stack_of(frame: FrameType | None) -> list[str]:
+    """Gets the names of the frames of a stack, outermost first."""
+    stack = []
+    while frame is not None:
+        stack.append(_frame_name(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+class CrawlProfiler:
+    """
+    Defines a profiler of a crawl, for finding out what is limiting its throughput. While a crawl is profiled:
+    - The lag of the event loop (how late it wakes up) is sampled.
+    - Whenever the loop is blocked for longer than a threshold, the stack and task that blocked it are recorded.
+    - The stack of the event loop's thread is sampled, so the profile can be dumped as folded stacks for a flamegraph
+    (e.g. flamegraph.pl or speedscope).
+    - The wall time of each stage of crawling a page (STAGES) is recorded.
+
+    A crawler that is not given a profiler does none of this.
+    """
+
+    def __init__(
+        self,
+        lag_interval: float = 0.01,
+        block_threshold: float = 0.1,
+        sample_interval: float = 0.005,
+        metrics: CrawlMetrics = None,
+        output: str | os.PathLike = None,
+    ):
+        """
+        Creates an instance of CrawlProfiler.
+        :param lag_interval: The amount of seconds between samples of the event loop's lag.
+        :param block_threshold: The amount of seconds the event loop has to be blocked for to be recorded.
+        :param sample_interval: The amount of seconds between samples of the event loop thread's stack.
+        :param metrics: Where the loop lag (loop_lag) and stage timings are recorded. New metrics by default.
+        :param output: Where the folded stacks are written when a profiled crawl ends.
+        """
+        if block_threshold <= lag_interval:
+            raise ValueError("block_threshold must be greater than lag_interval")
+        self.lag_interval = lag_interval
+        self.block_threshold = block_threshold
+        self.sample_interval = sample_interval
+        self.metrics = metrics or CrawlMetrics(per_host=False)
+        self.output = output
+        self.blocks: list[BlockedLoop] = []
+        self._stacks: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._heartbeat = 0.0
+        self._stopped = threading.Event()
+        self._sampler: threading.Thread | None = None
+        self._lag_task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._sampler is not None
+
+    def record(self, stage: str, seconds: float) -> None:
+        """
+        Records the wall time of a stage of crawling a page.
+        :param stage: The stage, one of STAGES.
+        :param seconds: The duration of the stage.
+        """
+        self.metrics.observe(stage, seconds)
+
+    def start(self) -> None:
+        """Starts profiling the running event loop."""
+        if self.running:
+            raise RuntimeError("the profiler is already running")
+        loop = asyncio.get_running_loop()
+        self._heartbeat = time.perf_counter()
+        self._stopped.clear()
+        self._lag_task = loop.create_task(self._sample_lag())
+        self._sampler = threading.Thread(
+            target=self._sample_stacks,
+            args=(loop, threading.get_ident()),
+            name="crawley-profiler",
+            daemon=True,
+        )
+        self._sampler.start()
+
+    async def stop(self) -> None:
+        """Stops profiling, and writes the folded stacks to the output if there is one."""
+        if not self.running:
+            return
+        self._lag_task.cancel()
+        try:
+            await self._lag_task
+        except asyncio.CancelledError:
+            pass
+        self._stopped.set()
+        await asyncio.to_thread(self._sampler.join)
+        self._sampler = self._lag_task = None
+        if self.output:
+            await asyncio.to_thread(self.dump, self.output)
+
+    async def _sample_lag(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.lag_interval)
+            self._heartbeat = now = time.perf_counter()
+            lag = now - start - self.lag_interval
+            self.metrics.observe("loop_lag", lag)
+            if lag >= self.block_threshold:
+                with self._lock:
+                    # the block was caught in the act by the sampler, so only its duration is missing
+                    if self.blocks and self.blocks[-1].duration is None:
+                        self.blocks[-1].duration = lag
+                    else:
+                        self.blocks.append(BlockedLoop(None, [], lag))
+
+    def _sample_stacks(self, loop: asyncio.AbstractEventLoop, thread: int):
+        """Samples the stack of the event loop's thread, until stopped. Runs in its own thread."""
+        blocked_since = None
+        while not self._stopped.wait(self.sample_interval):
+            frame = sys._current_frames().get(thread)
+            if frame is None:
+                continue
+            stack = _stack_of(frame)
+            del frame
+            heartbeat = self._heartbeat
+            with self._lock:
+                self._stacks[";".join(stack)] += 1
+                late = time.perf_counter() - heartbeat - self.lag_interval
+                if late >= self.block_threshold and blocked_since != heartbeat:
+                    blocked_since = heartbeat
+                    task = asyncio.current_task(loop)
+                    self.blocks.append(
+                        BlockedLoop(task.get_name() if task else None, stack)
+                    )
+
+    @property
+    def lag(self) -> TimingSnapshot:
+        """Gets the distribution of the event loop's lag."""
+        return self.metrics.snapshot().timings.get("loop_lag", TimingSnapshot())
+
+    def stages(self) -> dict[str, TimingSnapshot]:
+        """Gets the wall time of each stage that has been recorded, in the order of STAGES."""
+        timings = self.metrics.snapshot().timings
+        return {stage: timings[stage] for stage in STAGES if stage in timings}
+
+    def folded_stacks(self) -> dict[str, int]:
+        """Gets the amount of times each stack was sampled, as frames separated by semicolons (outermost first)."""
+        with self._lock:
+            return dict(self._stacks)
+
+    def dump(self, path: str | os.PathLike) -> None:
+        """
+        Writes the sampled stacks in the folded format of flamegraph.pl, one stack and its count per line.
+        :param path: The path of the file.
+        """
+        with open(path, "w", encoding="utf-8") as file:
+            for stack, count in self.folded_stacks().items():
+                file.write(f"{stack} {count}\n")
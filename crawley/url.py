@@ -0,0 +1,196 @@
+import re
+from functools import lru_cache
+from urllib.parse import urlparse, urljoin, urlsplit, quote
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+TRACKING_PARAMS = frozenset(
+    {
+        "utm_source",
+        "utm_medium",
+        "utm_campaign",
+        "utm_term",
+        "utm_content",
+        "utm_id",
+        "gclid",
+        "dclid",
+        "fbclid",
+        "msclkid",
+        "yclid",
+        "mc_cid",
+        "mc_eid",
+        "igshid",
+        "_ga",
+        "_gl",
+    }
+)
+
+_ESCAPE = re.compile(r"%([0-9A-Fa-f]{2})")
+_UNRESERVED = frozenset(
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~"
+)
+_PATH_SAFE = "/:@!$&'()*+,;=%"
+_QUERY_SAFE = "/?:@!$'()*+,;%"
+
+
+def is_url(url: str) -> bool:
+    try:
+        result = urlparse(url)
+        return all([result.scheme, result.netloc])
+    except ValueError:
+        return False
+
+
+def get_homepage(url: str) -> str:
+    """Gets the homepage of a website."""
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}/"
+
+
+def get_robots(url: str) -> str:
+    """Gets the robots.txt file of a website."""
+    return f"{get_homepage(url)}robots.txt"
+
+
+def get_netloc(url: str) -> str:
+    """Gets the network location of a canonical url."""
+    return url.split("/", 3)[2]
+
+
+def _normalize_escape(match: re.Match) -> str:
+    """Decodes a percent-encoded unreserved character, or uppercases the escape."""
+    char = chr(int(match.group(1), 16))
+    return char if char in _UNRESERVED else f"%{match.group(1).upper()}"
+
+
+def _normalize_encoding(component: str, safe: str) -> str:
+    """Percent-encodes the characters a component should not contain raw, and normalizes existing escapes."""
+    return _ESCAPE.sub(_normalize_escape, quote(component, safe=safe))
+
+
+def remove_dot_segments(path: str) -> str:
+    """Resolves the '.' and '..' segments of an absolute path."""
+    if "." not in path:
+        return path
+    segments, resolved = path.split("/"), []
+    for segment in segments:
+        if segment == "..":
+            if len(resolved) > 1:
+                resolved.pop()
+        elif segment != ".":
+            resolved.append(segment)
+    if segments[-1] in (".", ".."):
+        resolved.append("")
+    return "/".join(resolved)
+
+
+class UrlCanonicalizer:
+    """
+    Defines a url canonicalizer. Urls that refer to the same resource are rewritten to the same form, so they are
+    only fetched once. Canonical urls are cached.
+
+    The scheme and host are lowercased, default ports are dropped, dot segments are resolved, percent-encoding is
+    normalized, query parameters are sorted, tracking parameters are removed and fragments are removed.
+    """
+
+    def __init__(
+        self,
+        tracking_params: frozenset[str] = TRACKING_PARAMS,
+        tracking_prefixes: tuple[str, ...] = ("utm_",),
+        sort_query: bool = True,
+        cache_size: int = 65536,
+    ):
+        """
+        Creates an instance of UrlCanonicalizer.
+        :param tracking_params: The (case-insensitive) names of query parameters that are removed.
+        :param tracking_prefixes: The prefixes of names of query parameters that are removed.
+        :param sort_query: Whether query parameters are sorted.
+        :param cache_size: The maximum amount of canonical urls that are cached.
+        """
+        self.tracking_params = frozenset(param.lower() for param in tracking_params)
+        self.tracking_prefixes = tuple(prefix.lower() for prefix in tracking_prefixes)
+        self.sort_query = sort_query
+        self.cache_size = cache_size
+        self._cached = lru_cache(maxsize=cache_size)(self._canonicalize)
+
+    def __call__(self, url: str) -> str | None:
+        """
+        Canonicalizes a url.
+        :param url: The url to canonicalize.
+        :return: The canonical url. None if url is not an absolute url.
+        """
+        return self._cached(url)
+
+    def __getstate__(self) -> dict:
+        # the cache is not picklable, so it is recreated when unpickled (e.g. in a process pool)
+        state = self.__dict__.copy()
+        del state["_cached"]
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._cached = lru_cache(maxsize=self.cache_size)(self._canonicalize)
+
+    def _canonicalize(self, url: str) -> str | None:
+        try:
+            parts = urlsplit(url.strip())
+            host, port = parts.hostname, parts.port
+        except ValueError:
+            return None
+        if not parts.scheme or not host:
+            return None
+        scheme = parts.scheme.lower()
+        netloc = f"[{host}]" if ":" in host else host
+        if port is not None and port != DEFAULT_PORTS.get(scheme):
+            netloc = f"{netloc}:{port}"
+        userinfo = parts.netloc.rpartition("@")[0]
+        if userinfo:
+            netloc = f"{userinfo}@{netloc}"
+        path = remove_dot_segments(_normalize_encoding(parts.path, _PATH_SAFE)) or "/"
+        query = self._canonicalize_query(parts.query)
+        return (
+            f"{scheme}://{netloc}{path}?{query}"
+            if query
+            else f"{scheme}://{netloc}{path}"
+        )
+
+    def _canonicalize_query(self, query: str) -> str:
+        if not query:
+            return ""
+        params = []
+        for param in query.split("&"):
+            if not param:
+                continue
+            name = param.partition("=")[0].lower()
+            if name in self.tracking_params or name.startswith(self.tracking_prefixes):
+                continue
+            params.append(_normalize_encoding(param, _QUERY_SAFE + "=&"))
+        if self.sort_query:
+            params.sort()
+        return "&".join(params)
+
+
+canonicalize = UrlCanonicalizer()
+
+
+def get_absolute(
+    origin_url: str, relative_urls: list[str], canonicalizer: UrlCanonicalizer = None
+) -> list[str]:
+    """
+    Gets the canonical, absolute form of urls.
+    :param origin_url: The url the relative urls are relative to.
+    :param relative_urls: The urls to make absolute.
+    :param canonicalizer: The canonicalizer of the absolute urls.
+    :return: The canonical, absolute urls. Urls that cannot be made absolute are skipped.
+    """
+    canonicalizer = canonicalizer or canonicalize
+    absolute_urls = []
+    for url in relative_urls:
+        url = canonicalizer(urljoin(origin_url, url))
+        if url:
+            absolute_urls.append(url)
+    return absolute_urls
+
+
+def remove_fragment(url: str) -> str:
+    return url.split("#")[0]
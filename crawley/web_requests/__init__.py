@@ -1 +1,3 @@
 from .clients import *
+from .robots import RobotsCache
+from .resolver import CachingResolver
@@ -4,6 +4,15 @@ from .client import (
     Response,
     WebRequestClient,
     WEBPAGE_CONTENT_TYPE,
+    sniff_encoding,
+    RetryRequest,
+    fetch_retrying,
 )
-from .dynamic import DynamicRequestClient
-from .static import StaticRequestClient
+from .dynamic import (
+    DynamicRequestClient,
+    BrowserPool,
+    ResourcePolicy,
+    BLOCK_UNNEEDED,
+)
+from .static import StaticRequestClient, PoolStats, DEFAULT_MAX_SIZES
+from .hybrid import HybridRequestClient, RenderMode, RenderStats
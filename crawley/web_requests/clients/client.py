@@ -1,12 +1,17 @@
 import asyncio
+import codecs
+import re
 from abc import abstractmethod
 from asyncio import Task
-from collections.abc import AsyncGenerator
-from dataclasses import dataclass
-from typing import Iterable
+from collections.abc import AsyncGenerator, AsyncIterable, AsyncIterator, Mapping
+from dataclasses import dataclass, field
+from typing import Iterable, TYPE_CHECKING
 
 from crawley import AsyncContextManager
 
+if TYPE_CHECKING:
+    from crawley.web_requests.robots import RobotsCache
+
 WEBPAGE_CONTENT_TYPE = "text/html"
 
 
@@ -17,6 +22,7 @@ class FetchResult:
     method: str
     url: str
     status: int
+    headers: Mapping[str, str] | None = field(default=None, repr=False)
 
     def __str__(self):
         return f"{self.method} request to {self.url} returned {self.status}"
@@ -28,6 +34,15 @@ class WebResource:
 
     content_type: str
     content: str | bytes
+    encoding: str | None = None
+    """The declared or sniffed encoding of bytes content. None if it is unknown."""
+
+    @property
+    def text(self) -> str:
+        """Gets the content as a string. Bytes that are invalid in the encoding are replaced, rather than raising."""
+        if isinstance(self.content, str):
+            return self.content
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
 
 
 @dataclass
@@ -36,17 +51,90 @@ class Response:
 
     fetch: FetchResult
     web_resource: WebResource | None
+    links: list[str] | None = field(default=None, repr=False)
+    """The absolute urls the webpage links to, if they were extracted while it was fetched."""
 
     @property
     def is_parsable(self):
-        """Checks if the response has parsable content."""
-        return bool(self.web_resource and self.web_resource.content)
+        """
+        Checks if the response has parsable content, or is a webpage whose links were already extracted (even if it
+        has none).
+        """
+        return bool(
+            self.web_resource and (self.web_resource.content or self.links is not None)
+        )
 
 
 def _is_webpage(content_type: str) -> bool:
     return content_type == WEBPAGE_CONTENT_TYPE
 
 
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+_META_CHARSET = re.compile(
+    rb"<meta[^>]+charset\s*=\s*[\"']?\s*([\w.:-]+)", re.IGNORECASE
+)
+
+
+def _known_encoding(encoding: str | None) -> str | None:
+    """Gets the canonical name of an encoding, or None if Python does not know it."""
+    if not encoding:
+        return None
+    try:
+        # hyphenated, the way parsers such as lxml name encodings
+        return codecs.lookup(encoding).name.replace("_", "-")
+    except LookupError:
+        return None
+
+
+def sniff_encoding(content: bytes, declared: str = None) -> str | None:
+    """
+    Gets the encoding of a webpage, in the order browsers use: a byte order mark, then the declared charset (of the
+    Content-Type header), then a <meta> charset in the first kilobyte. Nothing is decoded.
+    :param content: The content of the webpage.
+    :param declared: The charset the webpage was declared with.
+    :return: The encoding. None if it is unknown, e.g. to let lxml detect it.
+    """
+    for bom, encoding in _BOMS:
+        if content.startswith(bom):
+            return encoding
+    encoding = _known_encoding(declared)
+    if encoding:
+        return encoding
+    meta = _META_CHARSET.search(content[:1024])
+    return _known_encoding(meta.group(1).decode("ascii", "ignore")) if meta else None
+
+
+class RetryRequest(Exception):
+    """Raised when a request failed transiently, and should be retried after a delay."""
+
+    def __init__(self, url: str, delay: float, attempt: int, reason: str):
+        self.url = url
+        self.delay = delay
+        self.attempt = attempt
+        self.reason = reason
+
+    def __str__(self):
+        return f"Retry {self.attempt} of the request to {self.url} in {self.delay:.2f}s ({self.reason})"
+
+
+async def _iterate(urls: Iterable[str]) -> AsyncIterator[str]:
+    for url in urls:
+        yield url
+
+
+def _aiter(urls: Iterable[str] | AsyncIterable[str]) -> AsyncIterator[str]:
+    """Gets an asynchronous iterator of urls, whether the urls are synchronously iterable or not."""
+    if isinstance(urls, AsyncIterable):
+        return aiter(urls)
+    return _iterate(urls)
+
+
 async def cancel_tasks(tasks: Iterable[Task]):
     """Cancels tasks and handles returned exceptions."""
     for task in tasks:
@@ -58,34 +146,112 @@ class WebRequestClient(AsyncContextManager):
     """Defines a client that makes requests to web resources."""
 
     @abstractmethod
-    async def fetch(self, url: str) -> Response:
+    async def fetch(self, url: str, headers: Mapping[str, str] = None) -> Response:
         """
         Fetches the content of a web resource.
         :param url: The url of the web resource to fetch content from.
+        :param headers: Extra headers of the request, e.g. to make a conditional request.
         :return: The result of fetching content from the url.
         """
         pass
 
-    async def fetch_multiple(self, urls: Iterable[str]) -> AsyncGenerator[Response]:
+    async def fetch_multiple(
+        self, urls: Iterable[str] | AsyncIterable[str], concurrency: int = None
+    ) -> AsyncGenerator[Response]:
         """
-        Fetches the content of multiple web resources.
+        Fetches the content of multiple web resources. Responses are yielded in the order the fetches complete.
 
         When the generator is closed with .aclose(), fetches that have not yet yielded are cancelled.
-        :param urls: The urls of the web resources to fetch content from.
+        :param urls: The urls of the web resources to fetch content from. Urls are only taken from the iterable when
+        there is room in the concurrency window.
+        :param concurrency: The maximum amount of fetches that are in progress, or completed but not yet yielded,
+        at once. Unbounded by default.
         :return: The results of fetching content from the urls.
         """
-        tasks = [asyncio.create_task(self.fetch(url)) for url in urls]
+        if concurrency is not None and concurrency < 1:
+            raise ValueError("concurrency must be greater than 0")
+        window = asyncio.Semaphore(concurrency) if concurrency else None
+        completed: asyncio.Queue[Task] = asyncio.Queue()
+        fetches: set[Task] = set()
+
+        async def start_fetches():
+            async for url in _aiter(urls):
+                if window:
+                    await window.acquire()
+                fetch = asyncio.create_task(self.fetch(url))
+                fetch.add_done_callback(completed.put_nowait)
+                fetches.add(fetch)
+
+        producer = asyncio.create_task(start_fetches())
+        producer.add_done_callback(completed.put_nowait)
+        producing = True
         try:
-            for fetch in asyncio.as_completed(tasks):
+            # until the producer has been taken from the queue, so an error of the url iterable is always raised
+            while producing or fetches:
+                fetch = await completed.get()
+                if fetch is producer:
+                    producing = False
+                    fetch.result()
+                    continue
+                fetches.remove(fetch)
+                if window:
+                    window.release()
                 try:
-                    response = await fetch
-                    yield response
+                    yield fetch.result()
                 except Exception as e:
                     yield e
         finally:
-            await cancel_tasks(tasks)
+            await cancel_tasks([producer, *fetches])
 
     @abstractmethod
     async def user_agent(self) -> str | None:
         """Gets the user agent of the client."""
         pass
+
+    @property
+    def robots_cache(self) -> "RobotsCache | None":
+        """Gets the cache of robots.txt files the client obeys, so it can be shared. None if it ignores robots.txt."""
+        return None
+
+    def host_states(self) -> dict[str, dict]:
+        """
+        Gets the state the client keeps for each host (e.g. request rates or robots.txt files), so it can be saved in
+        a checkpoint. Called on the event loop.
+        :return: The JSON-serializable state of each host, keyed by homepage. Each client adds its own keys.
+        """
+        return {}
+
+    def restore_host_states(self, states: Mapping[str, dict]) -> None:
+        """
+        Restores the state of hosts saved with host_states, e.g. when a crawl is resumed. Called on the event loop.
+        :param states: The state of each host, keyed by homepage.
+        """
+        pass
+
+
+async def _fetch(
+    client: WebRequestClient, url: str, headers: Mapping[str, str] = None
+) -> Response:
+    """
+    Fetches a web resource with another client. Headers are only passed when there are any, so clients that
+    implement fetch(url) without headers keep working when they are wrapped.
+    """
+    if not headers:
+        return await client.fetch(url)
+    return await client.fetch(url, headers=headers)
+
+
+async def fetch_retrying(client: WebRequestClient, url: str) -> Response:
+    """
+    Fetches a web resource, waiting out and retrying the transient failures a client raises RetryRequest for. Used
+    where the response itself is needed (e.g. robots.txt and sitemaps), rather than re-queueing the url like a crawl.
+    The client surfaces the last failure once it runs out of retries.
+    :param client: The client that is used to fetch the web resource.
+    :param url: The url of the web resource.
+    :return: The result of fetching content from the url.
+    """
+    while True:
+        try:
+            return await client.fetch(url)
+        except RetryRequest as retry:
+            await asyncio.sleep(retry.delay)
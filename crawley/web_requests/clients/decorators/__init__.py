@@ -1,3 +1,5 @@
 from .decorator import WebRequestClientDecorator
 from .delay import DelayedRequestClient
 from .polite import DisallowedRequest, PoliteRequestClient
+from .adaptive import AdaptiveRequestClient, RetryRequest
+from .caching import CachingRequestClient, CacheStats
@@ -0,0 +1,213 @@
+import asyncio
+import logging
+import random
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from aiohttp import ClientError
+
+from crawley.url import get_homepage
+from crawley.web_requests import WebRequestClient, Response
+from crawley.web_requests.clients.client import RetryRequest, _fetch
+from crawley.web_requests.clients.decorators.decorator import WebRequestClientDecorator
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Parses a Retry-After header.
+    :param value: The header, either an amount of seconds or an HTTP date.
+    :return: The amount of seconds to wait. None if the header is missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if not retry_at.tzinfo:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+@dataclass
+class _HostRate:
+    """The request rate of a host, and when its next request may start."""
+
+    rate: float
+    next_request: float = 0
+
+
+class AdaptiveRequestClient(WebRequestClientDecorator):
+    """
+    Defines a request client that adapts its request rate to each host, and retries transient failures.
+
+    Rates follow additive-increase/multiplicative-decrease: every successful, fast response raises the rate of its host
+    by rate_increase, while a throttled (429), failed (5xx) or slow response multiplies it by rate_decrease. A
+    Retry-After header pauses the host for the given time.
+
+    Transient failures are not retried in place. A RetryRequest is raised with a jittered, exponential backoff delay,
+    so the caller can re-queue the url while the worker moves on. Once max_retries is reached, the response (or
+    error) of the last attempt is returned (or raised). Likewise, a request that would wait longer than max_wait for
+    its host's turn raises a RetryRequest for the rest of the wait, which does not count as an attempt.
+    """
+
+    def __init__(
+        self,
+        client: WebRequestClient,
+        max_rate: float = 10,
+        min_rate: float = 0.1,
+        rate_increase: float = 0.5,
+        rate_decrease: float = 0.5,
+        max_latency: float = None,
+        max_retries: int = 3,
+        backoff: float = 1,
+        max_backoff: float = 60,
+        retry_statuses: frozenset[int] = RETRY_STATUSES,
+        max_wait: float = 1,
+    ):
+        """
+        Creates an instance of AdaptiveRequestClient.
+        :param client: The client that is used to make the requests.
+        :param max_rate: The maximum (and initial) amount of requests per second to a host.
+        :param min_rate: The minimum amount of requests per second to a host.
+        :param rate_increase: The amount of requests per second a host's rate increases by after a success.
+        :param rate_decrease: The factor a host's rate is multiplied by after a throttled, failed or slow response.
+        :param max_latency: The amount of seconds after which a response counts as slow. Latency is ignored by default.
+        :param max_retries: The maximum amount of times a url is retried.
+        :param backoff: The base delay of retries in seconds, which doubles with every attempt.
+        :param max_backoff: The maximum delay of a retry in seconds. Longer Retry-After headers are not retried.
+        :param retry_statuses: The response statuses that are retried.
+        :param max_wait: The maximum amount of seconds a request waits for its host's turn. Longer waits are re-queued
+        with a RetryRequest, so a paused or slow host does not hold up the caller.
+        """
+        if not 0 < min_rate <= max_rate:
+            raise ValueError("min_rate must be greater than 0 and at most max_rate")
+        if not 0 < rate_decrease < 1:
+            raise ValueError("rate_decrease must be between 0 and 1")
+        super().__init__(client)
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.rate_increase = rate_increase
+        self.rate_decrease = rate_decrease
+        self.max_latency = max_latency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_statuses = retry_statuses
+        self.max_wait = max_wait
+        self._hosts: dict[str, _HostRate] = {}
+        self._attempts: dict[str, int] = {}
+
+    def rate(self, url: str) -> float:
+        """Gets the current amount of requests per second to the host of a url."""
+        host = self._hosts.get(get_homepage(url))
+        return host.rate if host else self.max_rate
+
+    async def fetch(self, url: str, headers: Mapping[str, str] = None) -> Response:
+        host = self._hosts.setdefault(get_homepage(url), _HostRate(self.max_rate))
+        await self._wait_turn(url, host)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        try:
+            response = await _fetch(self.client, url, headers)
+        except (ClientError, asyncio.TimeoutError) as e:
+            self._slow_down(host)
+            self._retry(url, None, str(e) or type(e).__name__, e)
+            raise
+        latency = loop.time() - start
+
+        status = response.fetch.status
+        if status not in self.retry_statuses:
+            if self.max_latency is not None and latency > self.max_latency:
+                self._slow_down(host)
+            else:
+                host.rate = min(self.max_rate, host.rate + self.rate_increase)
+            self._attempts.pop(url, None)
+            return response
+
+        self._slow_down(host)
+        response_headers = response.fetch.headers or {}
+        retry_after = parse_retry_after(response_headers.get("Retry-After"))
+        if retry_after is not None:
+            host.next_request = max(host.next_request, loop.time() + retry_after)
+        self._retry(url, retry_after, f"status {status}")
+        return response
+
+    def _retry(
+        self, url: str, retry_after: float | None, reason: str, error: Exception = None
+    ):
+        """
+        Raises a RetryRequest if a url has retries left, otherwise forgets its attempts so the failure is surfaced.
+        :param url: The url of the failed request.
+        :param retry_after: The amount of seconds the server asked to wait. None if it did not ask.
+        :param reason: Why the request failed.
+        :param error: The error of the failed request.
+        """
+        attempt = self._attempts.get(url, 0) + 1
+        if attempt > self.max_retries or (
+            retry_after is not None and retry_after > self.max_backoff
+        ):
+            self._attempts.pop(url, None)
+            return
+        self._attempts[url] = attempt
+        if retry_after is None:
+            # "full jitter", so retries of urls that failed together are spread out
+            delay = random.uniform(
+                0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+            )
+        else:
+            delay = retry_after
+        retry = RetryRequest(url, delay, attempt, reason)
+        logger.warning(retry)
+        raise retry from error
+
+    def host_states(self) -> dict[str, dict]:
+        states = super().host_states()
+        # the loop's clock does not survive a restart, so the next requests are saved as wall clock times
+        wall_offset = time.time() - asyncio.get_running_loop().time()
+        for homepage, host in self._hosts.items():
+            states.setdefault(homepage, {})["adaptive"] = {
+                "rate": host.rate,
+                "next_request": host.next_request + wall_offset,
+            }
+        return states
+
+    def restore_host_states(self, states: Mapping[str, dict]) -> None:
+        super().restore_host_states(states)
+        wall_offset = time.time() - asyncio.get_running_loop().time()
+        for homepage, state in states.items():
+            if "adaptive" in state:
+                adaptive = state["adaptive"]
+                rate = min(self.max_rate, max(self.min_rate, adaptive["rate"]))
+                self._hosts[homepage] = _HostRate(
+                    rate, adaptive["next_request"] - wall_offset
+                )
+
+    def _slow_down(self, host: _HostRate):
+        host.rate = max(self.min_rate, host.rate * self.rate_decrease)
+
+    async def _wait_turn(self, url: str, host: _HostRate):
+        """
+        Waits until a host's next request may start, and reserves the following slot. Raises a RetryRequest instead
+        if that is more than max_wait seconds away.
+        """
+        now = asyncio.get_running_loop().time()
+        start = max(now, host.next_request)
+        if start - now > self.max_wait:
+            raise RetryRequest(
+                url, start - now, self._attempts.get(url, 0), "waiting for the host"
+            )
+        host.next_request = start + 1 / host.rate
+        if start > now:
+            await asyncio.sleep(start - now)
@@ -0,0 +1,319 @@
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass
+
+from crawley.web_requests import WebRequestClient, Response, FetchResult, WebResource
+from crawley.web_requests.clients.client import _fetch
+from crawley.web_requests.clients.decorators.decorator import WebRequestClientDecorator
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    status INTEGER NOT NULL,
+    content_type TEXT,
+    is_text INTEGER NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    expires_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    encoding TEXT
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+@dataclass
+class CacheStats:
+    """
+    The counters of a response cache.
+
+    hits are responses served from the cache, either because they were fresh or because the server confirmed they
+    were unchanged (304). misses are responses fetched in full. revalidations are conditional requests that were made.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    revalidations: int = 0
+
+
+@dataclass
+class _CachedResponse:
+    url: str
+    status: int
+    content_type: str | None
+    is_text: bool
+    etag: str | None
+    last_modified: str | None
+    expires_at: float
+    encoding: str | None = None
+
+    def to_response(self, content: str | bytes) -> Response:
+        return Response(
+            FetchResult("GET", self.url, self.status),
+            WebResource(self.content_type, content, self.encoding),
+        )
+
+
+def _freshness(headers: Mapping[str, str]) -> tuple[bool, float]:
+    """
+    Gets whether a response can be stored, and the amount of seconds it is fresh for.
+    :param headers: The headers of the response.
+    """
+    cache_control = headers.get("Cache-Control", "").lower()
+    if "no-store" in cache_control:
+        return False, 0
+    if "no-cache" in cache_control:
+        return True, 0
+    max_age = _MAX_AGE.search(cache_control)
+    return True, float(max_age.group(1)) if max_age else 0
+
+
+class _ResponseStore:
+    """
+    An on-disk store of responses. Metadata is indexed in SQLite and bodies are kept in files named by the hash of
+    their url. Used from concurrent worker threads: the index and the body files are changed together under a lock,
+    and bodies are written to a temporary file that then replaces the body file, so a body is never read half-written.
+    """
+
+    def __init__(self, directory: str, max_size: int):
+        self.directory = directory
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(
+            os.path.join(directory, "index.sqlite"), check_same_thread=False
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(_SCHEMA)
+        columns = {
+            row[1] for row in self._connection.execute("PRAGMA table_info(responses)")
+        }
+        if "encoding" not in columns:
+            # a cache created before encodings were stored
+            self._connection.execute("ALTER TABLE responses ADD COLUMN encoding TEXT")
+        self._size = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+
+    def _body_path(self, url: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(url.encode()).hexdigest())
+
+    def get(self, url: str) -> _CachedResponse | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT url, status, content_type, is_text, etag, last_modified, expires_at, "
+                "encoding FROM responses WHERE url = ?",
+                (url,),
+            ).fetchone()
+        return _CachedResponse(*row) if row else None
+
+    def read(self, entry: _CachedResponse) -> str | bytes | None:
+        """Reads the body of a cached response, marking it as recently used. None if the body is missing."""
+        try:
+            with self._lock:
+                file = open(self._body_path(entry.url), "rb")
+        except FileNotFoundError:
+            self.delete(entry.url)
+            return None
+        with file:
+            content = file.read()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE responses SET last_used = ? WHERE url = ?",
+                (time.time(), entry.url),
+            )
+        return content.decode() if entry.is_text else content
+
+    def refresh(self, entry: _CachedResponse):
+        """Updates the validators and freshness of a cached response."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE responses SET etag = ?, last_modified = ?, expires_at = ? WHERE url = ?",
+                (entry.etag, entry.last_modified, entry.expires_at, entry.url),
+            )
+
+    def put(self, entry: _CachedResponse, content: str | bytes):
+        """Stores a response, evicting the least recently used responses if the store is too large."""
+        body = content.encode() if isinstance(content, str) else content
+        if len(body) > self.max_size:
+            return
+        descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with open(descriptor, "wb") as file:
+                file.write(body)
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+        with self._lock, self._connection:
+            os.replace(temporary_path, self._body_path(entry.url))
+            previous = self._connection.execute(
+                "SELECT size FROM responses WHERE url = ?", (entry.url,)
+            ).fetchone()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    entry.url,
+                    entry.status,
+                    entry.content_type,
+                    entry.is_text,
+                    entry.etag,
+                    entry.last_modified,
+                    entry.expires_at,
+                    len(body),
+                    time.time(),
+                    entry.encoding,
+                ),
+            )
+            self._size += len(body) - (previous[0] if previous else 0)
+        self._evict()
+
+    def _evict(self):
+        while self._size > self.max_size:
+            with self._lock:
+                rows = self._connection.execute(
+                    "SELECT url, size FROM responses ORDER BY last_used LIMIT 100"
+                ).fetchall()
+                if not rows:
+                    # the tracked size drifted from the index, e.g. the database was edited by another process
+                    self._size = self._connection.execute(
+                        "SELECT COALESCE(SUM(size), 0) FROM responses"
+                    ).fetchone()[0]
+                    return
+            for url, size in rows:
+                if self._size <= self.max_size:
+                    return
+                self.delete(url)
+
+    def delete(self, url: str):
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT size FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            if row:
+                self._connection.execute("DELETE FROM responses WHERE url = ?", (url,))
+                self._size -= row[0]
+            try:
+                os.remove(self._body_path(url))
+            except FileNotFoundError:
+                pass
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class CachingRequestClient(WebRequestClientDecorator):
+    """
+    Defines a request client that caches responses on disk, so recrawls only download the pages that have changed.
+
+    Successful responses with an ETag or Last-Modified header are stored. When a cached url is fetched again, a
+    conditional request (If-None-Match/If-Modified-Since) is made, and a 304 Not Modified response is served from the
+    cache. Responses that are still fresh (Cache-Control max-age) are served without a request. When the cache grows
+    larger than max_size, the least recently used responses are evicted.
+    """
+
+    def __init__(
+        self,
+        client: WebRequestClient,
+        directory: str | os.PathLike,
+        max_size: int = 1024 * 1024 * 1024,
+    ):
+        """
+        Creates an instance of CachingRequestClient.
+        :param client: The client that is used to make the requests. Must send the headers it is given, as
+        StaticRequestClient does.
+        :param directory: The directory of the cache. Created if it does not exist.
+        :param max_size: The maximum size of the cached bodies in bytes.
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be greater than 0")
+        super().__init__(client)
+        self._store = _ResponseStore(os.fspath(directory), max_size)
+        self.stats = CacheStats()
+
+    @property
+    def size(self) -> int:
+        """Gets the size of the cached bodies in bytes."""
+        return self._store.size
+
+    async def fetch(self, url: str, headers: Mapping[str, str] = None) -> Response:
+        cached = await asyncio.to_thread(self._store.get, url)
+        if cached and cached.expires_at > time.time():
+            content = await asyncio.to_thread(self._store.read, cached)
+            if content is not None:
+                self.stats.hits += 1
+                return cached.to_response(content)
+
+        request_headers = dict(headers or {})
+        if cached:
+            if cached.etag:
+                request_headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                request_headers["If-Modified-Since"] = cached.last_modified
+            self.stats.revalidations += 1
+        response = await _fetch(self.client, url, request_headers)
+        response_headers = response.fetch.headers or {}
+
+        if cached and response.fetch.status == 304:
+            content = await asyncio.to_thread(self._store.read, cached)
+            if content is not None:
+                self.stats.hits += 1
+                cached.etag = response_headers.get("ETag", cached.etag)
+                cached.last_modified = response_headers.get(
+                    "Last-Modified", cached.last_modified
+                )
+                cached.expires_at = time.time() + _freshness(response_headers)[1]
+                await asyncio.to_thread(self._store.refresh, cached)
+                return cached.to_response(content)
+            # the body was evicted or removed, so it has to be fetched in full
+            response = await _fetch(self.client, url, headers)
+            response_headers = response.fetch.headers or {}
+
+        self.stats.misses += 1
+        await self._store_response(url, response, response_headers)
+        return response
+
+    async def _store_response(
+        self, url: str, response: Response, headers: Mapping[str, str]
+    ):
+        """Stores a response if it is successful, and has a validator or is fresh."""
+        storable, max_age = _freshness(headers)
+        etag, last_modified = headers.get("ETag"), headers.get("Last-Modified")
+        if (
+            response.fetch.status != 200
+            or not response.is_parsable
+            or response.links is not None
+            or not storable
+            or not (etag or last_modified or max_age)
+        ):
+            return
+        content = response.web_resource.content
+        entry = _CachedResponse(
+            url,
+            response.fetch.status,
+            response.web_resource.content_type,
+            isinstance(content, str),
+            etag,
+            last_modified,
+            time.time() + max_age,
+            response.web_resource.encoding,
+        )
+        await asyncio.to_thread(self._store.put, entry, content)
+
+    async def close(self) -> None:
+        self._store.close()
+        await super().close()
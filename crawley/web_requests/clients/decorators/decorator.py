@@ -1,4 +1,5 @@
 from abc import ABC
+from collections.abc import Mapping
 
 from crawley.web_requests.clients import WebRequestClient
 
@@ -12,5 +13,15 @@ class WebRequestClientDecorator(WebRequestClient, ABC):
     async def user_agent(self):
         return await self.client.user_agent()
 
+    @property
+    def robots_cache(self):
+        return self.client.robots_cache
+
+    def host_states(self) -> dict[str, dict]:
+        return self.client.host_states()
+
+    def restore_host_states(self, states: Mapping[str, dict]) -> None:
+        self.client.restore_host_states(states)
+
     async def close(self) -> None:
         await self.client.close()
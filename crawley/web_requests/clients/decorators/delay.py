@@ -1,6 +1,9 @@
+from collections.abc import Mapping
+
 from aiolimiter import AsyncLimiter
 
 from crawley.web_requests import WebRequestClient, Response
+from crawley.web_requests.clients.client import _fetch
 from crawley.web_requests.clients.decorators.decorator import WebRequestClientDecorator
 
 
@@ -16,6 +19,6 @@ class DelayedRequestClient(WebRequestClientDecorator):
         super().__init__(client)
         self._request_limiter = AsyncLimiter(1, request_delay)
 
-    async def fetch(self, url: str) -> Response:
+    async def fetch(self, url: str, headers: Mapping[str, str] = None) -> Response:
         async with self._request_limiter:
-            return await self.client.fetch(url)
+            return await _fetch(self.client, url, headers)
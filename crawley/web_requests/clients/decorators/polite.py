@@ -1,19 +1,14 @@
+from collections.abc import Mapping
 from typing import Dict
-from urllib.robotparser import RobotFileParser
+
 from aiolimiter import AsyncLimiter
 
-from crawley.crawling.util import get_robots, get_homepage
-from crawley.web_requests import WebRequestClient, Response
+from crawley.url import get_homepage
+from crawley.web_requests import WebRequestClient, Response, RobotsCache
+from crawley.web_requests.clients.client import _fetch
 from crawley.web_requests.clients.decorators.decorator import WebRequestClientDecorator
 
 
-def _init_parser(url: str) -> RobotFileParser:
-    parser = RobotFileParser(url)
-    parser.set_url(get_robots(url))
-    parser.read()
-    return parser
-
-
 class DisallowedRequest(Exception):
     def __init__(self, url: str, user_agent: str):
         self.url = url
@@ -26,16 +21,20 @@ class DisallowedRequest(Exception):
 class PoliteRequestClient(WebRequestClientDecorator):
     """Defines a request client that enforces robots.txt delays and permissions for each domain independently."""
 
-    def __init__(self, client: WebRequestClient):
+    def __init__(self, client: WebRequestClient, robots_cache: RobotsCache = None):
         """
         Creates an instance of PoliteRequestClient.
         :param client: The client that is used to make the requests.
+        :param robots_cache: The cache of robots.txt files. By default, robots.txt files are fetched with client.
         """
         super().__init__(client)
+        self._robots_cache = (
+            robots_cache if robots_cache is not None else RobotsCache(client)
+        )
         self._limiters: Dict[str, AsyncLimiter] = {}
 
-    async def fetch(self, url: str) -> Response:
-        robots_parser = _init_parser(url)
+    async def fetch(self, url: str, headers: Mapping[str, str] = None) -> Response:
+        robots_parser = await self.robots_cache.get(url)
         user_agent = await self.user_agent()
 
         if not robots_parser.can_fetch(user_agent, url):
@@ -44,16 +43,30 @@ class PoliteRequestClient(WebRequestClientDecorator):
         request_limiter = self._limiters.get(get_homepage(url))
         if request_limiter:
             async with request_limiter:
-                return await self.client.fetch(url)
+                return await _fetch(self.client, url, headers)
 
         crawl_delay = robots_parser.crawl_delay(user_agent)
         if not crawl_delay:
-            return await self.client.fetch(url)
+            return await _fetch(self.client, url, headers)
 
         request_limiter = AsyncLimiter(1, float(crawl_delay))
         self._limiters[get_homepage(url)] = request_limiter
         async with request_limiter:
-            return await self.client.fetch(url)
+            return await _fetch(self.client, url, headers)
+
+    @property
+    def robots_cache(self) -> RobotsCache:
+        return self._robots_cache
+
+    def host_states(self) -> dict[str, dict]:
+        states = super().host_states()
+        for homepage, state in self.robots_cache.host_states().items():
+            states.setdefault(homepage, {}).update(state)
+        return states
+
+    def restore_host_states(self, states: Mapping[str, dict]) -> None:
+        super().restore_host_states(states)
+        self.robots_cache.restore_host_states(states)
 
     async def user_agent(self) -> str:
         return await super().user_agent() or "*"
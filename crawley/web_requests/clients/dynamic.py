@@ -1,11 +1,16 @@
 import asyncio
 import logging
+import re
+from collections.abc import Mapping, Callable, Awaitable
+from dataclasses import dataclass
+
 from playwright.async_api import (
     Page,
     Browser,
     Error,
     Response as PlaywrightResponse,
     BrowserContext,
+    Route,
 )
 
 from crawley.web_requests.clients.client import (
@@ -18,6 +23,49 @@ from crawley.web_requests.clients.client import (
 
 logger = logging.getLogger(__name__)
 
+# collects the links of a page, resolved against its base url by the browser
+_GET_LINKS = "Array.from(document.links, (link) => link.href)"
+
+
+def _mime_type(content_type: str | None) -> str | None:
+    """Gets the MIME type of a Content-Type header, without parameters such as its charset."""
+    if content_type is None:
+        return None
+    return content_type.split(";", 1)[0].strip().lower()
+
+
+@dataclass(frozen=True)
+class ResourcePolicy:
+    """
+    Defines which requests a page may make while it loads. Requests of a blocked resource type (see
+    playwright.async_api.Request.resource_type), or to a url matching a blocked pattern, are aborted.
+    """
+
+    resource_types: frozenset[str] = frozenset()
+    url_patterns: tuple[re.Pattern, ...] = ()
+
+    def blocks(self, resource_type: str, url: str) -> bool:
+        """Checks if a request is blocked."""
+        return resource_type in self.resource_types or any(
+            pattern.search(url) for pattern in self.url_patterns
+        )
+
+
+TRACKER_PATTERNS = tuple(
+    re.compile(pattern)
+    for pattern in (
+        r"^https?://([^/]+\.)?google-analytics\.com/",
+        r"^https?://([^/]+\.)?googletagmanager\.com/",
+        r"^https?://([^/]+\.)?doubleclick\.net/",
+        r"^https?://connect\.facebook\.net/",
+        r"^https?://([^/]+\.)?hotjar\.com/",
+    )
+)
+BLOCK_UNNEEDED = ResourcePolicy(
+    frozenset({"image", "media", "font", "stylesheet"}), TRACKER_PATTERNS
+)
+"""Blocks the resources that are not needed to find the links of a page: images, media, fonts, styles and trackers."""
+
 
 class PagePool(asyncio.Queue):
     """Defines a reusable pool of pages. Useful when a window is not needed for each request."""
@@ -45,29 +93,211 @@ class PagePool(asyncio.Queue):
             self.task_done()
 
 
+@dataclass
+class _PooledPage:
+    """The state of a page in a BrowserPool."""
+
+    context: BrowserContext
+    navigations: int = 0
+    crashed: bool = False
+
+
+class BrowserPool:
+    """
+    Defines a pool of pages spread across several browser contexts, so cookies and caches are not shared by every page.
+
+    At most size pages are in use at once; acquire waits for a free page. Pages are recycled (closed, and replaced
+    when needed) after max_navigations navigations, or once their JavaScript heap grows past max_heap, so long crawls
+    do not leak renderer memory. Pages that crash or are closed are replaced automatically.
+    """
+
+    def __init__(
+        self,
+        browser: Browser | BrowserContext,
+        size: int,
+        contexts: int = 1,
+        max_navigations: int = 100,
+        max_heap: int = None,
+        setup: Callable[[Page], Awaitable] = None,
+    ):
+        """
+        Creates an instance of BrowserPool.
+        :param browser: The browser that contexts are created in. If a context is given, every page is created in it.
+        :param size: The maximum amount of pages in use at once.
+        :param contexts: The amount of contexts that pages are spread across.
+        :param max_navigations: The amount of navigations after which a page is recycled.
+        :param max_heap: The size of the JavaScript heap of a page in bytes after which it is recycled. Only measured
+        in Chromium. Not measured by default.
+        :param setup: Called with each page when it is created, e.g. to intercept its requests.
+        """
+        if size < 1:
+            raise ValueError("size must be greater than 0")
+        if contexts < 1:
+            raise ValueError("contexts must be greater than 0")
+        if max_navigations < 1:
+            raise ValueError("max_navigations must be greater than 0")
+        self._browser = browser
+        self.size = size
+        self.max_navigations = max_navigations
+        self.max_heap = max_heap
+        self._setup = setup
+        self._context_count = contexts if isinstance(browser, Browser) else 1
+        self._contexts: dict[BrowserContext, int] = {}
+        self._context_lock = asyncio.Lock()
+        self._pages: dict[Page, _PooledPage] = {}
+        self._idle: list[Page] = []
+        self._slots = asyncio.Semaphore(size)
+
+    def __len__(self) -> int:
+        """Gets the amount of open pages in the pool."""
+        return len(self._pages)
+
+    async def acquire(self) -> Page:
+        """Gets an idle page, or creates one. Waits if size pages are in use."""
+        await self._slots.acquire()
+        try:
+            while self._idle:
+                page = self._idle.pop()
+                if self._is_usable(page):
+                    return page
+                await self._discard(page)
+            return await self._new_page()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def release(self, page: Page) -> None:
+        """Returns a page to the pool after a navigation, recycling it if it is worn out, crashed or closed."""
+        try:
+            state = self._pages.get(page)
+            if not state:
+                return
+            state.navigations += 1
+            if (
+                not self._is_usable(page)
+                or state.navigations >= self.max_navigations
+                or await self._heap_exceeded(page)
+            ):
+                await self._discard(page)
+            else:
+                self._idle.append(page)
+        finally:
+            self._slots.release()
+
+    async def close(self) -> None:
+        """Closes every page in the pool, and the contexts it created."""
+        self._idle.clear()
+        for page in list(self._pages):
+            await self._discard(page)
+        if isinstance(self._browser, Browser):
+            for context in self._contexts:
+                await context.close()
+        self._contexts.clear()
+
+    def _is_usable(self, page: Page) -> bool:
+        state = self._pages.get(page)
+        return bool(state and not state.crashed and not page.is_closed())
+
+    async def _heap_exceeded(self, page: Page) -> bool:
+        if self.max_heap is None:
+            return False
+        try:
+            heap = await page.evaluate(
+                "performance.memory ? performance.memory.usedJSHeapSize : 0"
+            )
+        except Error:
+            return True
+        return heap > self.max_heap
+
+    async def _new_page(self) -> Page:
+        context = await self._least_used_context()
+        self._contexts[context] += 1
+        try:
+            page = await context.new_page()
+        except BaseException:
+            self._contexts[context] -= 1
+            raise
+        self._pages[page] = _PooledPage(context)
+        page.on("crash", self._crashed)
+        if self._setup:
+            await self._setup(page)
+        return page
+
+    async def _least_used_context(self) -> BrowserContext:
+        async with self._context_lock:
+            if len(self._contexts) < self._context_count:
+                context = (
+                    await self._browser.new_context()
+                    if isinstance(self._browser, Browser)
+                    else self._browser
+                )
+                self._contexts[context] = 0
+                return context
+        return min(self._contexts, key=self._contexts.get)
+
+    def _crashed(self, page: Page):
+        state = self._pages.get(page)
+        if state:
+            state.crashed = True
+            logger.warning(f"Page crashed at {page.url}, replacing it")
+
+    async def _discard(self, page: Page):
+        state = self._pages.pop(page, None)
+        if state:
+            self._contexts[state.context] -= 1
+        if not page.is_closed():
+            try:
+                await page.close()
+            except Error as e:
+                logger.warning(e)
+
+
 class DynamicRequestClient(WebRequestClient):
     """Defines a WebRequestClient that automates a browser to render dynamic pages and gets web resources."""
 
     def __init__(
-        self, browser: Browser | BrowserContext, max_concurrent_requests: int = 2
+        self,
+        browser: Browser | BrowserContext,
+        max_concurrent_requests: int = 2,
+        resource_policy: ResourcePolicy = None,
+        extract_links: bool = False,
+        contexts: int = 1,
+        max_navigations: int = 100,
+        max_heap: int = None,
     ):
         """
         Creates an instance of DynamicRequestClient.
         :param browser: The browser that is automated to dynamically load webpages.
         :param max_concurrent_requests: The maximum amount of concurrent requests that the browser will make.
+        :param resource_policy: The requests that are aborted while a page loads, e.g. BLOCK_UNNEEDED. Nothing is
+        blocked by default.
+        :param extract_links: Whether the links of webpages are collected in the browser and returned as
+        Response.links, instead of their content. Saves serializing and reparsing the html of each webpage.
+        :param contexts: The amount of browser contexts that pages are spread across. Ignored if browser is a context.
+        :param max_navigations: The amount of navigations after which a page is recycled.
+        :param max_heap: The size of the JavaScript heap of a page in bytes after which it is recycled (Chromium only).
         """
         if max_concurrent_requests < 1:
             raise ValueError("max_concurrent_requests must be greater than 0")
         self._browser = browser
-        self._semaphore = asyncio.Semaphore(max_concurrent_requests)
-        self._pool = PagePool(browser, max_concurrent_requests)
+        self.resource_policy = resource_policy
+        self.extract_links = extract_links
+        # one page per concurrent request, so the pool limits concurrency
+        self._pool = BrowserPool(
+            browser,
+            max_concurrent_requests,
+            contexts,
+            max_navigations,
+            max_heap,
+            self._intercept if resource_policy else None,
+        )
 
         self._user_agent = None
         self._agent_lock = asyncio.Lock()
 
-    async def fetch(self, url: str) -> Response:
-        async with self._semaphore:
-            return await self._get_web_resource(url)
+    async def fetch(self, url: str, headers: Mapping[str, str] = None) -> Response:
+        # headers are not sent: pages are navigated to, and the browser manages its own cache
+        return await self._get_web_resource(url)
 
     async def _get_web_resource(self, url: str) -> Response:
         """
@@ -75,11 +305,20 @@ class DynamicRequestClient(WebRequestClient):
         :param url: The url of the web resource.
         :return: The response from the request for the web resource.
         """
-        page = await self._pool.get()
+        page = await self._pool.acquire()
         try:
             response = await page.goto(url)
-            fetch_result = FetchResult(response.request.method, url, response.status)
+            fetch_result = FetchResult(
+                response.request.method, url, response.status, response.headers
+            )
             logger.info(fetch_result)
+            content_type = _mime_type(response.headers.get("content-type"))
+            if self.extract_links and _is_webpage(content_type):
+                return Response(
+                    fetch_result,
+                    WebResource(content_type, ""),
+                    await page.evaluate(_GET_LINKS),
+                )
             return Response(
                 fetch_result, await DynamicRequestClient._get_content(response, page)
             )
@@ -87,12 +326,23 @@ class DynamicRequestClient(WebRequestClient):
             logger.error(e)
             raise e
         finally:
-            self._pool.task_done()
-            self._pool.put_nowait(page)
+            await self._pool.release(page)
+
+    async def _intercept(self, page: Page):
+        """Aborts the requests of a page that the resource policy blocks."""
+
+        async def handle(route: Route):
+            request = route.request
+            if self.resource_policy.blocks(request.resource_type, request.url):
+                await route.abort()
+            else:
+                await route.continue_()
+
+        await page.route("**/*", handle)
 
     @staticmethod
     async def _get_content(response: PlaywrightResponse, page: Page) -> WebResource:
-        content_type = response.headers.get("content-type")
+        content_type = _mime_type(response.headers.get("content-type"))
         if _is_webpage(content_type):
             return WebResource(
                 content_type, await DynamicRequestClient._get_content_with_retry(page)
@@ -121,5 +371,5 @@ class DynamicRequestClient(WebRequestClient):
             return self._user_agent
 
     async def close(self) -> None:
-        self._pool.clear()
+        await self._pool.close()
         return await self._browser.close()
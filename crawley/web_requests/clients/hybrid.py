@@ -0,0 +1,209 @@
+import logging
+import re
+from collections.abc import Mapping
+from dataclasses import dataclass
+from enum import Enum
+from urllib.parse import urlsplit
+
+from playwright.async_api import Error
+
+from crawley.web_requests.clients.client import (
+    WebRequestClient,
+    Response,
+    _is_webpage,
+    _fetch,
+)
+
+logger = logging.getLogger(__name__)
+
+_LINK = re.compile(rb"<a\s[^>]*?href\s*=", re.IGNORECASE)
+# an element that a single-page app mounts into, left empty until scripts run
+_EMPTY_ROOT = re.compile(
+    rb"""<(?:div|main|section|app-root)\b[^>]*?\bid\s*=\s*["']?(?:root|app|__next|__nuxt|svelte)\b[^>]*>\s*</""",
+    re.IGNORECASE,
+)
+_NOSCRIPT_HINT = re.compile(
+    rb"<noscript\b[^>]*>(?:(?!</noscript).){0,500}?javascript",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def count_links(content: str | bytes) -> int:
+    """Counts the anchors with a href in a webpage."""
+    if isinstance(content, str):
+        content = content.encode(errors="ignore")
+    return sum(1 for _ in _LINK.finditer(content))
+
+
+def _count_links(response: Response) -> int:
+    if response.links is not None:
+        return len(response.links)
+    return count_links(response.web_resource.content)
+
+
+def needs_rendering(content: str | bytes, min_links: int = 3) -> bool:
+    """
+    Checks if a static webpage looks like it needs a browser to expose its links. Cheap enough to run on every page.
+    :param content: The content of the webpage.
+    :param min_links: The amount of links below which a webpage needs rendering.
+    :return: True if the webpage has an empty single-page app root, a noscript hint asking for JavaScript, or fewer
+    than min_links links.
+    """
+    if isinstance(content, str):
+        content = content.encode(errors="ignore")
+    return bool(
+        _EMPTY_ROOT.search(content)
+        or _NOSCRIPT_HINT.search(content)
+        or count_links(content) < min_links
+    )
+
+
+class RenderMode(Enum):
+    """The way the webpages of a host are fetched."""
+
+    STATIC = "static"
+    DYNAMIC = "dynamic"
+
+
+@dataclass
+class RenderStats:
+    """The amount of responses a HybridRequestClient fetched statically, and rendered with the browser."""
+
+    static: int = 0
+    dynamic: int = 0
+
+
+@dataclass
+class _HostHistory:
+    """How often rendering the webpages of a host exposed more links than fetching them statically."""
+
+    name: str
+    static: int = 0
+    dynamic: int = 0
+    mode: RenderMode | None = None
+
+
+class HybridRequestClient(WebRequestClient):
+    """
+    Defines a WebRequestClient that fetches webpages statically, and only renders them with a browser when needed.
+
+    Each webpage is fetched with the static client first. If it looks like it needs JavaScript (see needs_rendering),
+    it is rendered with the dynamic client, and whichever response has more links is returned. Once learn_after
+    webpages of a host have been checked, the host is fetched in the mode that worked for at least threshold of them:
+    always rendered, or always static. Hosts with mixed results keep being checked page by page.
+    """
+
+    def __init__(
+        self,
+        static_client: WebRequestClient,
+        dynamic_client: WebRequestClient,
+        min_links: int = 3,
+        learn_after: int = 10,
+        threshold: float = 0.8,
+    ):
+        """
+        Creates an instance of HybridRequestClient.
+        :param static_client: The client that fetches webpages without rendering them, e.g. StaticRequestClient.
+        :param dynamic_client: The client that renders webpages with a browser, e.g. DynamicRequestClient.
+        :param min_links: The amount of links below which a static webpage is rendered.
+        :param learn_after: The amount of webpages of a host that are checked before its mode is decided.
+        :param threshold: The share of checked webpages a mode must have worked for to be used for a host.
+        """
+        if learn_after < 1:
+            raise ValueError("learn_after must be greater than 0")
+        if not 0.5 < threshold <= 1:
+            raise ValueError("threshold must be greater than 0.5 and at most 1")
+        self.static_client = static_client
+        self.dynamic_client = dynamic_client
+        self.min_links = min_links
+        self.learn_after = learn_after
+        self.threshold = threshold
+        self.stats = RenderStats()
+        self._hosts: dict[str, _HostHistory] = {}
+
+    def mode(self, url: str) -> RenderMode | None:
+        """Gets the mode the host of a url is fetched in. None if it has not been decided."""
+        host = self._hosts.get(urlsplit(url).netloc)
+        return host.mode if host else None
+
+    async def fetch(self, url: str, headers: Mapping[str, str] = None) -> Response:
+        netloc = urlsplit(url).netloc
+        host = self._hosts.setdefault(netloc, _HostHistory(netloc))
+        if host.mode is RenderMode.DYNAMIC:
+            return await self._render(url, headers)
+
+        response = await _fetch(self.static_client, url, headers)
+        if (
+            host.mode is RenderMode.STATIC
+            or not response.is_parsable
+            or not _is_webpage(response.web_resource.content_type)
+            or not self._needs_rendering(response)
+        ):
+            if (
+                host.mode is None
+                and response.is_parsable
+                and _is_webpage(response.web_resource.content_type)
+            ):
+                # only webpages show whether a host needs rendering
+                self._learn(host, RenderMode.STATIC)
+            self.stats.static += 1
+            return response
+
+        try:
+            rendered = await self._render(url, headers)
+        except Error:
+            # the browser failed, but the static webpage is still usable
+            self.stats.static += 1
+            return response
+        if rendered.is_parsable and _count_links(rendered) > _count_links(response):
+            self._learn(host, RenderMode.DYNAMIC)
+            return rendered
+        self._learn(host, RenderMode.STATIC)
+        return response
+
+    def _needs_rendering(self, response: Response) -> bool:
+        if response.links is not None:
+            # the links were extracted while fetching and the body was not kept, so only the links can be checked
+            return len(response.links) < self.min_links
+        return needs_rendering(response.web_resource.content, self.min_links)
+
+    async def _render(self, url: str, headers: Mapping[str, str] | None) -> Response:
+        response = await _fetch(self.dynamic_client, url, headers)
+        self.stats.dynamic += 1
+        return response
+
+    def _learn(self, host: _HostHistory, worked: RenderMode):
+        """Records the mode that worked for a webpage, deciding the mode of its host once enough are checked."""
+        if worked is RenderMode.DYNAMIC:
+            host.dynamic += 1
+        else:
+            host.static += 1
+        checked = host.static + host.dynamic
+        if host.mode is None and checked >= self.learn_after:
+            if host.dynamic >= self.threshold * checked:
+                host.mode = RenderMode.DYNAMIC
+            elif host.static >= self.threshold * checked:
+                host.mode = RenderMode.STATIC
+            if host.mode:
+                logger.info(f"Fetching {host.name} in {host.mode.value} mode")
+
+    @property
+    def robots_cache(self):
+        return self.static_client.robots_cache
+
+    def host_states(self) -> dict[str, dict]:
+        states = self.static_client.host_states()
+        for homepage, state in self.dynamic_client.host_states().items():
+            states.setdefault(homepage, {}).update(state)
+        return states
+
+    def restore_host_states(self, states: Mapping[str, dict]) -> None:
+        self.static_client.restore_host_states(states)
+        self.dynamic_client.restore_host_states(states)
+
+    async def user_agent(self) -> str | None:
+        return await self.static_client.user_agent()
+
+    async def close(self) -> None:
+        await self.static_client.close()
+        await self.dynamic_client.close()
@@ -1,50 +1,317 @@
 import logging
-from aiohttp import ClientSession, ClientResponseError, ClientError, ClientResponse
+import time
+from collections.abc import Mapping, Callable, Awaitable, AsyncIterator
+from dataclasses import dataclass
+from urllib.parse import urljoin
 
+from aiohttp import (
+    ClientSession,
+    ClientResponseError,
+    ClientError,
+    ClientResponse,
+    ClientTimeout,
+    TCPConnector,
+)
+from aiohttp.abc import AbstractResolver
+
+from crawley.metrics import CrawlMetrics, host_of
 from crawley.web_requests.clients.client import (
     WebRequestClient,
     FetchResult,
     WebResource,
     Response,
     _is_webpage,
+    sniff_encoding,
 )
 
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
 logger = logging.getLogger(__name__)
 
+MEGABYTE = 1024 * 1024
+DEFAULT_MAX_SIZES: Mapping[str, int | None] = {
+    "text/html": 10 * MEGABYTE,
+    # sitemaps, which are at most 50MB uncompressed
+    "application/xml": 50 * MEGABYTE,
+    "text/xml": 50 * MEGABYTE,
+    "text/plain": 50 * MEGABYTE,
+    "application/gzip": 50 * MEGABYTE,
+    "application/x-gzip": 50 * MEGABYTE,
+    "*": MEGABYTE,
+}
+"""
+The maximum body sizes of StaticRequestClient, so an endless or huge body cannot exhaust memory. Webpages, sitemaps
+and robots.txt files are read, while other files (images, videos, archives...) are abandoned once they are larger
+than a megabyte.
+"""
+
+_CHUNK_SIZE = 64 * 1024
+
+ResourceSink = Callable[[FetchResult, AsyncIterator[bytes]], Awaitable]
+
+
+class _LinkParser:
+    """Defines an lxml parser target that collects the absolute urls of links as the chunks of a webpage are fed."""
+
+    def __init__(self, url: str, declared: str = None):
+        self.base_url = url
+        self.links: list[str] = []
+        self.declared = declared
+        self.encoding: str | None = None
+        self._parser = None
+        self._failed = False
+        # the start of the webpage, held until a <meta> charset would have been found in it
+        self._start = bytearray()
+
+    def start(self, tag: str, attrib: dict):
+        href = attrib.get("href")
+        if href is None:
+            return
+        if tag == "a":
+            self.links.append(urljoin(self.base_url, href.strip()))
+        elif tag == "base":
+            self.base_url = urljoin(self.base_url, href.strip())
+
+    def feed(self, chunk: bytes):
+        if self._failed:
+            return
+        if self._parser is None:
+            # a byte order mark or <meta> charset is in the first kilobyte, which chunks can split
+            self._start += chunk
+            if len(self._start) < 1024:
+                return
+            chunk = self._create_parser()
+        try:
+            self._parser.feed(chunk)
+        except etree.LxmlError:
+            # the links found so far are kept
+            self._failed = True
+
+    def _create_parser(self) -> bytes:
+        """Creates the parser in the encoding sniffed from the start of the webpage, which is returned to be fed."""
+        start, self._start = bytes(self._start), bytearray()
+        self.encoding = sniff_encoding(start, self.declared)
+        try:
+            self._parser = etree.HTMLParser(target=self, encoding=self.encoding)
+        except LookupError:
+            # an encoding lxml does not know, so it detects one instead
+            self._parser = etree.HTMLParser(target=self)
+        return start
+
+    def close(self) -> list[str]:
+        if self._parser is None and self._start:
+            # a webpage smaller than a kilobyte
+            self.feed(self._create_parser())
+        if self._parser and not self._failed:
+            try:
+                self._parser.close()
+            except etree.LxmlError:
+                pass
+        return self.links
+
+
+@dataclass
+class PoolStats:
+    """The connections to a host in a connection pool."""
+
+    acquired: int = 0
+    idle: int = 0
+
+    @property
+    def open(self) -> int:
+        """Gets the amount of open connections, whether they are in use or idle."""
+        return self.acquired + self.idle
+
 
 class StaticRequestClient(WebRequestClient):
-    """Defines a WebRequestClient that gets static webpages and web resources."""
+    """
+    Defines a WebRequestClient that gets static webpages and web resources. Content is kept as the bytes it was sent
+    as, along with its declared or sniffed encoding, so it is only decoded by whatever parses it.
+    """
 
-    def __init__(self, session: ClientSession = None):
-        self._session = session or ClientSession()
+    def __init__(
+        self,
+        session: ClientSession = None,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        keepalive_timeout: float = 15,
+        dns_ttl: float | None = 10,
+        resolver: AbstractResolver = None,
+        connect_timeout: float | None = 30,
+        read_timeout: float | None = None,
+        total_timeout: float | None = 300,
+        metrics: CrawlMetrics = None,
+        max_sizes: Mapping[str, int | None] = DEFAULT_MAX_SIZES,
+        resource_sink: ResourceSink = None,
+        stream_links: bool = False,
+    ):
+        """
+        Creates an instance of StaticRequestClient. The connection options are ignored if a session is given.
+        :param session: The session that makes the requests. A session with the connection options by default.
+        :param limit: The maximum amount of open connections. 0 for no limit.
+        :param limit_per_host: The maximum amount of open connections to a host. 0 for no limit.
+        :param keepalive_timeout: The amount of seconds an idle connection is kept open for reuse.
+        :param dns_ttl: The amount of seconds DNS lookups are cached by the session. None to cache them forever.
+        :param resolver: The resolver of DNS lookups, e.g. a CachingResolver shared by several clients.
+        :param connect_timeout: The amount of seconds to wait for a connection. None to wait forever.
+        :param read_timeout: The amount of seconds to wait for data from a connection. None to wait forever.
+        :param total_timeout: The amount of seconds a request can take in total. None to wait forever.
+        :param metrics: Where the timings (dns, connect, ttfb, body), statuses and bytes of requests are
+        recorded. The dns, connect and ttfb timings need the session's trace config, so add metrics.trace_config() to
+        the trace_configs of a given session.
+        :param max_sizes: The maximum body size in bytes of each content type ("text/html"), main type ("image/*") or
+        any type ("*"). Bodies are abandoned as soon as they are known to be larger, and their content is empty. A
+        size of 0 skips the bodies of a content type, e.g. {"text/html": ..., "*": 0} only downloads webpages (keep
+        the types of sitemaps and robots.txt if they are fetched with the client). None for no maximum.
+        :param resource_sink: A coroutine function that is awaited with the fetch result and the chunks of each
+        skipped body, e.g. to save files to disk without keeping them in memory.
+        :param stream_links: Whether the links of webpages are extracted as their bodies arrive, and returned as
+        Response.links. The content of webpages is then not kept, so memory stays flat however large they are.
+        """
+        if stream_links and etree is None:
+            raise ValueError("stream_links requires lxml")
+        self.metrics = metrics
+        self.max_sizes = max_sizes
+        self.resource_sink = resource_sink
+        self.stream_links = stream_links
+        self._session = session or ClientSession(
+            connector=TCPConnector(
+                limit=limit,
+                limit_per_host=limit_per_host,
+                keepalive_timeout=keepalive_timeout,
+                ttl_dns_cache=dns_ttl,
+                resolver=resolver,
+            ),
+            timeout=ClientTimeout(
+                total=total_timeout,
+                sock_connect=connect_timeout,
+                sock_read=read_timeout,
+            ),
+            trace_configs=[metrics.trace_config()] if metrics else None,
+        )
 
-    async def fetch(self, url: str) -> Response:
+    async def fetch(self, url: str, headers: Mapping[str, str] = None) -> Response:
         try:
-            async with self._session.get(url, raise_for_status=True) as response:
-                fetch_result = FetchResult(response.method, url, response.status)
-                logger.info(fetch_result)
-                return Response(
-                    fetch_result, await StaticRequestClient._get_content(response)
+            async with self._session.get(
+                url, headers=headers, raise_for_status=True
+            ) as response:
+                fetch_result = FetchResult(
+                    response.method, url, response.status, response.headers
                 )
+                logger.info(fetch_result)
+                return await self._get_response(response, fetch_result)
         except ClientResponseError as e:
-            fetch_result = FetchResult(e.request_info.method, url, e.status)
+            fetch_result = FetchResult(e.request_info.method, url, e.status, e.headers)
             logger.warning(fetch_result)
+            if self.metrics:
+                self.metrics.count(f"status_{e.status // 100}xx", host_of(url))
             return Response(fetch_result, None)
-        except (ClientError, UnicodeDecodeError) as e:
+        except ClientError as e:
             logger.error(e)
             raise e
 
-    @staticmethod
-    async def _get_content(response: ClientResponse) -> WebResource:
+    def max_size(self, content_type: str) -> int | None:
+        """
+        Gets the maximum body size of a content type, from the most specific entry of max_sizes: the content type,
+        then its main type ("text/*"), then "*".
+        :param content_type: The content type of a response.
+        :return: The maximum size in bytes. 0 if bodies of the content type are not read, None if there is no maximum.
+        """
+        for key in (content_type, f"{content_type.split('/')[0]}/*", "*"):
+            if key in self.max_sizes:
+                return self.max_sizes[key]
+        return None
+
+    async def _get_response(
+        self, response: ClientResponse, fetch_result: FetchResult
+    ) -> Response:
+        """
+        Reads the body of a response within its content type's maximum size, extracting the links of webpages as the
+        body arrives if stream_links is enabled.
+        """
         content_type = response.content_type
-        return WebResource(
-            content_type,
-            (
-                await response.text()
-                if _is_webpage(content_type)
-                else await response.read()
-            ),
+        max_size = self.max_size(content_type)
+        if max_size == 0:
+            if self.resource_sink:
+                await self.resource_sink(
+                    fetch_result, response.content.iter_chunked(_CHUNK_SIZE)
+                )
+            return Response(fetch_result, WebResource(content_type, b""))
+
+        links = (
+            _LinkParser(str(response.url), response.charset)
+            if self.stream_links and _is_webpage(content_type)
+            else None
         )
+        start = time.perf_counter()
+        read = await self._read(response, max_size, links)
+        if read is None:
+            logger.warning(f"{fetch_result.url} is larger than {max_size} bytes")
+            # the rest of the body is not downloaded, so the connection cannot be reused
+            response.close()
+            return Response(fetch_result, WebResource(content_type, b""))
+        downloaded, (body, size) = time.perf_counter(), read
+        if links:
+            # the links were extracted as the body arrived, so it does not need to be kept
+            parser, links = links, links.close()
+            web_resource = WebResource(content_type, b"", parser.encoding)
+        else:
+            # the body is kept as it is, and only decoded by whatever parses it
+            web_resource = WebResource(
+                content_type, body, sniff_encoding(body, response.charset)
+            )
+        if self.metrics:
+            host = host_of(fetch_result.url)
+            self.metrics.observe("body", downloaded - start, host)
+            self.metrics.count(f"status_{response.status // 100}xx", host)
+            self.metrics.count("bytes", host, size)
+        return Response(fetch_result, web_resource, links)
+
+    @staticmethod
+    async def _read(
+        response: ClientResponse, max_size: int | None, links: "_LinkParser" = None
+    ) -> tuple[bytes, int] | None:
+        """
+        Reads a body in chunks, aborting as soon as it is known to be too large.
+        :param response: The response of the body.
+        :param max_size: The maximum size of the body in bytes. None if there is no maximum.
+        :param links: A parser that the chunks are fed to instead of being kept.
+        :return: The body (empty if links is given) and its size, or None if it is larger than max_size.
+        """
+        if max_size is not None and (response.content_length or 0) > max_size:
+            return None
+        chunks, size = [], 0
+        async for chunk in response.content.iter_chunked(_CHUNK_SIZE):
+            size += len(chunk)
+            if max_size is not None and size > max_size:
+                return None
+            if links:
+                links.feed(chunk)
+            else:
+                chunks.append(chunk)
+        return b"".join(chunks), size
+
+    def pool_stats(self) -> dict[str, PoolStats]:
+        """
+        Gets the connections of the session's connection pool.
+        :return: The connections to each host ("host:port") that has an open connection.
+        """
+        connector = self._session.connector
+        stats: dict[str, PoolStats] = {}
+        # aiohttp does not expose its pool, so its attributes are read directly
+        for key, connections in getattr(connector, "_conns", {}).items():
+            stats.setdefault(f"{key.host}:{key.port}", PoolStats()).idle += len(
+                connections
+            )
+        for key, connections in getattr(connector, "_acquired_per_host", {}).items():
+            if connections:
+                stats.setdefault(f"{key.host}:{key.port}", PoolStats()).acquired += len(
+                    connections
+                )
+        return stats
 
     async def user_agent(self) -> str | None:
         return self._session.headers.get("User-Agent")
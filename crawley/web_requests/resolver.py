@@ -0,0 +1,77 @@
+import asyncio
+import socket
+import time
+from collections import OrderedDict
+
+from aiohttp.abc import AbstractResolver, ResolveResult
+from aiohttp.resolver import DefaultResolver
+
+
+class CachingResolver(AbstractResolver):
+    """
+    Defines a DNS resolver that caches lookups for ttl seconds. One resolver can be shared by the connectors of several
+    clients, so a host is only looked up once however many clients request it. Concurrent lookups of the same host are
+    made once, and failed lookups are not cached.
+    """
+
+    def __init__(
+        self,
+        resolver: AbstractResolver = None,
+        ttl: float = 300,
+        max_size: int = 10_000,
+    ):
+        """
+        Creates an instance of CachingResolver.
+        :param resolver: The resolver that makes the lookups. aiohttp's default resolver by default.
+        :param ttl: The amount of seconds a lookup is cached for.
+        :param max_size: The maximum amount of cached lookups. The least recently used lookups are evicted.
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be greater than 0")
+        self._resolver = resolver
+        self.ttl = ttl
+        self.max_size = max_size
+        self._cache: OrderedDict[tuple, tuple[float, list[ResolveResult]]] = (
+            OrderedDict()
+        )
+        self._lookups: dict[tuple, asyncio.Task] = {}
+
+    async def resolve(
+        self, host: str, port: int = 0, family: socket.AddressFamily = socket.AF_INET
+    ) -> list[ResolveResult]:
+        key = (host, port, family)
+        cached = self._cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            self._cache.move_to_end(key)
+            return cached[1]
+        lookup = self._lookups.get(key)
+        if lookup is None:
+            lookup = self._lookups[key] = asyncio.create_task(
+                self._lookup(key, host, port, family)
+            )
+        # shielded, so a cancelled request does not cancel the lookup of the requests waiting on it
+        return await asyncio.shield(lookup)
+
+    async def _lookup(
+        self, key: tuple, host: str, port: int, family: socket.AddressFamily
+    ) -> list[ResolveResult]:
+        try:
+            if self._resolver is None:
+                # created on first use, since it is bound to the running event loop
+                self._resolver = DefaultResolver()
+            results = await self._resolver.resolve(host, port, family)
+        finally:
+            del self._lookups[key]
+        self._cache[key] = (time.monotonic() + self.ttl, results)
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+        return results
+
+    def clear(self) -> None:
+        """Clears the cached lookups."""
+        self._cache.clear()
+
+    async def close(self) -> None:
+        if self._resolver:
+            await self._resolver.close()
@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from dataclasses import dataclass
+from urllib.robotparser import RobotFileParser
+
+from crawley.url import get_homepage
+from crawley.web_requests.clients.client import (
+    WebRequestClient,
+    Response,
+    fetch_retrying,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _decode(content: str | bytes) -> str:
+    """Decodes the content of a robots.txt file, tolerating invalid bytes."""
+    if isinstance(content, bytes):
+        return content.decode("utf-8", errors="replace")
+    return content
+
+
+def _create_parser(
+    url: str, allow_all: bool = False, disallow_all: bool = False
+) -> RobotFileParser:
+    """Creates a robots.txt parser that is already marked as read."""
+    parser = RobotFileParser(url)
+    parser.allow_all, parser.disallow_all = allow_all, disallow_all
+    parser.modified()
+    return parser
+
+
+@dataclass
+class _RobotsEntry:
+    """A cached robots.txt parser, with the content it was parsed from so it can be saved."""
+
+    parser: RobotFileParser
+    expires_at: float
+    content: str | None = None
+
+
+class RobotsCache:
+    """
+    Defines an asynchronous, bounded cache of robots.txt parsers. Parsers are keyed by homepage, so robots.txt is
+    fetched once per host rather than once per request.
+    """
+
+    def __init__(
+        self,
+        client: WebRequestClient,
+        ttl: float = 86400,
+        maxsize: int = 10000,
+        error_ttl: float = None,
+        allow_on_client_error: bool = True,
+        allow_on_server_error: bool = False,
+    ):
+        """
+        Creates an instance of RobotsCache.
+        :param client: The client that is used to fetch robots.txt files.
+        :param ttl: The amount of seconds a fetched robots.txt file is cached for.
+        :param maxsize: The maximum amount of hosts to cache. The least recently used host is evicted first.
+        :param error_ttl: The amount of seconds a failed robots.txt fetch is cached for. Defaults to ttl.
+        :param allow_on_client_error: Whether a 4xx robots.txt response allows (or disallows) all requests.
+        :param allow_on_server_error: Whether a 5xx or unreachable robots.txt allows (or disallows) all requests.
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be greater than 0")
+        self._client = client
+        self.ttl = ttl
+        self.error_ttl = ttl if error_ttl is None else error_ttl
+        self.maxsize = maxsize
+        self.allow_on_client_error = allow_on_client_error
+        self.allow_on_server_error = allow_on_server_error
+        self._parsers: OrderedDict[str, _RobotsEntry] = OrderedDict()
+        self._pending: dict[str, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._parsers)
+
+    def __contains__(self, url: str) -> bool:
+        return self._get_cached(get_homepage(url)) is not None
+
+    async def get(self, url: str) -> RobotFileParser:
+        """
+        Gets the robots.txt parser of a website. Concurrent lookups for the same host share a single fetch.
+        :param url: Any url belonging to a certain website.
+        :return: The robots.txt parser of the website.
+        """
+        homepage = get_homepage(url)
+        parser = self._get_cached(homepage)
+        if parser is not None:
+            return parser
+        task = self._pending.get(homepage)
+        if not task:
+            task = asyncio.create_task(self._load(homepage))
+            self._pending[homepage] = task
+            task.add_done_callback(lambda _: self._pending.pop(homepage, None))
+        # shielded so one cancelled caller does not cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    def _get_cached(self, homepage: str) -> RobotFileParser | None:
+        """Gets a cached parser if it has not expired, marking it as recently used."""
+        entry = self._parsers.get(homepage)
+        if not entry:
+            return None
+        if entry.expires_at <= time.monotonic():
+            del self._parsers[homepage]
+            return None
+        self._parsers.move_to_end(homepage)
+        return entry.parser
+
+    def _store(self, homepage: str, entry: _RobotsEntry):
+        """Stores a parser, evicting the least recently used parsers if the cache is full."""
+        self._parsers[homepage] = entry
+        self._parsers.move_to_end(homepage)
+        while len(self._parsers) > self.maxsize:
+            self._parsers.popitem(last=False)
+
+    async def _load(self, homepage: str) -> RobotFileParser:
+        """
+        Fetches and parses the robots.txt file of a website, then stores it in the cache. Transient failures are
+        retried, so they are not cached as if the website were unreachable.
+        :param homepage: The homepage of the website.
+        :return: The robots.txt parser of the website.
+        """
+        robots_url = f"{homepage}robots.txt"
+        try:
+            response = await fetch_retrying(self._client, robots_url)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Could not fetch {robots_url}: {e}")
+            response = None
+        entry = self._parse(robots_url, response)
+        self._store(homepage, entry)
+        return entry.parser
+
+    def _parse(self, robots_url: str, response: Response | None) -> _RobotsEntry:
+        """
+        Creates a parser from a robots.txt response.
+        :param robots_url: The url of the robots.txt file.
+        :param response: The response of the robots.txt request. None if the website was unreachable.
+        :return: The parser, cached for the ttl of the response.
+        """
+        now = time.monotonic()
+        status = response.fetch.status if response else None
+        if status is None or status >= 500:
+            allow = self.allow_on_server_error
+            parser = _create_parser(robots_url, allow, not allow)
+            return _RobotsEntry(parser, now + self.error_ttl)
+        if status >= 400:
+            allow = self.allow_on_client_error
+            parser = _create_parser(robots_url, allow, not allow)
+            return _RobotsEntry(parser, now + self.error_ttl)
+        parser, content = _create_parser(robots_url), None
+        if response.web_resource and response.web_resource.content:
+            content = _decode(response.web_resource.content)
+            parser.parse(content.splitlines())
+        return _RobotsEntry(parser, now + self.ttl, content)
+
+    def host_states(self) -> dict[str, dict]:
+        """
+        Gets the cached robots.txt files, so they can be saved in a checkpoint rather than fetched again.
+        :return: The robots.txt file of each host, keyed by homepage.
+        """
+        # the monotonic clock does not survive a restart, so expiry is saved as a wall clock time
+        wall_offset = time.time() - time.monotonic()
+        return {
+            homepage: {
+                "robots": {
+                    "content": entry.content,
+                    "allow_all": entry.parser.allow_all,
+                    "disallow_all": entry.parser.disallow_all,
+                    "expires_at": entry.expires_at + wall_offset,
+                }
+            }
+            for homepage, entry in self._parsers.items()
+        }
+
+    def restore_host_states(self, states: Mapping[str, dict]) -> None:
+        """
+        Restores the robots.txt files saved with host_states. Files that have expired since are fetched again.
+        :param states: The state of each host, keyed by homepage.
+        """
+        now = time.monotonic()
+        wall_offset = time.time() - now
+        for homepage, state in states.items():
+            robots = state.get("robots")
+            if not robots:
+                continue
+            expires_at = robots["expires_at"] - wall_offset
+            if expires_at <= now:
+                continue
+            parser = _create_parser(
+                f"{homepage}robots.txt", robots["allow_all"], robots["disallow_all"]
+            )
+            if robots["content"]:
+                parser.parse(robots["content"].splitlines())
+            self._store(homepage, _RobotsEntry(parser, expires_at, robots["content"]))
+
+    def clear(self):
+        """Clears the cache of all parsers."""
+        self._parsers.clear()
@@ -1,13 +1,19 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from unittest import IsolatedAsyncioTestCase
 from unittest.mock import AsyncMock, patch, MagicMock
 
+from crawley import CrawlMetrics
+from crawley.crawling import ResultSink, FingerprintSet, HostScheduler
 from crawley.crawling.crawlers.algorithms.breadth import BreadthCrawl, BreadthCrawlType
 from crawley.web_requests import Response, FetchResult, WebResource
 
 
-async def mock_fetch_generator(urls):
-    yield Response(
-        FetchResult("", "", 200), WebResource("", "content") if urls[0] else None
+async def mock_fetch(url):
+    return Response(
+        FetchResult("", url, 200), WebResource("", "content") if url else None
     )
 
 
@@ -17,7 +23,7 @@ class TestBreadthCrawl(IsolatedAsyncioTestCase):
     )  # mock where used, not where defined
     async def test_crawl(self, absolute_urls: MagicMock):
         client = AsyncMock()
-        client.fetch_multiple = mock_fetch_generator
+        client.fetch = mock_fetch
 
         with self.subTest("Should return an empty set if no urls are found"):
             self.assertFalse(
@@ -47,3 +53,161 @@ class TestBreadthCrawl(IsolatedAsyncioTestCase):
             self.assertFalse(
                 await crawl.execute(["url"], 3, target=BreadthCrawlType.PAGES)
             )
+
+        with self.subTest("Should keep the visited urls in a set by default"):
+            self.assertEqual(crawl.visited_urls, {"url", "2"})
+
+        with self.subTest("Should not revisit a url found by a FingerprintSet"):
+            crawl = BreadthCrawl(client, FingerprintSet())
+            await crawl.execute(["url"], 3, target=BreadthCrawlType.PAGES)
+            self.assertIn("2", crawl.visited_urls)
+            self.assertFalse(
+                await crawl.execute(["url"], 3, target=BreadthCrawlType.PAGES)
+            )
+
+        with self.subTest("Should stream urls to a result sink"):
+            absolute_urls.return_value = ["1", "2"]
+            streamed = []
+            results = await BreadthCrawl(client).execute(
+                ["url"],
+                3,
+                target=BreadthCrawlType.PAGES,
+                results=ResultSink(streamed.append),
+            )
+            self.assertEqual(len(results), 2)
+            self.assertEqual(sorted(streamed), ["1", "2"])
+
+    @patch("crawley.crawling.crawlers.algorithms.breadth.get_absolute_urls")
+    async def test_continuous_crawl(self, absolute_urls: MagicMock):
+        links = {"seed": ["slow", "a"], "a": ["b"], "b": ["c"], "c": ["d"]}
+        absolute_urls.side_effect = lambda url, content: links.get(url, [])
+
+        async def fetch(url):
+            if url == "slow":
+                await asyncio.sleep(1)
+            return await mock_fetch(url)
+
+        client = AsyncMock()
+        client.fetch = fetch
+        sitemap_cache = AsyncMock()
+        sitemap_cache.get_urls.return_value = []
+
+        with self.subTest("Should not wait for slow fetches to crawl deeper urls"):
+            start_time = time.time()
+            urls = await BreadthCrawl(client, sitemap_cache=sitemap_cache).execute(
+                ["seed"], 5, workers=2
+            )
+            self.assertLess(time.time() - start_time, 0.5)
+            self.assertEqual(urls, {"slow", "a", "b", "c", "d"})
+
+        with self.subTest("Should crawl until the frontier is exhausted"):
+            links["slow"] = ["e"]
+            urls = await BreadthCrawl(client, sitemap_cache=sitemap_cache).execute(
+                ["seed"], workers=3
+            )
+            self.assertEqual(urls, {"slow", "a", "b", "c", "d", "e"})
+
+    @patch("crawley.crawling.crawlers.algorithms.breadth.get_absolute_urls")
+    async def test_parse_executor(self, absolute_urls: MagicMock):
+        parse_threads = set()
+
+        def parse(url, content):
+            parse_threads.add(threading.get_ident())
+            return {"1", "2"}
+
+        absolute_urls.side_effect = parse
+        client = AsyncMock()
+        client.fetch = mock_fetch
+
+        with ThreadPoolExecutor(2) as executor:
+            urls = await BreadthCrawl(
+                client, parse_executor=executor, max_pending_parses=1
+            ).execute(["url"], 3, target=BreadthCrawlType.PAGES)
+
+        with self.subTest("Should parse webpages in the parse executor"):
+            self.assertNotIn(threading.get_ident(), parse_threads)
+            self.assertEqual(urls, {"1", "2"})
+
+    @patch("crawley.crawling.crawlers.algorithms.breadth.get_absolute_urls")
+    async def test_host_scheduler(self, absolute_urls: MagicMock):
+        active, most_active = {}, {}
+
+        async def fetch(url):
+            host = url.split("/")[2]
+            active[host] = active.get(host, 0) + 1
+            most_active[host] = max(most_active.get(host, 0), active[host])
+            await asyncio.sleep(0.01)
+            active[host] -= 1
+            return await mock_fetch(url)
+
+        absolute_urls.side_effect = lambda url, content: (
+            [f"http://big.com/{i}" for i in range(20)] + ["http://small.com/"]
+            if url == "http://seed.com/"
+            else []
+        )
+        client = AsyncMock()
+        client.fetch = fetch
+        start = time.perf_counter()
+        urls = await BreadthCrawl(client).execute(
+            ["http://seed.com/"],
+            target=BreadthCrawlType.PAGES,
+            workers=10,
+            frontier=HostScheduler(max_per_host=2, min_interval=0.005),
+        )
+
+        with self.subTest("Should crawl every url"):
+            self.assertEqual(len(urls), 21)
+
+        with self.subTest("Should cap the requests to each host"):
+            self.assertEqual(most_active["big.com"], 2)
+
+        with self.subTest("Should wait between requests to the same host"):
+            self.assertGreaterEqual(time.perf_counter() - start, 19 * 0.005)
+
+    async def test_extracted_links(self):
+        async def fetch(url):
+            links = (
+                ["http://a.com/1", "http://a.com/2#top"] if url.endswith("/") else []
+            )
+            return Response(
+                FetchResult("GET", url, 200), WebResource("text/html", ""), links
+            )
+
+        client = AsyncMock()
+        client.fetch = fetch
+        urls = await BreadthCrawl(client).execute(
+            ["http://a.com/"], target=BreadthCrawlType.PAGES
+        )
+
+        with self.subTest("Should use the links extracted while fetching"):
+            self.assertEqual(urls, {"http://a.com/1", "http://a.com/2"})
+
+    async def test_metrics(self):
+        async def fetch(url):
+            links = ["http://a.com/1", "http://a.com/2"] if url.endswith("/") else []
+            return Response(
+                FetchResult("GET", url, 200), WebResource("text/html", "page"), links
+            )
+
+        client, sitemap_cache = AsyncMock(), AsyncMock()
+        client.fetch = fetch
+        sitemap_cache.get_urls.return_value = ["http://a.com/1"]
+        metrics = CrawlMetrics()
+        await BreadthCrawl(
+            client, sitemap_cache=sitemap_cache, metrics=metrics
+        ).execute(["http://a.com/"])
+        snapshot = metrics.snapshot()
+
+        with self.subTest("Should count the pages crawled and urls discovered"):
+            self.assertEqual(snapshot.counters["pages_crawled"], 3)
+            self.assertEqual(snapshot.counters["urls_discovered"], 2)
+
+        with self.subTest("Should time the parsing of each page"):
+            self.assertEqual(snapshot.timings["parse"].count, 3)
+
+        with self.subTest("Should time each check for visited urls"):
+            self.assertEqual(snapshot.timings["dedup"].count, 3)
+
+        with self.subTest("Should time the sitemap lookup of each host"):
+            self.assertEqual(snapshot.timings["sitemap"].count, 1)
+            self.assertEqual(metrics.snapshot("a.com").timings["sitemap"].count, 1)
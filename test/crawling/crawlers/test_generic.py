@@ -0,0 +1,98 @@
+import asyncio
+import os
+import tempfile
+import time
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, patch, MagicMock
+
+from crawley import CrawlProfiler
+from crawley.crawling.crawlers.algorithms.breadth import BreadthCrawlType
+from crawley.crawling.crawlers.generic import Crawler
+from crawley.web_requests import Response, FetchResult, WebResource
+
+
+def mock_client() -> AsyncMock:
+    async def fetch(url):
+        return Response(FetchResult("GET", url, 200), WebResource("text/html", url))
+
+    client = AsyncMock()
+    client.fetch = AsyncMock(side_effect=fetch)
+    return client
+
+
+def links(url: str, content: str) -> list[str]:
+    """Links every page to the next two pages of a binary tree."""
+    page = int(url)
+    return [str(2 * page + 1), str(2 * page + 2)]
+
+
+class TestCrawler(IsolatedAsyncioTestCase):
+    @patch("crawley.crawling.crawlers.algorithms.breadth.get_internal_urls")
+    async def test_stream(self, internal_urls: MagicMock):
+        internal_urls.side_effect = links
+
+        with self.subTest("Should yield a record of each discovered url"):
+            records = [
+                record
+                async for record in Crawler(mock_client()).stream(
+                    ["0"], 6, BreadthCrawlType.PAGES
+                )
+            ]
+            self.assertEqual(
+                sorted(int(record.url) for record in records), list(range(1, 13))
+            )
+            record = next(record for record in records if record.url == "3")
+            self.assertEqual(
+                (record.parent, record.depth, record.status), ("1", 2, 200)
+            )
+
+        with self.subTest("Should pause crawling when the consumer is slow"):
+            client = mock_client()
+            stream = Crawler(client).stream(
+                ["0"], target=BreadthCrawlType.PAGES, buffer_size=1
+            )
+            await anext(stream)
+            await asyncio.sleep(0.05)
+            self.assertLess(client.fetch.call_count, 15)
+
+        with self.subTest("Should cancel the crawl when the generator is closed"):
+            await stream.aclose()
+            fetches = client.fetch.call_count
+            await asyncio.sleep(0.05)
+            self.assertEqual(client.fetch.call_count, fetches)
+
+    @patch("crawley.crawling.crawlers.algorithms.breadth.get_internal_urls")
+    async def test_profiler(self, internal_urls: MagicMock):
+        internal_urls.side_effect = links
+
+        async def fetch(url):
+            if url == "3":
+                time.sleep(0.1)
+            return Response(FetchResult("GET", url, 200), WebResource("text/html", url))
+
+        client = AsyncMock()
+        client.fetch = fetch
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "crawl.folded")
+            profiler = CrawlProfiler(block_threshold=0.05, output=output)
+            async with Crawler(client, profiler=profiler) as crawler:
+                await crawler.crawl(["0"], 10, target=BreadthCrawlType.PAGES)
+
+            with self.subTest("Should time each stage of crawling a page"):
+                stages = profiler.stages()
+                self.assertEqual(
+                    list(stages), ["fetch", "extract", "filter", "enqueue"]
+                )
+                self.assertEqual(stages["fetch"].count, 10)
+
+            with self.subTest("Should record what blocked the event loop"):
+                self.assertEqual(len(profiler.blocks), 1)
+                self.assertIn("fetch", profiler.blocks[0].blocker)
+                self.assertGreaterEqual(profiler.blocks[0].duration, 0.05)
+
+            with self.subTest("Should stop profiling when the crawl ends"):
+                self.assertFalse(profiler.running)
+
+            with self.subTest("Should dump the profile when the crawl ends"):
+                with open(output) as file:
+                    self.assertTrue(file.read())
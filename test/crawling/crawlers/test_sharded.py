@@ -0,0 +1,84 @@
+from collections import Counter
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from crawley.crawling.crawlers.algorithms.breadth import BreadthCrawlType
+from crawley.crawling.crawlers.sharded import ShardedCrawler, shard_of
+
+PAGES = 10
+
+
+def linked_app(requests: Counter, hosts: list[str]) -> web.Application:
+    """Creates an app whose pages link to the next page, and to the same page of every host."""
+
+    async def handle(request: web.Request) -> web.Response:
+        requests[request.url.human_repr()] += 1
+        page = int(request.match_info["page"])
+        links = [f"/{page + 1}"] if page + 1 < PAGES else []
+        links += [f"{host}{page}" for host in hosts]
+        body = "".join(f'<a href="{link}">{link}</a>' for link in links)
+        return web.Response(text=body, content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/{page:\\d+}", handle)
+    return app
+
+
+class TestShardOf(TestCase):
+    def test_shard_of(self):
+        with self.subTest("Should keep a host on one shard"):
+            self.assertEqual(
+                shard_of("http://a.com/1", 4), shard_of("http://a.com/2?x=1", 4)
+            )
+
+        with self.subTest("Should spread hosts across shards"):
+            shards = {shard_of(f"http://{i}.com/", 4) for i in range(100)}
+            self.assertEqual(shards, set(range(4)))
+
+
+class TestShardedCrawler(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.requests = Counter()
+        self.hosts: list[str] = []
+        for _ in range(3):
+            server = TestServer(linked_app(self.requests, self.hosts))
+            await server.start_server()
+            self.addAsyncCleanup(server.close)
+            self.hosts.append(str(server.make_url("/")))
+
+    async def test_crawl(self):
+        crawler = ShardedCrawler(shards=2, flush_interval=0.01)
+        urls = await crawler.crawl(
+            [f"{self.hosts[0]}0"],
+            target=BreadthCrawlType.PAGES,
+            internal_only=False,
+            workers=4,
+        )
+        expected = {f"{host}{page}" for host in self.hosts for page in range(PAGES)}
+
+        with self.subTest("Should discover the urls of every host"):
+            self.assertEqual(urls, expected)
+
+        with self.subTest("Should fetch each discovered url once"):
+            self.assertEqual(set(self.requests), expected)
+            # the seed url is fetched again when it is discovered, as in a BreadthCrawl
+            del self.requests[f"{self.hosts[0]}0"]
+            self.assertEqual(set(self.requests.values()), {1})
+
+    async def test_stream(self):
+        crawler = ShardedCrawler(shards=2, flush_interval=0.01)
+        records = [
+            record
+            async for record in crawler.stream(
+                [f"{host}0" for host in self.hosts], limit=5, internal_only=False
+            )
+        ]
+
+        with self.subTest("Should stop at the limit"):
+            self.assertEqual(len(records), 5)
+
+        with self.subTest("Should record where urls were discovered"):
+            for record in records:
+                self.assertIn(record.parent, self.requests)
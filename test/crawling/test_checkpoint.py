@@ -0,0 +1,163 @@
+import asyncio
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, patch, MagicMock
+
+from crawley.crawling import CrawlCheckpoint, FingerprintSet, ScalableBloomFilter
+from crawley.crawling.crawlers.algorithms.breadth import BreadthCrawl, BreadthCrawlType
+from crawley.web_requests import Response, FetchResult, WebResource
+
+
+def links(url: str, content: str) -> list[str]:
+    """Links every page to the next two pages of a binary tree."""
+    page = int(url)
+    return [str(2 * page + 1), str(2 * page + 2)]
+
+
+class TestCrawlCheckpoint(IsolatedAsyncioTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "crawl.db")
+
+    async def test_save(self):
+        async with CrawlCheckpoint(self.path) as checkpoint:
+            with self.subTest("Should not load a crawl from an empty checkpoint"):
+                self.assertIsNone(await checkpoint.load())
+
+            await checkpoint.start(100, "pages", True)
+            checkpoint.pushed("a", 0)
+            checkpoint.pushed("b", 1)
+            checkpoint.discovered("b")
+            checkpoint.sitemap_crawled("http://a.com/")
+            await checkpoint.save(0, {"http://b.com/": {"rate": 1}})
+            checkpoint.crawled("a")
+            checkpoint.pushed("c", 2)
+            checkpoint.discovered("c")
+            await checkpoint.save(1, {"http://a.com/": {"rate": 2}})
+
+        async with CrawlCheckpoint(self.path) as checkpoint:
+            snapshot = await checkpoint.load()
+            with self.subTest("Should load the options of the crawl"):
+                self.assertEqual(
+                    (snapshot.limit, snapshot.target, snapshot.internal_only),
+                    (100, "pages", True),
+                )
+
+            with self.subTest("Should load the progress of the crawl"):
+                self.assertEqual(
+                    [item async for item in checkpoint.read_frontier()],
+                    [("b", 1), ("c", 2)],
+                )
+                self.assertEqual(
+                    [url async for url in checkpoint.read_discovered()], ["b", "c"]
+                )
+                self.assertEqual(snapshot.sitemap_homepages, {"http://a.com/"})
+                self.assertEqual(snapshot.pages_crawled, 1)
+
+            with self.subTest("Should load the state of each host"):
+                self.assertEqual(
+                    [item async for item in checkpoint.read_host_states()],
+                    [("http://a.com/", {"rate": 2}), ("http://b.com/", {"rate": 1})],
+                )
+
+            with self.subTest("Should replace the crawl when a new crawl starts"):
+                await checkpoint.start(None, "urls", False)
+                self.assertFalse([item async for item in checkpoint.read_frontier()])
+                self.assertFalse([url async for url in checkpoint.read_discovered()])
+
+    async def test_seen(self):
+        urls = {f"http://a.com/{i}" for i in range(2500)}
+        fingerprints = FingerprintSet()
+        for url in urls:
+            fingerprints.add(url)
+
+        async with CrawlCheckpoint(self.path) as checkpoint:
+            with self.subTest("Should store the urls of a set"):
+                await checkpoint.start(None, "urls", True, seen=urls)
+                self.assertEqual(
+                    {url async for url in checkpoint.read_seen_urls()}, urls
+                )
+
+            with self.subTest("Should store the fingerprints of a FingerprintSet"):
+                await checkpoint.start(None, "urls", True, seen=fingerprints)
+                self.assertEqual(
+                    {key async for key in checkpoint.read_seen_fingerprints()},
+                    set(fingerprints.fingerprints()),
+                )
+                self.assertFalse([url async for url in checkpoint.read_seen_urls()])
+
+            with self.subTest("Should warn about stores that cannot be iterated"):
+                with self.assertLogs("crawley.crawling.checkpoint", "WARNING"):
+                    await checkpoint.start(
+                        None, "urls", True, seen=ScalableBloomFilter()
+                    )
+                self.assertFalse(
+                    [key async for key in checkpoint.read_seen_fingerprints()]
+                )
+
+    @patch("crawley.crawling.crawlers.algorithms.breadth.get_absolute_urls")
+    async def test_resume(self, absolute_urls: MagicMock):
+        absolute_urls.side_effect = links
+        fetched = []
+
+        async def fetch(url):
+            fetched.append(url)
+            await asyncio.sleep(0.005)
+            return Response(FetchResult("GET", url, 200), WebResource("", "content"))
+
+        client = AsyncMock()
+        client.fetch = fetch
+        client.host_states = MagicMock(return_value={"http://a.com/": {"rate": 1}})
+        client.restore_host_states = MagicMock()
+
+        async with CrawlCheckpoint(self.path, interval=0.01) as checkpoint:
+            crawl = asyncio.create_task(
+                BreadthCrawl(client).execute(
+                    ["0"],
+                    40,
+                    BreadthCrawlType.PAGES,
+                    workers=4,
+                    checkpoint=checkpoint,
+                )
+            )
+            await asyncio.sleep(0.03)
+            crawl.cancel()
+            first_urls = await crawl
+        first_fetched, fetched[:] = list(fetched), []
+
+        async with CrawlCheckpoint(self.path) as checkpoint:
+            urls = await BreadthCrawl(client).resume(checkpoint, workers=4)
+
+        with self.subTest("Should stop the first crawl early"):
+            self.assertLess(len(first_fetched), 40)
+
+        with self.subTest("Should include the urls discovered before the checkpoint"):
+            self.assertLessEqual(first_urls, urls)
+
+        with self.subTest("Should only refetch the pages that were being crawled"):
+            self.assertLessEqual(len(set(first_fetched) & set(fetched)), 4)
+
+        with self.subTest("Should continue to the limit of the crawl"):
+            self.assertGreaterEqual(len(set(first_fetched) | set(fetched)), 40)
+            self.assertGreaterEqual(len(urls), 80)
+
+        with self.subTest("Should restore the state of each host"):
+            client.restore_host_states.assert_called_once_with(
+                {"http://a.com/": {"rate": 1}}
+            )
+
+        with self.subTest("Should restore the urls seen before the crawl"):
+            async with CrawlCheckpoint(self.path) as checkpoint:
+                await BreadthCrawl(client, {"seen"}).execute(
+                    ["0"], 1, BreadthCrawlType.PAGES, checkpoint=checkpoint
+                )
+                visited_urls = FingerprintSet()
+                await BreadthCrawl(client, visited_urls).resume(checkpoint, 1)
+            self.assertIn("seen", visited_urls)
+
+        with self.subTest("Should not resume a missing crawl"):
+            with self.assertRaises(ValueError):
+                async with CrawlCheckpoint(self.path + "2") as checkpoint:
+                    await BreadthCrawl(client).resume(checkpoint)
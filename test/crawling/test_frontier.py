@@ -0,0 +1,71 @@
+import os
+import random
+import tempfile
+from unittest import TestCase, IsolatedAsyncioTestCase
+
+from crawley.crawling.frontier import BreadthFrontier, DiskFrontier
+
+
+class TestBreadthFrontier(TestCase):
+    def test_pop(self):
+        frontier = BreadthFrontier()
+        with self.subTest("Should return None when empty"):
+            self.assertIsNone(frontier.pop())
+
+        with self.subTest("Should pop shallower urls first, in FIFO order"):
+            frontier.push("b", 1)
+            frontier.push("a", 0)
+            frontier.push("c", 1)
+            frontier.push("d", 0)
+            self.assertEqual(len(frontier), 4)
+            self.assertEqual(
+                [frontier.pop() for _ in range(4)],
+                [("a", 0), ("d", 0), ("b", 1), ("c", 1)],
+            )
+            self.assertFalse(frontier)
+
+
+class TestDiskFrontier(TestCase):
+    def test_pop(self):
+        with tempfile.TemporaryDirectory() as directory:
+            frontier = DiskFrontier(directory, head_size=3, segment_size=4)
+            expected = BreadthFrontier()
+            rng = random.Random(0)
+
+            with self.subTest("Should spill urls to segment files"):
+                for i in range(30):
+                    frontier.push(f"url-{i}", i % 2)
+                    expected.push(f"url-{i}", i % 2)
+                self.assertTrue(os.listdir(directory))
+                self.assertEqual(len(frontier), 30)
+
+            with self.subTest("Should pop urls in the same order as BreadthFrontier"):
+                popped, expected_popped = [], []
+                for i in range(30, 200):
+                    if rng.random() < 0.5:
+                        depth = rng.randint(0, 3)
+                        frontier.push(f"url-{i}", depth)
+                        expected.push(f"url-{i}", depth)
+                    else:
+                        popped.append(frontier.pop())
+                        expected_popped.append(expected.pop())
+                while frontier:
+                    popped.append(frontier.pop())
+                    expected_popped.append(expected.pop())
+                self.assertEqual(popped, expected_popped)
+                self.assertIsNone(frontier.pop())
+
+            with self.subTest("Should remove segment files once they are read"):
+                self.assertFalse(os.listdir(directory))
+
+
+class TestDiskFrontierClose(IsolatedAsyncioTestCase):
+    async def test_close(self):
+        async with DiskFrontier(head_size=1, segment_size=1) as frontier:
+            for i in range(5):
+                frontier.push(f"url-{i}")
+            self.assertTrue(os.path.isdir(frontier.directory))
+
+        with self.subTest("Should remove its temporary directory when closed"):
+            self.assertFalse(os.path.exists(frontier.directory))
+            self.assertFalse(frontier)
@@ -0,0 +1,135 @@
+import os
+import tempfile
+import time
+from datetime import datetime, timezone, timedelta
+from functools import partial
+from unittest import IsolatedAsyncioTestCase, TestCase
+from unittest.mock import AsyncMock
+
+from crawley.crawling import SitemapPage, RecrawlLog
+from crawley.crawling.crawlers.generic import Crawler
+from crawley.crawling.recrawl import is_due
+from crawley.web_requests import (
+    Response,
+    FetchResult,
+    WebResource,
+    WebRequestClient,
+    RetryRequest,
+)
+
+NOW = time.time()
+DAY = 86400
+MODIFIED = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class TestIsDue(TestCase):
+    def test_is_due(self):
+        cases = {
+            "Should fetch a page that has not been fetched": (
+                SitemapPage("a", MODIFIED),
+                None,
+                None,
+                True,
+            ),
+            "Should fetch a page that has been modified": (
+                SitemapPage("a", MODIFIED),
+                MODIFIED.timestamp() - 1,
+                NOW,
+                True,
+            ),
+            "Should not fetch a page that has not been modified": (
+                SitemapPage("a", MODIFIED, "always"),
+                MODIFIED.timestamp(),
+                NOW - 365 * DAY,
+                False,
+            ),
+            "Should fetch a page once its changefreq has passed": (
+                SitemapPage("a", change_frequency="daily"),
+                None,
+                NOW - DAY,
+                True,
+            ),
+            "Should not fetch a page before its changefreq has passed": (
+                SitemapPage("a", change_frequency="weekly"),
+                None,
+                NOW - DAY,
+                False,
+            ),
+            "Should not refetch a page that never changes": (
+                SitemapPage("a", change_frequency="never"),
+                None,
+                NOW - 365 * DAY,
+                False,
+            ),
+            "Should use the default interval without a changefreq": (
+                SitemapPage("a"),
+                None,
+                NOW - 2 * DAY,
+                True,
+            ),
+        }
+        for message, (page, modified, fetched, expected) in cases.items():
+            with self.subTest(message):
+                self.assertEqual(is_due(page, modified, fetched, NOW, DAY), expected)
+
+
+class TestRecrawl(IsolatedAsyncioTestCase):
+    async def test_recrawl(self):
+        pages = [
+            SitemapPage("http://a.com/changed", MODIFIED),
+            SitemapPage("http://a.com/unchanged", MODIFIED),
+            SitemapPage("http://a.com/daily", change_frequency="daily"),
+            SitemapPage("http://a.com/failed"),
+            SitemapPage("http://a.com/throttled"),
+        ]
+        throttled = set()
+
+        async def fetch(url):
+            if url.endswith("throttled") and url not in throttled:
+                throttled.add(url)
+                raise RetryRequest(url, 0, 1, "status 429")
+            status = 500 if url.endswith("failed") else 200
+            return Response(FetchResult("GET", url, status), WebResource("", ""))
+
+        client = AsyncMock()
+        client.fetch = AsyncMock(side_effect=fetch)
+        client.fetch_multiple = partial(WebRequestClient.fetch_multiple, client)
+        crawler = Crawler(client)
+        crawler.sitemap_cache.get_pages = AsyncMock(return_value=pages)
+
+        async def recrawl(seed_urls: list[str], log: RecrawlLog) -> dict[str, int]:
+            return {
+                response.fetch.url: response.fetch.status
+                async for response in crawler.recrawl(seed_urls, log)
+            }
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "recrawl.db")
+            async with RecrawlLog(path) as log:
+                with self.subTest("Should fetch every page on the first recrawl"):
+                    self.assertEqual(
+                        await recrawl(["http://a.com/", "http://a.com/x"], log),
+                        {page.url: 200 for page in pages} | {pages[3].url: 500},
+                    )
+                    crawler.sitemap_cache.get_pages.assert_awaited_once()
+
+                with self.subTest("Should retry transient failures"):
+                    self.assertEqual(
+                        [call.args[0] for call in client.fetch.await_args_list].count(
+                            "http://a.com/throttled"
+                        ),
+                        2,
+                    )
+
+            pages[0] = SitemapPage(pages[0].url, MODIFIED + timedelta(days=1))
+            client.fetch.reset_mock()
+            async with RecrawlLog(path) as log:
+                with self.subTest("Should only fetch changed and failed pages"):
+                    self.assertEqual(
+                        await recrawl(["http://a.com/"], log),
+                        {"http://a.com/changed": 200, "http://a.com/failed": 500},
+                    )
+
+                with self.subTest("Should not fetch anything when nothing is due"):
+                    pages.pop(3)
+                    self.assertEqual(await recrawl(["http://a.com/"], log), {})
@@ -0,0 +1,110 @@
+import os
+import time
+from unittest import TestCase, IsolatedAsyncioTestCase
+
+from crawley.crawling.frontier import DiskFrontier
+from crawley.crawling.scheduler import HostScheduler
+
+
+class TestHostScheduler(TestCase):
+    def test_pop(self):
+        scheduler = HostScheduler(max_per_host=1)
+        with self.subTest("Should return None when empty"):
+            self.assertIsNone(scheduler.pop())
+
+        with self.subTest("Should take turns between hosts"):
+            for url in ("http://a.com/1", "http://a.com/2", "http://a.com/3"):
+                scheduler.push(url)
+            scheduler.push("http://b.com/1")
+            scheduler.push("http://c.com/1", 1)
+            self.assertEqual(len(scheduler), 5)
+            self.assertEqual(
+                [scheduler.pop() for _ in range(3)],
+                [("http://a.com/1", 0), ("http://b.com/1", 0), ("http://c.com/1", 1)],
+            )
+
+        with self.subTest("Should hold back hosts at their concurrency cap"):
+            self.assertIsNone(scheduler.pop())
+            self.assertIsNone(scheduler.ready_in())
+            self.assertEqual(len(scheduler), 2)
+
+        with self.subTest("Should pop a host's next url once a slot is released"):
+            scheduler.release("http://a.com/1")
+            self.assertEqual(scheduler.pop(), ("http://a.com/2", 0))
+
+        with self.subTest("Should pop urls of a host in breadth-first order"):
+            scheduler = HostScheduler()
+            scheduler.push("http://a.com/deep", 2)
+            scheduler.push("http://a.com/shallow", 1)
+            self.assertEqual(scheduler.pop(), ("http://a.com/shallow", 1))
+
+    def test_min_interval(self):
+        scheduler = HostScheduler(max_per_host=5, min_interval=0.05)
+        scheduler.push("http://a.com/1")
+        scheduler.push("http://a.com/2")
+        scheduler.pop()
+
+        with self.subTest("Should hold back a host until its interval has passed"):
+            self.assertIsNone(scheduler.pop())
+            self.assertGreater(scheduler.ready_in(), 0)
+
+        with self.subTest("Should pop a host's next url after its interval"):
+            time.sleep(scheduler.ready_in())
+            self.assertEqual(scheduler.ready_in(), 0)
+            self.assertEqual(scheduler.pop(), ("http://a.com/2", 0))
+
+    def test_many_hosts(self):
+        scheduler = HostScheduler(max_per_host=1, min_interval=0.05)
+        hosts = [f"http://{i}.com/" for i in range(1000)]
+        for host in hosts:
+            scheduler.push(f"{host}1")
+            scheduler.push(f"{host}2")
+
+        with self.subTest("Should pop each host once before its interval passes"):
+            popped = [scheduler.pop() for _ in hosts]
+            self.assertEqual([url for url, _ in popped], [f"{host}1" for host in hosts])
+            self.assertIsNone(scheduler.pop())
+
+        with self.subTest("Should forget the intervals of hosts once they pass"):
+            for host in hosts:
+                scheduler.release(f"{host}1")
+            self.assertLessEqual(scheduler.ready_in(), scheduler.min_interval)
+            time.sleep(scheduler.min_interval)
+            popped = [scheduler.pop() for _ in hosts]
+            self.assertEqual([url for url, _ in popped], [f"{host}2" for host in hosts])
+            for host in hosts:
+                scheduler.release(f"{host}2")
+            time.sleep(0.05)
+            self.assertIsNone(scheduler.pop())
+            self.assertFalse(scheduler._ready_at)
+            self.assertFalse(scheduler._timers)
+
+    def test_validation(self):
+        for kwargs in ({"max_per_host": 0}, {"min_interval": -1}):
+            with self.subTest("Should reject invalid limits", **kwargs):
+                with self.assertRaises(ValueError):
+                    HostScheduler(**kwargs)
+
+
+class TestHostSchedulerClose(IsolatedAsyncioTestCase):
+    async def test_close(self):
+        frontiers = []
+
+        def host_frontier() -> DiskFrontier:
+            frontiers.append(DiskFrontier(head_size=1, segment_size=1))
+            return frontiers[-1]
+
+        async with HostScheduler(host_frontier=host_frontier) as scheduler:
+            for host in range(10):
+                scheduler.push(f"http://{host}.com/")
+                self.assertEqual(scheduler.pop(), (f"http://{host}.com/", 0))
+                scheduler.release(f"http://{host}.com/")
+            for i in range(5):
+                scheduler.push(f"http://a.com/{i}")
+
+            with self.subTest("Should reuse the frontiers of exhausted hosts"):
+                self.assertEqual(len(frontiers), 1)
+
+        with self.subTest("Should close the frontiers it created"):
+            self.assertFalse(scheduler)
+            self.assertFalse(os.path.exists(frontiers[0].directory))
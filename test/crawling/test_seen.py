@@ -0,0 +1,43 @@
+from unittest import TestCase
+
+from crawley.crawling.seen import FingerprintSet, ScalableBloomFilter
+
+URLS = [f"https://example.com/page/{i}" for i in range(5000)]
+UNSEEN_URLS = [f"https://example.com/other/{i}" for i in range(50000)]
+
+
+class TestFingerprintSet(TestCase):
+    def test_add(self):
+        seen = FingerprintSet(capacity=8)
+        for url in URLS:
+            seen.add(url)
+        seen.add(URLS[0])
+
+        with self.subTest("Should contain added urls after resizing"):
+            self.assertTrue(all(url in seen for url in URLS))
+            self.assertEqual(len(seen), len(URLS))
+
+        with self.subTest("Should not contain urls that were not added"):
+            self.assertFalse(any(url in seen for url in UNSEEN_URLS))
+
+        with self.subTest("Should allow fingerprints to be restored"):
+            restored = FingerprintSet()
+            for key in seen.fingerprints():
+                restored.add_fingerprint(key)
+            self.assertTrue(all(url in restored for url in URLS))
+
+
+class TestScalableBloomFilter(TestCase):
+    def test_add(self):
+        error_rate = 0.01
+        seen = ScalableBloomFilter(initial_capacity=500, error_rate=error_rate)
+        for url in URLS:
+            seen.add(url)
+        seen.add(URLS[0])
+
+        with self.subTest("Should never report added urls as unseen"):
+            self.assertTrue(all(url in seen for url in URLS))
+
+        with self.subTest("Should stay within the false-positive rate as it grows"):
+            false_positives = sum(url in seen for url in UNSEEN_URLS)
+            self.assertLessEqual(false_positives / len(UNSEEN_URLS), error_rate)
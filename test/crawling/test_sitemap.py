@@ -0,0 +1,163 @@
+import asyncio
+import codecs
+import gzip
+from datetime import datetime, timezone
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock
+
+from crawley.crawling.crawlers.generic import Crawler
+from crawley.crawling.sitemap import SitemapCache
+from crawley.web_requests.clients.decorators import (
+    PoliteRequestClient,
+    AdaptiveRequestClient,
+)
+from crawley.web_requests import (
+    Response,
+    FetchResult,
+    WebResource,
+    RetryRequest,
+    StaticRequestClient,
+)
+
+HOMEPAGE = "https://example.com/"
+
+ROBOTS = f"User-agent: *\nSitemap: {HOMEPAGE}sitemap_index.xml\n".encode()
+
+SITEMAP_INDEX = f"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+    <sitemap><loc>{HOMEPAGE}pages.xml.gz</loc></sitemap>
+    <sitemap><loc>{HOMEPAGE}posts.txt</loc></sitemap>
+</sitemapindex>""".encode()
+
+PAGES = f"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+    <url>
+        <loc>{HOMEPAGE}a</loc>
+        <lastmod>2024-01-02</lastmod>
+        <changefreq>Daily</changefreq>
+        <priority>0.8</priority>
+    </url>
+    <url><loc>{HOMEPAGE}b</loc></url>
+</urlset>""".encode()
+
+POSTS = f"{HOMEPAGE}c\n{HOMEPAGE}d\n".encode()
+
+RESOURCES = {
+    f"{HOMEPAGE}robots.txt": ROBOTS,
+    f"{HOMEPAGE}sitemap_index.xml": SITEMAP_INDEX,
+    f"{HOMEPAGE}pages.xml.gz": gzip.compress(PAGES),
+    f"{HOMEPAGE}posts.txt": POSTS,
+}
+
+
+async def mock_fetch(url: str) -> Response:
+    await asyncio.sleep(0.01)
+    if url not in RESOURCES:
+        return Response(FetchResult("GET", url, 404), None)
+    return Response(
+        FetchResult("GET", url, 200), WebResource("application/xml", RESOURCES[url])
+    )
+
+
+class TestSitemapCache(IsolatedAsyncioTestCase):
+    async def test_get_pages(self):
+        client = AsyncMock()
+        client.fetch.side_effect = mock_fetch
+        cache = SitemapCache(request_client=client)
+
+        pages = await cache.get_pages(f"{HOMEPAGE}any/page")
+
+        with self.subTest("Should follow sitemap indexes and parse every sitemap"):
+            self.assertEqual(
+                sorted(page.url for page in pages),
+                [f"{HOMEPAGE}{path}" for path in "abcd"],
+            )
+
+        with self.subTest("Should parse page metadata"):
+            page = next(page for page in pages if page.url == f"{HOMEPAGE}a")
+            self.assertEqual(
+                page.last_modified, datetime(2024, 1, 2, tzinfo=timezone.utc)
+            )
+            self.assertEqual(page.change_frequency, "daily")
+            self.assertEqual(page.priority, 0.8)
+
+        with self.subTest("Should not refetch cached sitemaps"):
+            client.fetch.reset_mock()
+            await cache.get_pages(HOMEPAGE)
+            client.fetch.assert_not_called()
+
+    async def test_concurrent_get_pages(self):
+        client = AsyncMock()
+        client.fetch.side_effect = mock_fetch
+        cache = SitemapCache(request_client=client)
+        await asyncio.gather(*(cache.get_pages(f"{HOMEPAGE}{i}") for i in range(5)))
+        self.assertEqual(client.fetch.call_count, len(RESOURCES))
+
+    async def test_robots_cache(self):
+        client = AsyncMock()
+        client.fetch.side_effect = mock_fetch
+        polite_client = PoliteRequestClient(client)
+        crawler = Crawler(AdaptiveRequestClient(polite_client))
+        cache = crawler.sitemap_cache
+
+        with self.subTest("Should share the robots.txt cache of a polite client"):
+            self.assertIs(cache.robots_cache, polite_client.robots_cache)
+            await cache.get_pages(HOMEPAGE)
+            robots_fetches = [
+                call
+                for call in client.fetch.await_args_list
+                if call.args[0].endswith("robots.txt")
+            ]
+            self.assertEqual(len(robots_fetches), 1)
+
+    async def test_default_client(self):
+        async with SitemapCache(True) as cache:
+            with self.subTest("Should create its own client by default"):
+                self.assertTrue(cache.use_known_paths)
+                self.assertIsInstance(cache._request_client, StaticRequestClient)
+
+        with self.subTest("Should close the client it created"):
+            self.assertTrue(cache._request_client._session.closed)
+
+    async def test_byte_order_mark(self):
+        client = AsyncMock()
+        cache = SitemapCache(request_client=client)
+        cases = {
+            "Should parse an xml sitemap with a byte order mark": PAGES,
+            "Should parse a text sitemap with a byte order mark": POSTS,
+        }
+        for message, content in cases.items():
+            with self.subTest(message):
+                pages = []
+                await cache._parse_content(codecs.BOM_UTF8 + content, pages)
+                self.assertEqual(len(pages), 2)
+
+    async def test_retries(self):
+        retried = set()
+
+        async def flaky_fetch(url: str) -> Response:
+            if url not in retried:
+                retried.add(url)
+                raise RetryRequest(url, 0, 1, "status 429")
+            return await mock_fetch(url)
+
+        client = AsyncMock()
+        client.fetch.side_effect = flaky_fetch
+        pages = await SitemapCache(request_client=client).get_pages(HOMEPAGE)
+
+        with self.subTest(
+            "Should retry robots.txt and sitemaps that failed transiently"
+        ):
+            self.assertEqual(len(pages), 4)
+            self.assertEqual(client.fetch.call_count, 2 * len(RESOURCES))
+
+    async def test_get_urls(self):
+        client = AsyncMock()
+        client.fetch.side_effect = mock_fetch
+        cache = SitemapCache(request_client=client)
+
+        with self.subTest("Should limit the amount of urls"):
+            self.assertEqual(len(await cache.get_urls(HOMEPAGE, 3)), 3)
+
+        with self.subTest("Missing sitemaps should not raise errors"):
+            self.assertFalse(await cache.get_urls("https://other.com/"))
@@ -0,0 +1,76 @@
+from unittest import TestCase
+
+from crawley.crawling.util import (
+    LINK_EXTRACTORS,
+    extract_links,
+    get_absolute_urls,
+    get_internal_urls,
+)
+
+CONTENT = """<html><body>
+    <a href="/relative">Relative</a>
+    <A HREF="https://example.com/upper#fragment">Upper</A>
+    <a>No href</a>
+    <div><a href="https://other.com/">External</a></div>
+</body></html>"""
+
+
+class TestLinkExtractors(TestCase):
+    def test_extractors(self):
+        for name, extractor in LINK_EXTRACTORS.items():
+            for content in (CONTENT, CONTENT.encode()):
+                with self.subTest(
+                    f"{name} should get the hrefs of links", content=content
+                ):
+                    self.assertEqual(
+                        extractor(content),
+                        [
+                            "/relative",
+                            "https://example.com/upper#fragment",
+                            "https://other.com/",
+                        ],
+                    )
+            with self.subTest(f"{name} should handle empty content"):
+                self.assertEqual(extractor(""), [])
+
+    def test_url_filters(self):
+        base_url = "https://example.com/page"
+        for name, extractor in LINK_EXTRACTORS.items():
+            with self.subTest(f"Absolute urls with {name}"):
+                self.assertEqual(
+                    get_absolute_urls(base_url, CONTENT, extractor),
+                    {
+                        "https://example.com/relative",
+                        "https://example.com/upper",
+                        "https://other.com/",
+                    },
+                )
+            with self.subTest(f"Internal urls with {name}"):
+                self.assertEqual(
+                    get_internal_urls(base_url, CONTENT, extractor),
+                    {"https://example.com/relative", "https://example.com/upper"},
+                )
+
+    def test_encodings(self):
+        content = '<meta charset="utf-8"><a href="/café">Café</a><a href="/b">B</a>'
+        for name, extractor in LINK_EXTRACTORS.items():
+            with self.subTest(f"{name} should parse bytes in their encoding"):
+                self.assertEqual(
+                    extract_links(content.encode("cp1252"), extractor, "cp1252"),
+                    ["/café", "/b"],
+                )
+            with self.subTest(f"{name} should not fail on a mis-declared encoding"):
+                links = extract_links(content.encode("cp1252"), extractor, "utf-8")
+                self.assertEqual(len(links), 2)
+                self.assertEqual(links[1], "/b")
+            with self.subTest(f"{name} should ignore an encoding it does not know"):
+                self.assertEqual(
+                    extract_links(content.encode(), extractor, "mac-roman"),
+                    ["/café", "/b"],
+                )
+
+        with self.subTest("Should decode content for other extractors"):
+            self.assertEqual(
+                extract_links("é".encode("cp1252"), lambda text: [text], "cp1252"),
+                ["é"],
+            )
@@ -0,0 +1,88 @@
+import pickle
+from unittest import TestCase
+
+from crawley.crawling.util import UrlCanonicalizer, canonicalize, get_absolute
+
+
+class TestUrlCanonicalizer(TestCase):
+    def test_canonicalize(self):
+        cases = {
+            "Should lowercase the scheme and host": (
+                "HTTP://Example.COM/Path",
+                "http://example.com/Path",
+            ),
+            "Should drop default ports": (
+                "https://example.com:443/a",
+                "https://example.com/a",
+            ),
+            "Should keep other ports": (
+                "http://example.com:8080/a",
+                "http://example.com:8080/a",
+            ),
+            "Should resolve dot segments": (
+                "http://example.com/a/./b/../c/..",
+                "http://example.com/a/",
+            ),
+            "Should add a path to bare hosts": (
+                "http://example.com",
+                "http://example.com/",
+            ),
+            "Should normalize percent-encoding": (
+                "http://example.com/%7euser/%2f%e2/a b",
+                "http://example.com/~user/%2F%E2/a%20b",
+            ),
+            "Should sort query parameters": (
+                "http://example.com/?b=2&a=1&a=0",
+                "http://example.com/?a=0&a=1&b=2",
+            ),
+            "Should strip tracking parameters": (
+                "http://example.com/?utm_source=x&id=1&UTM_Medium=y&fbclid=z",
+                "http://example.com/?id=1",
+            ),
+            "Should drop empty queries and fragments": (
+                "http://example.com/a?utm_campaign=x#section",
+                "http://example.com/a",
+            ),
+            "Should handle ipv6 hosts": ("http://[::1]:80/", "http://[::1]/"),
+        }
+        for message, (url, expected) in cases.items():
+            with self.subTest(message, url=url):
+                self.assertEqual(canonicalize(url), expected)
+
+        with self.subTest("Should canonicalize equivalent urls to the same url"):
+            self.assertEqual(
+                canonicalize("HTTP://Example.com:80/a/../b?utm_source=x&b=2&a=1"),
+                canonicalize("http://example.com/b?a=1&b=2"),
+            )
+
+        for url in ("/relative", "mailto:someone@example.com", "http://a.com:port/"):
+            with self.subTest("Should reject urls that are not absolute", url=url):
+                self.assertIsNone(canonicalize(url))
+
+    def test_options(self):
+        canonicalizer = UrlCanonicalizer(
+            tracking_params=frozenset({"session"}),
+            tracking_prefixes=(),
+            sort_query=False,
+        )
+        with self.subTest("Should use the configured tracking parameters"):
+            self.assertEqual(
+                canonicalizer("http://example.com/?utm_source=x&session=1&b=2&a=1"),
+                "http://example.com/?utm_source=x&b=2&a=1",
+            )
+
+        with self.subTest("Should be picklable"):
+            unpickled = pickle.loads(pickle.dumps(canonicalizer))
+            self.assertEqual(
+                unpickled("http://example.com/?session=1"), "http://example.com/"
+            )
+
+    def test_get_absolute(self):
+        with self.subTest("Should get canonical, absolute urls"):
+            self.assertEqual(
+                get_absolute(
+                    "https://example.com/a/b",
+                    ["../c?utm_source=x", "d#fragment", "mailto:someone@example.com"],
+                ),
+                ["https://example.com/c", "https://example.com/a/d"],
+            )
@@ -0,0 +1,102 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from aiohttp import ClientSession, web
+from aiohttp.test_utils import TestServer
+
+from crawley.metrics import CrawlMetrics, MetricsSnapshot, TimingSnapshot, host_of
+
+
+class TestCrawlMetrics(IsolatedAsyncioTestCase):
+    async def test_metrics(self):
+        metrics = CrawlMetrics()
+        metrics.count("pages", "a.com")
+        metrics.count("pages", "b.com", 2)
+        metrics.observe("ttfb", 0.003, "a.com")
+        metrics.observe("ttfb", 0.2, "a.com")
+        with metrics.time("parse"):
+            pass
+
+        with self.subTest("Should count overall and per host"):
+            self.assertEqual(metrics.snapshot().counters["pages"], 3)
+            self.assertEqual(metrics.snapshot("b.com").counters, {"pages": 2})
+            self.assertEqual(sorted(metrics.hosts()), ["a.com", "b.com"])
+
+        with self.subTest("Should bucket timings"):
+            ttfb = metrics.snapshot("a.com").timings["ttfb"]
+            self.assertEqual(ttfb.count, 2)
+            self.assertAlmostEqual(ttfb.total, 0.203)
+            self.assertEqual(ttfb.buckets[0.005], 1)
+            self.assertEqual(ttfb.buckets[0.25], 1)
+            self.assertEqual(ttfb.quantile(0.5), 0.005)
+            self.assertEqual(ttfb.quantile(0.99), 0.25)
+
+        with self.subTest("Should time the body of a with statement"):
+            self.assertEqual(metrics.snapshot().timings["parse"].count, 1)
+            self.assertNotIn("parse", metrics.snapshot("a.com").timings)
+
+        with self.subTest("Should not change a snapshot that has been taken"):
+            snapshot = metrics.snapshot()
+            metrics.count("pages")
+            self.assertEqual(snapshot.counters["pages"], 3)
+
+        with self.subTest("Should get empty metrics of an unknown host"):
+            self.assertEqual(metrics.snapshot("c.com"), MetricsSnapshot())
+            self.assertEqual(TimingSnapshot().quantile(0.5), 0)
+
+        with self.subTest("Should not record hosts if disabled"):
+            metrics = CrawlMetrics(per_host=False)
+            metrics.count("pages", "a.com")
+            self.assertEqual(metrics.snapshot().counters, {"pages": 1})
+            self.assertEqual(metrics.hosts(), [])
+
+    async def test_report(self):
+        metrics, snapshots = CrawlMetrics(), []
+        metrics.count("pages")
+
+        async def callback(snapshot: MetricsSnapshot):
+            snapshots.append(snapshot)
+
+        for name, function in (("function", snapshots.append), ("coroutine", callback)):
+            with self.subTest(f"Should periodically call a {name} with snapshots"):
+                snapshots.clear()
+                report = asyncio.create_task(metrics.report(function, 0.01))
+                await asyncio.sleep(0.035)
+                report.cancel()
+                self.assertGreaterEqual(len(snapshots), 2)
+                self.assertEqual(snapshots[0].counters, {"pages": 1})
+
+    async def test_trace_config(self):
+        async def handle(request: web.Request) -> web.Response:
+            return web.Response(text="page", content_type="text/html")
+
+        app = web.Application()
+        app.router.add_get("/", handle)
+        server = TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        url = str(server.make_url("/"))
+
+        metrics = CrawlMetrics()
+        async with ClientSession(trace_configs=[metrics.trace_config()]) as session:
+            for _ in range(2):
+                async with session.get(url) as response:
+                    await response.read()
+            with self.assertRaises(Exception):
+                await session.get("http://127.0.0.1:1/")
+        snapshot = metrics.snapshot(host_of(url))
+
+        with self.subTest("Should count requests and reused connections"):
+            self.assertEqual(snapshot.counters["requests"], 2)
+            self.assertEqual(snapshot.counters["connections_reused"], 1)
+
+        with self.subTest("Should time connecting once per connection"):
+            self.assertEqual(snapshot.timings["connect"].count, 1)
+
+        with self.subTest("Should time the first byte of each response"):
+            self.assertEqual(snapshot.timings["ttfb"].count, 2)
+
+        with self.subTest("Should count failed requests"):
+            self.assertEqual(
+                metrics.snapshot("127.0.0.1:1").counters["request_errors"], 1
+            )
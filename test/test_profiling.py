@@ -0,0 +1,78 @@
+import asyncio
+import os
+import tempfile
+import time
+from unittest import IsolatedAsyncioTestCase
+
+from crawley.profiling import CrawlProfiler
+
+
+def block(seconds: float):
+    time.sleep(seconds)
+
+
+class TestCrawlProfiler(IsolatedAsyncioTestCase):
+    async def test_profile(self):
+        profiler = CrawlProfiler(block_threshold=0.05)
+
+        async def blocking():
+            await asyncio.sleep(0.02)
+            block(0.1)
+
+        profiler.start()
+        await asyncio.create_task(blocking(), name="blocking")
+        await asyncio.sleep(0.05)
+        await profiler.stop()
+
+        with self.subTest("Should sample the lag of the event loop"):
+            self.assertGreater(profiler.lag.count, 1)
+            self.assertGreaterEqual(profiler.lag.total, 0.05)
+
+        with self.subTest("Should record the task and stack that blocked the loop"):
+            self.assertEqual(len(profiler.blocks), 1)
+            self.assertEqual(profiler.blocks[0].task, "blocking")
+            self.assertTrue(profiler.blocks[0].blocker.startswith("block "))
+            self.assertIn("blocking", profiler.blocks[0].stack[-2])
+            self.assertGreaterEqual(profiler.blocks[0].duration, 0.05)
+
+        with self.subTest("Should sample the stacks of the loop"):
+            stacks = profiler.folded_stacks()
+            self.assertTrue(any("block (" in stack for stack in stacks))
+
+        with self.subTest("Should dump the stacks in the folded format"):
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "profile.folded")
+                profiler.dump(path)
+                with open(path) as file:
+                    lines = file.read().splitlines()
+            self.assertEqual(len(lines), len(stacks))
+            for line in lines:
+                stack, count = line.rsplit(" ", 1)
+                self.assertEqual(stacks[stack], int(count))
+
+    async def test_stages(self):
+        profiler = CrawlProfiler()
+        profiler.record("enqueue", 0.1)
+        profiler.record("fetch", 0.2)
+        profiler.record("fetch", 0.3)
+
+        with self.subTest("Should get the timings of the stages in order"):
+            stages = profiler.stages()
+            self.assertEqual(list(stages), ["fetch", "enqueue"])
+            self.assertEqual(stages["fetch"].count, 2)
+
+    async def test_lifecycle(self):
+        with self.subTest("Should require a threshold longer than the lag interval"):
+            with self.assertRaises(ValueError):
+                CrawlProfiler(lag_interval=0.1, block_threshold=0.1)
+
+        profiler = CrawlProfiler()
+        with self.subTest("Should not start twice"):
+            profiler.start()
+            with self.assertRaises(RuntimeError):
+                profiler.start()
+
+        with self.subTest("Should stop once"):
+            await profiler.stop()
+            self.assertFalse(profiler.running)
+            await profiler.stop()
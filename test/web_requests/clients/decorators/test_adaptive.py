@@ -0,0 +1,174 @@
+import asyncio
+from collections import Counter
+from unittest import IsolatedAsyncioTestCase
+
+from aiohttp import web, ClientError
+from aiohttp.test_utils import TestServer
+
+from crawley.crawling.crawlers.algorithms.breadth import BreadthCrawl, BreadthCrawlType
+from crawley.web_requests import StaticRequestClient
+from crawley.web_requests.clients.decorators.adaptive import (
+    AdaptiveRequestClient,
+    RetryRequest,
+    parse_retry_after,
+)
+
+
+def throttling_app(failures: int, status: int = 429, retry_after: str = None):
+    """Creates an app that throttles the first requests for each path."""
+    requests = Counter()
+
+    async def handle(request: web.Request) -> web.Response:
+        requests[request.path] += 1
+        if requests[request.path] <= failures:
+            headers = {"Retry-After": retry_after} if retry_after else {}
+            return web.Response(status=status, headers=headers)
+        links = "".join(f'<a href="/{i}">{i}</a>' for i in range(3))
+        body = links if request.path == "/" else "page"
+        return web.Response(text=body, content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/{path:.*}", handle)
+    return app, requests
+
+
+class TestAdaptiveRequestClient(IsolatedAsyncioTestCase):
+    async def serve(self, app: web.Application) -> str:
+        server = TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        return str(server.make_url("/"))
+
+    async def adaptive_client(self, **kwargs) -> AdaptiveRequestClient:
+        client = AdaptiveRequestClient(StaticRequestClient(), **kwargs)
+        self.addAsyncCleanup(client.close)
+        return client
+
+    async def test_retry(self):
+        app, requests = throttling_app(2, retry_after="0.05")
+        url = await self.serve(app)
+        client = await self.adaptive_client(max_retries=2)
+
+        with self.subTest("Should ask for a retry after Retry-After seconds"):
+            with self.assertRaises(RetryRequest) as retry:
+                await client.fetch(url)
+            self.assertEqual(
+                (retry.exception.delay, retry.exception.attempt), (0.05, 1)
+            )
+
+        with self.subTest("Should slow down a throttled host"):
+            self.assertEqual(client.rate(url), client.max_rate / 2)
+
+        with self.subTest("Should pause a host for Retry-After seconds"):
+            with self.assertRaises(RetryRequest):
+                start = asyncio.get_running_loop().time()
+                await client.fetch(url)
+            self.assertGreaterEqual(asyncio.get_running_loop().time() - start, 0.05)
+
+        with self.subTest("Should speed a host back up after a success"):
+            rate = client.rate(url)
+            response = await client.fetch(url)
+            self.assertEqual(response.fetch.status, 200)
+            self.assertEqual(client.rate(url), rate + client.rate_increase)
+            self.assertEqual(requests["/"], 3)
+
+    async def test_give_up(self):
+        app, requests = throttling_app(10, status=503)
+        url = await self.serve(app)
+        client = await self.adaptive_client(max_retries=1, backoff=0.01)
+
+        with self.subTest("Should back off exponentially with jitter"):
+            with self.assertRaises(RetryRequest) as retry:
+                await client.fetch(url)
+            self.assertLessEqual(retry.exception.delay, 0.01)
+
+        with self.subTest("Should return the response once retries run out"):
+            response = await client.fetch(url)
+            self.assertEqual(response.fetch.status, 503)
+            self.assertIsNone(response.web_resource)
+
+        with self.subTest("Should not retry a Retry-After longer than max_backoff"):
+            app, _ = throttling_app(1, retry_after="3600")
+            response = await (await self.adaptive_client()).fetch(await self.serve(app))
+            self.assertEqual(response.fetch.status, 429)
+
+    async def test_client_error(self):
+        app, _ = throttling_app(0)
+        server = TestServer(app)
+        await server.start_server()
+        url = str(server.make_url("/"))
+        await server.close()
+        client = await self.adaptive_client(max_retries=1)
+
+        with self.subTest("Should retry connection errors"):
+            with self.assertRaises(RetryRequest):
+                await client.fetch(url)
+
+        with self.subTest("Should raise connection errors once retries run out"):
+            with self.assertRaises(ClientError):
+                await client.fetch(url)
+
+    async def test_crawl(self):
+        app, requests = throttling_app(1, status=503)
+        url = await self.serve(app)
+        client = await self.adaptive_client(backoff=0.01)
+
+        urls = await BreadthCrawl(client).execute([url], target=BreadthCrawlType.PAGES)
+
+        with self.subTest("Should re-queue throttled urls until they succeed"):
+            self.assertEqual(urls, {f"{url}{i}" for i in range(3)})
+            self.assertEqual(set(requests.values()), {2})
+
+    async def test_paused_host(self):
+        slow_app, _ = throttling_app(10, retry_after="5")
+        fast_app, fast_requests = throttling_app(0)
+        slow_url, fast_url = await self.serve(slow_app), await self.serve(fast_app)
+        client = await self.adaptive_client()
+
+        with self.subTest("Should re-queue the urls of a paused host"):
+            with self.assertRaises(RetryRequest):
+                await client.fetch(slow_url)
+            with self.assertRaises(RetryRequest) as retry:
+                await client.fetch(f"{slow_url}a")
+            self.assertGreater(retry.exception.delay, client.max_wait)
+            self.assertEqual(retry.exception.attempt, 0)
+
+        with self.subTest("Should crawl other hosts while a host is paused"):
+            seed_urls = [f"{slow_url}{path}" for path in "abc"] + [fast_url]
+            urls = await asyncio.wait_for(
+                BreadthCrawl(client).execute(
+                    seed_urls, 4, BreadthCrawlType.PAGES, workers=2
+                ),
+                2,
+            )
+            self.assertEqual(sum(fast_requests.values()), 4)
+            self.assertTrue({f"{fast_url}{i}" for i in range(3)} <= urls)
+
+    async def test_host_states(self):
+        app, _ = throttling_app(1, retry_after="5")
+        url = await self.serve(app)
+        client = await self.adaptive_client()
+        with self.assertRaises(RetryRequest):
+            await client.fetch(url)
+        restored = await self.adaptive_client()
+        restored.restore_host_states(client.host_states())
+
+        with self.subTest("Should restore the rate of a host"):
+            self.assertEqual(restored.rate(url), client.max_rate / 2)
+
+        with self.subTest("Should restore the pause of a host"):
+            with self.assertRaises(RetryRequest) as retry:
+                await restored.fetch(url)
+            self.assertAlmostEqual(retry.exception.delay, 5, delta=0.5)
+
+    def test_parse_retry_after(self):
+        cases = {
+            "120": 120,
+            "-5": 0,
+            "Wed, 21 Oct 2015 07:28:00 GMT": 0,
+            "soon": None,
+            None: None,
+        }
+        for value, expected in cases.items():
+            with self.subTest("Should parse seconds and HTTP dates", value=value):
+                self.assertEqual(parse_retry_after(value), expected)
@@ -0,0 +1,157 @@
+import asyncio
+import os
+import tempfile
+from collections import Counter
+from unittest import IsolatedAsyncioTestCase
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from crawley.web_requests import StaticRequestClient
+from crawley.web_requests.clients.decorators.caching import (
+    CachingRequestClient,
+    CacheStats,
+    _CachedResponse,
+    _ResponseStore,
+)
+
+
+def versioned_app():
+    """Creates an app that serves pages with an ETag, which changes when the version of a page changes."""
+    requests, versions = Counter(), Counter()
+
+    async def handle(request: web.Request) -> web.Response:
+        path = request.match_info["path"]
+        requests[path] += 1
+        etag = f'"{path}-{versions[path]}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        headers = {"ETag": etag}
+        if path == "fresh":
+            headers["Cache-Control"] = "max-age=3600"
+        elif path == "private":
+            headers["Cache-Control"] = "no-store"
+        return web.Response(
+            text=f"<p>{path} {versions[path]}</p>" + "x" * 100,
+            content_type="text/html",
+            headers=headers,
+        )
+
+    app = web.Application()
+    app.router.add_get("/{path}", handle)
+    return app, requests, versions
+
+
+class TestCachingRequestClient(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.app, self.requests, self.versions = versioned_app()
+        server = TestServer(self.app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        self.url = str(server.make_url("/"))
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    async def caching_client(self, **kwargs) -> CachingRequestClient:
+        client = CachingRequestClient(StaticRequestClient(), self.directory, **kwargs)
+        self.addAsyncCleanup(client.close)
+        return client
+
+    async def test_fetch(self):
+        client = await self.caching_client()
+        url = f"{self.url}page"
+
+        with self.subTest("Should fetch and store an uncached page"):
+            response = await client.fetch(url)
+            self.assertEqual(response.web_resource.text[:10], "<p>page 0<")
+            self.assertEqual(client.stats, CacheStats(misses=1))
+
+        with self.subTest("Should serve an unchanged page from the cache"):
+            response = await client.fetch(url)
+            self.assertEqual(response.fetch.status, 200)
+            self.assertEqual(response.web_resource.text[:10], "<p>page 0<")
+            self.assertEqual(
+                client.stats, CacheStats(hits=1, misses=1, revalidations=1)
+            )
+
+        with self.subTest("Should keep the encoding of a cached page"):
+            self.assertEqual(response.web_resource.encoding, "utf-8")
+
+        with self.subTest("Should refetch a changed page"):
+            self.versions["page"] += 1
+            response = await client.fetch(url)
+            self.assertEqual(response.web_resource.text[:10], "<p>page 1<")
+            self.assertEqual(
+                client.stats, CacheStats(hits=1, misses=2, revalidations=2)
+            )
+
+        with self.subTest("Should serve a fresh page without a request"):
+            await client.fetch(f"{self.url}fresh")
+            await client.fetch(f"{self.url}fresh")
+            self.assertEqual(self.requests["fresh"], 1)
+
+        with self.subTest("Should not store no-store pages"):
+            await client.fetch(f"{self.url}private")
+            await client.fetch(f"{self.url}private")
+            self.assertEqual(self.requests["private"], 2)
+            self.assertEqual(client.stats.revalidations, 2)
+
+    async def test_persistence(self):
+        url = f"{self.url}page"
+        await (await self.caching_client()).fetch(url)
+
+        with self.subTest("Should keep the cache across clients"):
+            client = await self.caching_client()
+            await client.fetch(url)
+            self.assertEqual(client.stats, CacheStats(hits=1, revalidations=1))
+
+    async def test_eviction(self):
+        client = await self.caching_client(max_size=250)  # room for two pages
+        for path in ("a", "b", "c", "a"):
+            await client.fetch(f"{self.url}{path}")
+
+        with self.subTest("Should stay within its maximum size"):
+            self.assertLessEqual(client.size, 250)
+            self.assertEqual(client.stats.misses, 4)
+
+        with self.subTest("Should evict the least recently used pages"):
+            await client.fetch(f"{self.url}a")
+            self.assertEqual(client.stats.hits, 1)
+            await client.fetch(f"{self.url}b")
+            self.assertEqual(client.stats.hits, 1)
+
+        with self.subTest("Should stop evicting when its size drifted from the index"):
+            store = _ResponseStore(os.path.join(self.directory, "drifted"), 1000)
+            self.addCleanup(store.close)
+            store.put(
+                _CachedResponse("a", 200, "text/html", False, None, None, 0), b"a" * 100
+            )
+            store._size = 5000
+            await asyncio.wait_for(asyncio.to_thread(store._evict), 1)
+            self.assertEqual(store._size, 0)
+
+    async def test_concurrency(self):
+        store = _ResponseStore(self.directory, 1024 * 1024)
+        self.addCleanup(store.close)
+        entry = _CachedResponse("a", 200, "text/html", False, '"a"', None, 0)
+        bodies = [bytes([i]) * 100_000 for i in range(10)]
+        store.put(entry, bodies[0])
+
+        async def read() -> bytes:
+            return await asyncio.to_thread(store.read, entry)
+
+        results = await asyncio.gather(
+            *(asyncio.to_thread(store.put, entry, body) for body in bodies),
+            *(read() for _ in range(20)),
+        )
+
+        with self.subTest("Should never read a body that is being written"):
+            self.assertTrue(all(body in bodies for body in results[len(bodies) :]))
+
+        with self.subTest("Should keep one body per url"):
+            self.assertEqual(store.size, 100_000)
+            self.assertEqual(
+                [name for name in os.listdir(self.directory) if "index" not in name],
+                [os.path.basename(store._body_path("a"))],
+            )
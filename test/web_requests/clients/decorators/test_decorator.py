@@ -0,0 +1,51 @@
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+from crawley.web_requests import (
+    WebRequestClient,
+    Response,
+    FetchResult,
+    WebResource,
+    HybridRequestClient,
+)
+from crawley.web_requests.clients.decorators import (
+    DelayedRequestClient,
+    PoliteRequestClient,
+    AdaptiveRequestClient,
+    CachingRequestClient,
+)
+
+
+class LegacyClient(WebRequestClient):
+    """A client that implements fetch without headers, as clients did before headers were added."""
+
+    async def fetch(self, url: str) -> Response:
+        return Response(
+            FetchResult("GET", url, 200),
+            WebResource("text/html", b'<a href="/a"></a>' * 5),
+        )
+
+    async def user_agent(self) -> str | None:
+        return None
+
+    async def close(self) -> None:
+        pass
+
+
+class TestWebRequestClientDecorator(IsolatedAsyncioTestCase):
+    async def test_legacy_clients(self):
+        url = "https://example.com/"
+        with tempfile.TemporaryDirectory() as directory:
+            clients = {
+                "DelayedRequestClient": DelayedRequestClient(LegacyClient(), 0.01),
+                "PoliteRequestClient": PoliteRequestClient(LegacyClient()),
+                "AdaptiveRequestClient": AdaptiveRequestClient(LegacyClient()),
+                "CachingRequestClient": CachingRequestClient(LegacyClient(), directory),
+                "HybridRequestClient": HybridRequestClient(
+                    LegacyClient(), LegacyClient()
+                ),
+            }
+            for name, client in clients.items():
+                with self.subTest(f"{name} should wrap a client without headers"):
+                    self.assertEqual((await client.fetch(url)).fetch.status, 200)
+                    await client.close()
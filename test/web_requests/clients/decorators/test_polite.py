@@ -1,7 +1,7 @@
 import asyncio
 import time
 from unittest import IsolatedAsyncioTestCase
-from unittest.mock import Mock, AsyncMock, patch
+from unittest.mock import Mock, AsyncMock
 
 from crawley.web_requests.clients.decorators.polite import (
     PoliteRequestClient,
@@ -12,14 +12,13 @@ MOCK_USER_AGENT = "Mozilla"
 
 
 class TestPoliteRequestClient(IsolatedAsyncioTestCase):
-    @patch("crawley.web_requests.clients.decorators.polite._init_parser")
-    async def test_fetch(self, init_parser):
-        client = AsyncMock()
+    async def test_fetch(self):
+        client, robots_cache = AsyncMock(), AsyncMock()
         client.user_agent.return_value = MOCK_USER_AGENT
         robots_parser = Mock()
-        init_parser.return_value = robots_parser
+        robots_cache.get.return_value = robots_parser
 
-        polite_client = PoliteRequestClient(client)
+        polite_client = PoliteRequestClient(client, robots_cache)
 
         with self.subTest("Should disallow requests based on robots file"):
             robots_parser.can_fetch.return_value = False
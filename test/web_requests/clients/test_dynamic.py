@@ -1,16 +1,32 @@
+import asyncio
 import logging
+import re
 from unittest import IsolatedAsyncioTestCase
 from unittest.mock import AsyncMock, Mock
-from playwright.async_api import Response, Error
+from playwright.async_api import Response, Error, Browser
 
 from crawley.web_requests.clients.client import WEBPAGE_CONTENT_TYPE
-from crawley.web_requests.clients.dynamic import DynamicRequestClient, logger
+from crawley.web_requests.clients.dynamic import (
+    DynamicRequestClient,
+    BrowserPool,
+    ResourcePolicy,
+    BLOCK_UNNEEDED,
+    logger,
+)
+
+
+def mock_page() -> AsyncMock:
+    """Creates a mock page whose synchronous methods are not coroutines."""
+    page = AsyncMock()
+    page.is_closed = Mock(return_value=False)
+    page.on = Mock()
+    return page
 
 
 class TestDynamicRequestClient(IsolatedAsyncioTestCase):
     async def assert_fetch_error(self):
         """Asserts that an invalid fetch raises the correct error and is logged."""
-        browser, page = AsyncMock(), Mock()
+        browser, page = AsyncMock(), mock_page()
         page.goto.side_effect = Error("")
         browser.new_page.return_value = page
         with self.assertRaises(Error):
@@ -18,7 +34,7 @@ class TestDynamicRequestClient(IsolatedAsyncioTestCase):
                 await DynamicRequestClient(browser).fetch("")
 
     async def test_fetch(self):
-        browser, page, response = AsyncMock(), AsyncMock(), AsyncMock(spec=Response)
+        browser, page, response = AsyncMock(), mock_page(), AsyncMock(spec=Response)
         page.goto.return_value = response
         browser.new_page.return_value = page
 
@@ -45,6 +61,67 @@ class TestDynamicRequestClient(IsolatedAsyncioTestCase):
         with self.subTest("Fetching errors are handled"):
             await self.assert_fetch_error()
 
+    async def test_extract_links(self):
+        browser, page, response = AsyncMock(), mock_page(), AsyncMock(spec=Response)
+        page.goto.return_value = response
+        page.evaluate.return_value = ["http://a.com/1"]
+        browser.new_page.return_value = page
+        response.headers.get.return_value = WEBPAGE_CONTENT_TYPE
+
+        with self.subTest("Should return the links collected in the page"):
+            res = await DynamicRequestClient(browser, extract_links=True).fetch("")
+            self.assertEqual(res.links, ["http://a.com/1"])
+            self.assertTrue(res.is_parsable)
+            page.content.assert_not_awaited()
+
+        with self.subTest("Should collect links when the content type has a charset"):
+            page.content.reset_mock()
+            response.headers.get.return_value = "text/html; charset=utf-8"
+            res = await DynamicRequestClient(browser, extract_links=True).fetch("")
+            self.assertEqual(res.links, ["http://a.com/1"])
+            self.assertEqual(res.web_resource.content_type, WEBPAGE_CONTENT_TYPE)
+            page.content.assert_not_awaited()
+
+        with self.subTest("Should not collect links by default"):
+            page.content.return_value = "content"
+            res = await DynamicRequestClient(browser).fetch("")
+            self.assertIsNone(res.links)
+
+    async def test_resource_policy(self):
+        browser, page = AsyncMock(), mock_page()
+        page.goto.return_value = AsyncMock(spec=Response)
+        browser.new_page.return_value = page
+        await DynamicRequestClient(browser, resource_policy=BLOCK_UNNEEDED).fetch("")
+        handle = page.route.await_args.args[1]
+
+        cases = {
+            "Should block images": ("image", "http://a.com/a.png", True),
+            "Should block trackers": (
+                "script",
+                "https://www.google-analytics.com/analytics.js",
+                True,
+            ),
+            "Should allow scripts": ("script", "http://a.com/app.js", False),
+            "Should allow documents": ("document", "http://a.com/", False),
+        }
+        for message, (resource_type, url, blocked) in cases.items():
+            with self.subTest(message):
+                route = AsyncMock()
+                route.request = Mock(resource_type=resource_type, url=url)
+                await handle(route)
+                self.assertEqual(route.abort.await_count, blocked)
+                self.assertEqual(route.continue_.await_count, not blocked)
+
+        with self.subTest("Should not intercept requests without a policy"):
+            page.reset_mock()
+            await DynamicRequestClient(browser).fetch("")
+            page.route.assert_not_awaited()
+
+        with self.subTest("Should block urls matching a pattern"):
+            policy = ResourcePolicy(url_patterns=(re.compile(r"\.pdf$"),))
+            self.assertTrue(policy.blocks("document", "http://a.com/a.pdf"))
+            self.assertFalse(policy.blocks("image", "http://a.com/a.png"))
+
     async def test_user_agent(self):
         browser, page = AsyncMock(), AsyncMock()
         page.__aenter__.return_value, browser.new_page.return_value = page, page
@@ -58,3 +135,78 @@ class TestDynamicRequestClient(IsolatedAsyncioTestCase):
         browser.close = AsyncMock()
         await DynamicRequestClient(browser).close()
         browser.close.assert_called_once()
+
+
+def mock_browser() -> AsyncMock:
+    """Creates a mock browser whose contexts create mock pages."""
+    browser = AsyncMock(spec=Browser)
+    browser.new_context.side_effect = lambda: AsyncMock(
+        new_page=AsyncMock(side_effect=mock_page)
+    )
+    return browser
+
+
+class TestBrowserPool(IsolatedAsyncioTestCase):
+    async def test_acquire(self):
+        browser = mock_browser()
+        pool = BrowserPool(browser, 4, contexts=2)
+        pages = [await pool.acquire() for _ in range(4)]
+
+        with self.subTest("Should spread pages across contexts"):
+            self.assertEqual(browser.new_context.await_count, 2)
+            contexts = [pool._pages[page].context for page in pages]
+            self.assertEqual(len(set(contexts)), 2)
+            self.assertEqual(contexts.count(contexts[0]), 2)
+
+        with self.subTest("Should wait for a free page"):
+            waiting = asyncio.create_task(pool.acquire())
+            await asyncio.sleep(0)
+            self.assertFalse(waiting.done())
+            await pool.release(pages[0])
+            self.assertIs(await waiting, pages[0])
+
+        with self.subTest("Should close its pages and contexts"):
+            await pool.close()
+            for page in pages:
+                page.close.assert_awaited_once()
+            for context in set(contexts):
+                context.close.assert_awaited_once()
+
+    async def test_recycle(self):
+        pool = BrowserPool(mock_browser(), 1, max_navigations=2, max_heap=100)
+        page = await pool.acquire()
+        page.evaluate.return_value = 50
+
+        with self.subTest("Should reuse a page"):
+            await pool.release(page)
+            self.assertIs(await pool.acquire(), page)
+
+        with self.subTest("Should recycle a page after max_navigations"):
+            await pool.release(page)
+            page.close.assert_awaited_once()
+            new_page = await pool.acquire()
+            self.assertIsNot(new_page, page)
+            self.assertEqual(len(pool), 1)
+
+        with self.subTest("Should recycle a page whose heap is too large"):
+            new_page.evaluate.return_value = 200
+            await pool.release(new_page)
+            new_page.close.assert_awaited_once()
+            self.assertEqual(len(pool), 0)
+
+    async def test_crash(self):
+        pool = BrowserPool(mock_browser(), 1)
+        page = await pool.acquire()
+        on_crash = page.on.call_args.args[1]
+
+        with self.subTest("Should replace a crashed page"):
+            on_crash(page)
+            await pool.release(page)
+            page.close.assert_awaited_once()
+            new_page = await pool.acquire()
+            self.assertIsNot(new_page, page)
+
+        with self.subTest("Should replace a closed page"):
+            await pool.release(new_page)
+            new_page.is_closed.return_value = True
+            self.assertIsNot(await pool.acquire(), new_page)
@@ -0,0 +1,157 @@
+from unittest import IsolatedAsyncioTestCase, TestCase
+from unittest.mock import AsyncMock
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from playwright.async_api import Error
+
+from crawley.web_requests import (
+    Response,
+    FetchResult,
+    WebResource,
+    StaticRequestClient,
+)
+from crawley.web_requests.clients.hybrid import (
+    HybridRequestClient,
+    RenderMode,
+    RenderStats,
+    needs_rendering,
+)
+
+LINKS = '<a href="/1">1</a><a href="/2">2</a><a href="/3">3</a>'
+
+
+def page(url: str, content: str, content_type: str = "text/html") -> Response:
+    return Response(FetchResult("GET", url, 200), WebResource(content_type, content))
+
+
+def mock_client(pages: dict[str, str]) -> AsyncMock:
+    """Creates a client that serves the content of each path."""
+
+    async def fetch(url, headers=None):
+        return page(url, pages[url.rsplit("/", 1)[1]])
+
+    client = AsyncMock()
+    client.fetch = AsyncMock(side_effect=fetch)
+    return client
+
+
+class TestNeedsRendering(TestCase):
+    def test_needs_rendering(self):
+        cases = {
+            "Should not render a page with links": (LINKS, False),
+            "Should render a page with few links": ('<a href="/">home</a>', True),
+            "Should render an empty app root": (
+                f'{LINKS}<div id="root"></div>',
+                True,
+            ),
+            "Should not render a filled app root": (
+                f'<div id="root">{LINKS}</div>',
+                False,
+            ),
+            "Should render a page asking for JavaScript": (
+                f"{LINKS}<noscript><p>Please enable JavaScript.</p></noscript>",
+                True,
+            ),
+            "Should not render a page with an unrelated noscript": (
+                f'{LINKS}<noscript><img src="/pixel.gif"></noscript>',
+                False,
+            ),
+        }
+        for message, (content, expected) in cases.items():
+            with self.subTest(message):
+                self.assertEqual(needs_rendering(content), expected)
+                self.assertEqual(needs_rendering(content.encode()), expected)
+
+
+class TestHybridRequestClient(IsolatedAsyncioTestCase):
+    async def test_fetch(self):
+        static = mock_client({"links": LINKS, "app": '<div id="app"></div>'})
+        dynamic = mock_client({"app": f'<div id="app">{LINKS}</div>'})
+        client = HybridRequestClient(static, dynamic)
+
+        with self.subTest("Should not render a static page"):
+            response = await client.fetch("http://a.com/links")
+            self.assertEqual(response.web_resource.content, LINKS)
+            dynamic.fetch.assert_not_awaited()
+
+        with self.subTest("Should render a page that needs JavaScript"):
+            response = await client.fetch("http://a.com/app")
+            self.assertIn(LINKS, response.web_resource.content)
+            self.assertEqual(client.stats, RenderStats(static=1, dynamic=1))
+
+        with self.subTest("Should not render files"):
+            static.fetch.side_effect = None
+            static.fetch.return_value = page("http://a.com/file", b"", "image/png")
+            await client.fetch("http://a.com/file")
+            self.assertEqual(client.stats.dynamic, 1)
+
+    async def test_stream_links(self):
+        async def handle(request: web.Request) -> web.Response:
+            links = "".join(f'<a href="/{i}">{i}</a>' for i in range(20))
+            return web.Response(text=links, content_type="text/html")
+
+        app = web.Application()
+        app.router.add_get("/links", handle)
+        dynamic = mock_client({"links": '<a href="/1">1</a>'})
+        async with TestServer(app) as server:
+            async with StaticRequestClient(stream_links=True) as static:
+                client = HybridRequestClient(static, dynamic)
+                response = await client.fetch(str(server.make_url("/links")))
+
+        with self.subTest("Should count the links that were extracted while fetching"):
+            self.assertEqual(len(response.links), 20)
+            dynamic.fetch.assert_not_awaited()
+            self.assertEqual(client.stats, RenderStats(static=1))
+
+    async def test_browser_error(self):
+        static = mock_client({"app": '<div id="app"></div>'})
+        dynamic = AsyncMock()
+        dynamic.fetch.side_effect = Error("crashed")
+        client = HybridRequestClient(static, dynamic)
+
+        with self.subTest("Should fall back to the static page"):
+            response = await client.fetch("http://a.com/app")
+            self.assertEqual(response.web_resource.content, '<div id="app"></div>')
+
+    async def test_learning(self):
+        static = mock_client({"app": "<p>few links</p>", "links": LINKS})
+        dynamic = mock_client({"app": LINKS, "links": LINKS})
+        client = HybridRequestClient(static, dynamic, learn_after=3)
+
+        for _ in range(3):
+            await client.fetch("http://spa.com/app")
+            await client.fetch("http://static.com/links")
+
+        with self.subTest("Should render hosts where rendering worked"):
+            self.assertEqual(client.mode("http://spa.com/"), RenderMode.DYNAMIC)
+            static.fetch.reset_mock()
+            await client.fetch("http://spa.com/app")
+            static.fetch.assert_not_awaited()
+
+        with self.subTest("Should not render hosts where static pages worked"):
+            self.assertEqual(client.mode("http://static.com/"), RenderMode.STATIC)
+            static.fetch.side_effect = None
+            static.fetch.return_value = page(
+                "http://static.com/app", "<p>few links</p>"
+            )
+            dynamic.fetch.reset_mock()
+            await client.fetch("http://static.com/app")
+            dynamic.fetch.assert_not_awaited()
+
+        with self.subTest("Should not decide the mode of unknown hosts"):
+            self.assertIsNone(client.mode("http://other.com/"))
+
+        with self.subTest("Should only learn from webpages"):
+            static.fetch.return_value = page("http://files.com/a", b"PNG", "image/png")
+            for _ in range(3):
+                await client.fetch("http://files.com/a")
+            self.assertIsNone(client.mode("http://files.com/"))
+
+    async def test_close(self):
+        static, dynamic = AsyncMock(), AsyncMock()
+        async with HybridRequestClient(static, dynamic):
+            pass
+        with self.subTest("Should close both clients"):
+            static.close.assert_awaited_once()
+            dynamic.close.assert_awaited_once()
@@ -1,10 +1,20 @@
+import asyncio
 import logging
-from unittest import IsolatedAsyncioTestCase
+from collections.abc import AsyncIterator
+from unittest import IsolatedAsyncioTestCase, TestCase
 from unittest.mock import AsyncMock, Mock
-from aiohttp import ClientSession, ClientError, ClientResponseError
+from aiohttp import ClientSession, ClientError, ClientResponseError, web
+from aiohttp.test_utils import TestServer
 
-from crawley.web_requests.clients.client import WEBPAGE_CONTENT_TYPE
-from crawley.web_requests.clients.static import StaticRequestClient, logger
+from crawley import CrawlMetrics
+from crawley.web_requests.clients.client import WEBPAGE_CONTENT_TYPE, FetchResult
+from crawley.web_requests.clients.static import (
+    StaticRequestClient,
+    PoolStats,
+    logger,
+    _LinkParser,
+    MEGABYTE,
+)
 
 
 def set_attributes(obj: object, dictionary: dict):
@@ -13,6 +23,34 @@ def set_attributes(obj: object, dictionary: dict):
         setattr(obj, key, value)
 
 
+def mock_stream(*chunks: bytes) -> Mock:
+    """Creates a mock of a response's body stream, which yields chunks."""
+
+    async def iter_chunked(size: int):
+        for chunk in chunks:
+            yield chunk
+
+    return Mock(iter_chunked=iter_chunked)
+
+
+class TestLinkParser(TestCase):
+    def test_encoding(self):
+        link = "/привет".encode("koi8-r")
+        page = b'<html><head><meta charset="koi8-r"></head><a href="' + link + b'"></a>'
+        cases = {
+            "Should sniff a <meta> charset split across chunks": page,
+            "Should sniff a <meta> charset after the first chunk": b" " * 500 + page,
+            "Should parse a webpage larger than a kilobyte": page + b" " * 2000,
+        }
+        for message, content in cases.items():
+            with self.subTest(message):
+                parser = _LinkParser("https://a.com/")
+                for i in range(0, len(content), 10):
+                    parser.feed(content[i : i + 10])
+                self.assertEqual(parser.close(), ["https://a.com/привет"])
+                self.assertEqual(parser.encoding, "koi8-r")
+
+
 class TestStaticRequestClient(IsolatedAsyncioTestCase):
     async def assert_fetch_error(self):
         """Asserts that an invalid fetch raises the correct error and is logged."""
@@ -34,14 +72,16 @@ class TestStaticRequestClient(IsolatedAsyncioTestCase):
         """Tests that webpages and files can be fetched with proper error handling."""
         webpage_response = {
             "content_type": WEBPAGE_CONTENT_TYPE,
-            "text": AsyncMock(return_value="content"),
+            "charset": "UTF-8",
+            "content": mock_stream(b"<p>caf\xc3\xa9</p>"),
         }
         file_response = {
             "content_type": "application/pdf",
-            "read": AsyncMock(return_value=b"content"),
+            "charset": None,
+            "content": mock_stream(b"content"),
         }
 
-        session, response = Mock(), AsyncMock()
+        session, response = Mock(), AsyncMock(content_length=None)
         response.__aenter__.return_value = response
         session.get.return_value = response
         client = StaticRequestClient(session)
@@ -50,16 +90,18 @@ class TestStaticRequestClient(IsolatedAsyncioTestCase):
             set_attributes(response, webpage_response)
             with self.assertLogs(logger.name, logging.INFO):
                 res = await client.fetch("")
-            webpage_response["text"].assert_called()
-            self.assertIsInstance(
-                res.web_resource.content, str, "Expected to fetch webpage as string"
+            self.assertEqual(
+                res.web_resource.content,
+                b"<p>caf\xc3\xa9</p>",
+                "Expected to fetch webpage as the bytes it was sent as",
             )
+            self.assertEqual(res.web_resource.encoding, "utf-8")
+            self.assertEqual(res.web_resource.text, "<p>café</p>")
 
         with self.subTest("Fetching file"):
             set_attributes(response, file_response)
             with self.assertLogs(logger.name, logging.INFO):
                 res = await client.fetch("")
-            file_response["read"].assert_called()
             self.assertIsInstance(
                 res.web_resource.content, bytes, "Expected to fetch file as binary"
             )
@@ -88,3 +130,181 @@ class TestStaticRequestClient(IsolatedAsyncioTestCase):
         session.close = AsyncMock()
         await StaticRequestClient(session).close()
         session.close.assert_called_once()
+
+    async def test_connection_pool(self):
+        """Tests the connection limits and statistics of the connection pool."""
+        active, most_active, release = 0, 0, asyncio.Event()
+
+        async def handle(request: web.Request) -> web.Response:
+            nonlocal active, most_active
+            active += 1
+            most_active = max(most_active, active)
+            await release.wait()
+            active -= 1
+            return web.Response(text="page", content_type="text/html")
+
+        app = web.Application()
+        app.router.add_get("/", handle)
+        server = TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        url, host = str(server.make_url("/")), f"{server.host}:{server.port}"
+
+        async with StaticRequestClient(limit_per_host=2) as client:
+            fetches = [asyncio.create_task(client.fetch(url)) for _ in range(4)]
+            await asyncio.sleep(0.1)
+
+            with self.subTest("Should count the connections in use"):
+                self.assertEqual(client.pool_stats(), {host: PoolStats(acquired=2)})
+
+            release.set()
+            await asyncio.gather(*fetches)
+
+            with self.subTest("Should limit the connections to a host"):
+                self.assertEqual(most_active, 2)
+
+            with self.subTest("Should keep connections open for reuse"):
+                self.assertEqual(client.pool_stats(), {host: PoolStats(idle=2)})
+                self.assertEqual(client.pool_stats()[host].open, 2)
+
+        with self.subTest("Should not read the pool of a custom connector"):
+            session = Mock(connector=None)
+            self.assertEqual(StaticRequestClient(session).pool_stats(), {})
+
+    async def test_body_limits(self):
+        """Tests the maximum sizes, skipping and streaming of bodies."""
+        html = b'<html><head><base href="/docs/"></head><body><a href="a">A</a>'
+        html += b'<a href="https://b.com/">B</a>' + b"<p>text</p>" * 10_000 + b"</body>"
+        chunks_sent = 0
+
+        async def endless(request: web.Request) -> web.StreamResponse:
+            nonlocal chunks_sent
+            response = web.StreamResponse(headers={"Content-Type": "text/plain"})
+            await response.prepare(request)
+            while True:
+                await response.write(b"0" * 1024)
+                chunks_sent += 1
+
+        async def page(request: web.Request) -> web.Response:
+            return web.Response(body=html, content_type="text/html")
+
+        async def file(request: web.Request) -> web.Response:
+            return web.Response(body=b"%PDF" * 1000, content_type="application/pdf")
+
+        async def video(request: web.Request) -> web.Response:
+            return web.Response(body=b"0" * 2 * MEGABYTE, content_type="video/mp4")
+
+        async def unlinked(request: web.Request) -> web.Response:
+            return web.Response(body=b"<p>text</p>", content_type="text/html")
+
+        app = web.Application()
+        app.router.add_get("/endless", endless)
+        app.router.add_get("/page", page)
+        app.router.add_get("/file.pdf", file)
+        app.router.add_get("/video.mp4", video)
+        app.router.add_get("/unlinked", unlinked)
+        server = TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+
+        async with StaticRequestClient() as client:
+            with self.subTest("Should abandon large files that are not webpages"):
+                with self.assertLogs(logger.name, logging.WARNING):
+                    response = await client.fetch(str(server.make_url("/video.mp4")))
+                self.assertEqual(response.web_resource.content, b"")
+                self.assertEqual(client.max_size("application/xml"), 50 * MEGABYTE)
+
+        with self.subTest("Should get the most specific maximum size"):
+            client = StaticRequestClient(
+                Mock(), max_sizes={"text/html": 1, "text/*": 2, "*": None}
+            )
+            self.assertEqual(client.max_size("text/html"), 1)
+            self.assertEqual(client.max_size("text/plain"), 2)
+            self.assertIsNone(client.max_size("image/png"))
+            self.assertIsNone(StaticRequestClient(Mock(), max_sizes={}).max_size("*"))
+
+        async with StaticRequestClient(
+            max_sizes={"text/html": len(html), "*": 10_000}
+        ) as client:
+            with self.subTest("Should abandon bodies larger than the maximum size"):
+                with self.assertLogs(logger.name, logging.WARNING):
+                    response = await asyncio.wait_for(
+                        client.fetch(str(server.make_url("/endless"))), 5
+                    )
+                self.assertEqual(response.web_resource.content, b"")
+
+            with self.subTest("Should close the connection of an abandoned body"):
+                await asyncio.sleep(0.05)
+                sent = chunks_sent
+                await asyncio.sleep(0.05)
+                self.assertEqual(chunks_sent, sent)
+
+            with self.subTest("Should read bodies within the maximum size"):
+                response = await client.fetch(str(server.make_url("/page")))
+                self.assertEqual(response.web_resource.content, html)
+
+            with self.subTest("Should abandon bodies by their declared length"):
+                client.max_sizes = {"*": 100}
+                with self.assertLogs(logger.name, logging.WARNING):
+                    response = await client.fetch(str(server.make_url("/file.pdf")))
+                self.assertFalse(response.is_parsable)
+
+        streamed = []
+
+        async def sink(fetch_result: FetchResult, chunks: AsyncIterator[bytes]):
+            streamed.append((fetch_result.url, b"".join([c async for c in chunks])))
+
+        async with StaticRequestClient(
+            max_sizes={"text/html": None, "*": 0}, resource_sink=sink, stream_links=True
+        ) as client:
+            with self.subTest("Should stream skipped bodies to the sink"):
+                url = str(server.make_url("/file.pdf"))
+                response = await client.fetch(url)
+                self.assertEqual(response.web_resource.content, b"")
+                self.assertEqual(streamed, [(url, b"%PDF" * 1000)])
+
+            with self.subTest("Should extract the links of webpages as they arrive"):
+                response = await client.fetch(str(server.make_url("/page")))
+                self.assertEqual(
+                    response.links,
+                    [str(server.make_url("/docs/a")), "https://b.com/"],
+                )
+                self.assertEqual(response.web_resource.content, b"")
+                self.assertTrue(response.is_parsable)
+
+            with self.subTest("Should parse a streamed webpage without links"):
+                response = await client.fetch(str(server.make_url("/unlinked")))
+                self.assertEqual(response.links, [])
+                self.assertTrue(response.is_parsable)
+
+    async def test_metrics(self):
+        """Tests that the timings, statuses and sizes of requests are recorded."""
+
+        async def handle(request: web.Request) -> web.Response:
+            return web.Response(text="page", content_type="text/html")
+
+        app = web.Application()
+        app.router.add_get("/", handle)
+        server = TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        host = f"{server.host}:{server.port}"
+
+        metrics = CrawlMetrics()
+        async with StaticRequestClient(metrics=metrics) as client:
+            await client.fetch(str(server.make_url("/")))
+            with self.assertLogs(logger.name, logging.WARNING):
+                await client.fetch(str(server.make_url("/missing")))
+        snapshot = metrics.snapshot(host)
+
+        with self.subTest("Should count the statuses of responses"):
+            self.assertEqual(snapshot.counters["status_2xx"], 1)
+            self.assertEqual(snapshot.counters["status_4xx"], 1)
+
+        with self.subTest("Should count the bytes of bodies"):
+            self.assertEqual(snapshot.counters["bytes"], len("page"))
+
+        with self.subTest("Should time requests with the session's trace config"):
+            self.assertEqual(snapshot.counters["requests"], 2)
+            self.assertEqual(snapshot.timings["ttfb"].count, 2)
+            self.assertEqual(snapshot.timings["body"].count, 1)
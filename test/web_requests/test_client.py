@@ -1,8 +1,13 @@
 import asyncio
-from unittest import IsolatedAsyncioTestCase
+import codecs
+from unittest import IsolatedAsyncioTestCase, TestCase
 from unittest.mock import patch, AsyncMock
 
-from crawley.web_requests.clients.client import WebRequestClient
+from crawley.web_requests.clients.client import (
+    WebRequestClient,
+    WebResource,
+    sniff_encoding,
+)
 
 
 async def mock_fetch(fetch_time: str):
@@ -39,3 +44,81 @@ class TestWebRequestClient(IsolatedAsyncioTestCase):
             for response in responses:
                 self.assertIsInstance(response, Exception)
             cancel_tasks.assert_called()
+
+    @patch.multiple(WebRequestClient, __abstractmethods__=set())
+    async def test_fetch_multiple_concurrency(self):
+        client, in_progress, max_in_progress = WebRequestClient(), 0, 0
+
+        async def fetch(url):
+            nonlocal in_progress, max_in_progress
+            in_progress += 1
+            max_in_progress = max(max_in_progress, in_progress)
+            await asyncio.sleep(0.01)
+            in_progress -= 1
+            return url
+
+        client.fetch = fetch
+
+        with self.subTest("Should not exceed the concurrency window"):
+            responses = [r async for r in client.fetch_multiple(range(10), 3)]
+            self.assertEqual(sorted(responses), list(range(10)))
+            self.assertEqual(max_in_progress, 3)
+
+        with self.subTest("Should lazily take urls from an async iterable"):
+            taken = 0
+
+            async def urls():
+                nonlocal taken
+                for url in range(100):
+                    taken += 1
+                    yield url
+
+            fetch_generator = client.fetch_multiple(urls(), 2)
+            async for _ in fetch_generator:
+                await fetch_generator.aclose()
+                break
+            self.assertLessEqual(taken, 3)
+
+        with self.subTest("Should raise errors of the urls after the last response"):
+
+            async def failing_urls():
+                yield 0
+                # after the fetch of 0 is done
+                await asyncio.sleep(0.02)
+                raise ValueError
+
+            with self.assertRaises(ValueError):
+                async for _ in client.fetch_multiple(failing_urls()):
+                    # a slow consumer, so the urls fail while the last response is consumed
+                    await asyncio.sleep(0.05)
+
+
+class TestEncoding(TestCase):
+    def test_sniff_encoding(self):
+        cases = (
+            ("a byte order mark", codecs.BOM_UTF16_LE + b"<p>", "utf-8", "utf-16"),
+            ("the declared charset", b"<meta charset='latin-1'>", "UTF8", "utf-8"),
+            ("a meta charset", b'<meta charset="Shift_JIS">', None, "shift-jis"),
+            (
+                "a http-equiv meta charset",
+                b'<meta http-equiv="Content-Type" content="text/html; charset=euc-kr">',
+                "unknown",
+                "euc-kr",
+            ),
+            ("nothing", b"<p>page</p>", None, None),
+        )
+        for name, content, declared, encoding in cases:
+            with self.subTest(f"Should get the encoding from {name}"):
+                self.assertEqual(sniff_encoding(content, declared), encoding)
+
+    def test_text(self):
+        with self.subTest("Should decode content in its encoding"):
+            resource = WebResource("text/html", "café".encode("cp1252"), "cp1252")
+            self.assertEqual(resource.text, "café")
+
+        with self.subTest("Should replace bytes that are invalid in the encoding"):
+            resource = WebResource("text/html", "café".encode("cp1252"), "utf-8")
+            self.assertEqual(resource.text, "caf�")
+
+        with self.subTest("Should get text content as it is"):
+            self.assertEqual(WebResource("text/html", "café").text, "café")
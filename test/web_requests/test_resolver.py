@@ -0,0 +1,74 @@
+import asyncio
+import socket
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from crawley.web_requests import StaticRequestClient, CachingResolver
+
+
+def mock_resolver(delay: float = 0) -> AsyncMock:
+    async def resolve(host, port=0, family=socket.AF_INET):
+        await asyncio.sleep(delay)
+        if host == "invalid":
+            raise OSError("Name or service not known")
+        return [{"hostname": host, "host": "127.0.0.1", "port": port}]
+
+    return AsyncMock(resolve=AsyncMock(side_effect=resolve))
+
+
+class TestCachingResolver(IsolatedAsyncioTestCase):
+    async def test_resolve(self):
+        inner = mock_resolver(0.01)
+        resolver = CachingResolver(inner, ttl=0.1, max_size=2)
+
+        with self.subTest("Should look a host up once"):
+            results = await asyncio.gather(
+                *(resolver.resolve("a.com", 80) for _ in range(3))
+            )
+            await resolver.resolve("a.com", 80)
+            self.assertEqual(inner.resolve.await_count, 1)
+            self.assertEqual(results[0][0]["host"], "127.0.0.1")
+
+        with self.subTest("Should look a host up again after ttl"):
+            await asyncio.sleep(0.1)
+            await resolver.resolve("a.com", 80)
+            self.assertEqual(inner.resolve.await_count, 2)
+
+        with self.subTest("Should not cache failed lookups"):
+            for _ in range(2):
+                with self.assertRaises(OSError):
+                    await resolver.resolve("invalid")
+            self.assertEqual(inner.resolve.await_count, 4)
+
+        with self.subTest("Should evict the least recently used lookups"):
+            await resolver.resolve("b.com")
+            await resolver.resolve("c.com")
+            await resolver.resolve("a.com", 80)
+            self.assertEqual(inner.resolve.await_count, 7)
+
+        with self.subTest("Should close the inner resolver"):
+            await resolver.close()
+            inner.close.assert_awaited_once()
+
+    async def test_shared(self):
+        async def handle(request: web.Request) -> web.Response:
+            return web.Response(text="page")
+
+        app = web.Application()
+        app.router.add_get("/", handle)
+        server = TestServer(app, host="localhost")
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        inner = mock_resolver()
+        resolver = CachingResolver(inner)
+
+        for _ in range(2):
+            async with StaticRequestClient(resolver=resolver, dns_ttl=None) as client:
+                response = await client.fetch(str(server.make_url("/")))
+                self.assertEqual(response.fetch.status, 200)
+
+        with self.subTest("Should share lookups between clients"):
+            self.assertEqual(inner.resolve.await_count, 1)
@@ -0,0 +1,132 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock
+
+from crawley.web_requests import Response, FetchResult, WebResource, RetryRequest
+from crawley.web_requests.robots import RobotsCache
+
+ROBOTS = b"User-agent: *\nDisallow: /private\nCrawl-delay: 2\n"
+
+
+def robots_response(status: int, content: bytes = None) -> Response:
+    return Response(
+        FetchResult("GET", "", status),
+        WebResource("text/plain", content) if content is not None else None,
+    )
+
+
+class TestRobotsCache(IsolatedAsyncioTestCase):
+    async def test_get(self):
+        client = AsyncMock()
+        client.fetch.return_value = robots_response(200, ROBOTS)
+        cache = RobotsCache(client)
+
+        with self.subTest("Should parse the robots.txt file of the host"):
+            parser = await cache.get("https://example.com/page")
+            client.fetch.assert_called_once_with("https://example.com/robots.txt")
+            self.assertFalse(parser.can_fetch("*", "https://example.com/private"))
+            self.assertTrue(parser.can_fetch("*", "https://example.com/public"))
+            self.assertEqual(parser.crawl_delay("*"), 2)
+
+        with self.subTest("Should fetch robots.txt once per host"):
+            await cache.get("https://example.com/other")
+            client.fetch.assert_called_once()
+
+    async def test_concurrent_get(self):
+        async def slow_fetch(url):
+            await asyncio.sleep(0.01)
+            return robots_response(200, ROBOTS)
+
+        client = AsyncMock()
+        client.fetch.side_effect = slow_fetch
+        cache = RobotsCache(client)
+        parsers = await asyncio.gather(
+            *(cache.get(f"https://example.com/{i}") for i in range(5))
+        )
+        client.fetch.assert_called_once()
+        self.assertEqual(len(set(map(id, parsers))), 1)
+
+    async def test_errors(self):
+        client = AsyncMock()
+        url = "https://example.com/page"
+
+        with self.subTest("Client errors should allow all requests by default"):
+            client.fetch.return_value = robots_response(404)
+            self.assertTrue((await RobotsCache(client).get(url)).can_fetch("*", url))
+
+        with self.subTest("Server errors should disallow all requests by default"):
+            client.fetch.return_value = robots_response(503)
+            self.assertFalse((await RobotsCache(client).get(url)).can_fetch("*", url))
+
+        with self.subTest("Unreachable hosts should disallow all requests by default"):
+            client.fetch.side_effect = Exception
+            self.assertFalse((await RobotsCache(client).get(url)).can_fetch("*", url))
+
+        with self.subTest("Error policies should be configurable"):
+            client.fetch.side_effect = None
+            client.fetch.return_value = robots_response(503)
+            cache = RobotsCache(client, allow_on_server_error=True)
+            self.assertTrue((await cache.get(url)).can_fetch("*", url))
+
+    async def test_retries(self):
+        url = "https://example.com/page"
+        client = AsyncMock()
+        client.fetch.side_effect = [
+            RetryRequest("https://example.com/robots.txt", 0, 1, "status 503"),
+            robots_response(200, ROBOTS),
+        ]
+        parser = await RobotsCache(client).get(url)
+
+        with self.subTest("Should retry transient failures"):
+            self.assertEqual(client.fetch.call_count, 2)
+
+        with self.subTest("Should not cache transient failures as errors"):
+            self.assertTrue(parser.can_fetch("*", url))
+
+    async def test_host_states(self):
+        client = AsyncMock()
+        client.fetch.side_effect = [robots_response(200, ROBOTS), robots_response(503)]
+        cache = RobotsCache(client)
+        await cache.get("https://a.com/")
+        await cache.get("https://b.com/")
+        restored = RobotsCache(client)
+        restored.restore_host_states(cache.host_states())
+
+        with self.subTest("Should restore robots.txt files without fetching them"):
+            parser = await restored.get("https://a.com/")
+            self.assertEqual(client.fetch.call_count, 2)
+            self.assertFalse(parser.can_fetch("*", "https://a.com/private"))
+            self.assertEqual(parser.crawl_delay("*"), 2)
+
+        with self.subTest("Should restore failed fetches"):
+            parser = await restored.get("https://b.com/")
+            self.assertFalse(parser.can_fetch("*", "https://b.com/"))
+
+        with self.subTest("Should not restore expired robots.txt files"):
+            restored = RobotsCache(client)
+            states = cache.host_states()
+            states["https://a.com/"]["robots"]["expires_at"] = 0
+            restored.restore_host_states(states)
+            self.assertNotIn("https://a.com/", restored)
+            self.assertIn("https://b.com/", restored)
+
+    async def test_eviction(self):
+        client = AsyncMock()
+        client.fetch.return_value = robots_response(200, ROBOTS)
+
+        with self.subTest("Should evict the least recently used host"):
+            cache = RobotsCache(client, maxsize=2)
+            await cache.get("https://a.com/")
+            await cache.get("https://b.com/")
+            await cache.get("https://a.com/")
+            await cache.get("https://c.com/")
+            self.assertEqual(len(cache), 2)
+            self.assertIn("https://a.com/", cache)
+            self.assertNotIn("https://b.com/", cache)
+
+        with self.subTest("Should refetch robots.txt once it expires"):
+            client.fetch.reset_mock()
+            cache = RobotsCache(client, ttl=0)
+            await cache.get("https://a.com/")
+            await cache.get("https://a.com/")
+            self.assertEqual(client.fetch.call_count, 2)